@@ -13,7 +13,11 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import json
-from pathlib import Path
+
+from utils.publicacion import directorio_servido
+from utils.precalentar import ultimo_precalentamiento
+from utils.recarga import iniciar_tareas_de_fondo
+from utils.memoria import reporte_memoria, tabla_cache, tabla_memoria
 
 # =============================================================================
 # CONFIGURACION DE PAGINA (debe ser lo primero)
@@ -193,14 +197,50 @@ def render_header():
 
 def obtener_metadata():
     """Obtiene informacion sobre la actualizacion de datos."""
-    metadata_path = Path('master_data/metadata.json')
+    metadata_path = directorio_servido() / 'metadata.json'
     if metadata_path.exists():
         with open(metadata_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     return None
 
 
+def _mb(valor) -> str:
+    return f"{valor / 1024 ** 2:,.1f} MB" if valor is not None else "n/d"
+
+
+def render_memoria():
+    """Memoria de los datasets por columna, RSS del proceso y cache de resultados."""
+    reporte = reporte_memoria()
+    disco = reporte['cache']['disco']
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Datasets en memoria", _mb(reporte['total_datasets_bytes']))
+    col2.metric("RSS del proceso", _mb(reporte['proceso']['rss_bytes']))
+    col3.metric("Cache de resultados", _mb(reporte['cache']['bytes']),
+                help=f"Presupuesto: {_mb(reporte['cache']['presupuesto_bytes'])}")
+    col4.metric("Cache en disco", _mb(disco['bytes']),
+                help=f"{disco['archivos']} archivos, maximo {_mb(disco['max_bytes'])}")
+
+    st.dataframe(tabla_memoria(reporte), hide_index=True, use_container_width=True)
+    for dataset, error in reporte['errores'].items():
+        st.warning(f"{dataset}: {error}")
+
+    st.markdown("**Cache de resultados por funcion** (desde que arranco este proceso)")
+    st.dataframe(tabla_cache(reporte), hide_index=True, use_container_width=True)
+
+    precalentado = ultimo_precalentamiento()
+    if precalentado:
+        cargas = ', '.join(f"{d} {s:.2f} s" for d, s in precalentado['datasets'].items())
+        st.caption(f"Carga al iniciar: {cargas} (precalentamiento completo en {precalentado['total']:.1f} s)")
+        for paso, error in precalentado['errores'].items():
+            st.warning(f"Precalentamiento {paso}: {error}")
+
+
 def main():
+    # Carga datasets, indices y vistas por defecto en segundo plano (una vez
+    # por version) y activa las versiones que se publiquen despues
+    iniciar_tareas_de_fondo()
+
     render_header()
 
     # Informacion de actualizacion
@@ -428,6 +468,10 @@ def main():
     para garantizar consultas rápidas y eficientes.
     """)
 
+    with st.expander("🧠 Uso de memoria de los datos"):
+        if st.button("Medir memoria", help="Carga los datasets que todavía no estén en memoria"):
+            render_memoria()
+
     # Footer
     st.markdown("---")
 
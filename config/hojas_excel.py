@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Especificaciones declarativas de las hojas de los Excel de la Superintendencia.
+
+Cada hoja se describe con una EspecHoja (fila de fechas, columnas de codigo,
+nombre y valores, reglas de codigos) que consume el extractor generico
+utils/extraccion.py. Agregar un dataset nuevo es agregar una entrada a
+HOJAS_EXCEL, no escribir otro script de parseo celda por celda.
+
+Las filas y columnas se expresan como en Excel (filas desde 1, columnas por
+letra) para poder contrastarlas directamente con los archivos.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class EspecHoja:
+    """Estructura de una hoja y como convertirla a formato largo."""
+    dataset: str                        # Dataset de salida (varias hojas pueden compartirlo)
+    hoja: str                           # Nombre de la hoja en el Excel
+    fila_fechas: int                    # Fila con las fechas de cada columna
+    col_valores: str                    # Primera columna con valores (y fechas)
+    fila_inicio: int = 7                # Primera fila de datos
+    fila_fin: Optional[int] = None      # Ultima fila de datos (inclusive)
+    col_codigo: str = 'A'
+    col_nombre: str = 'B'
+    columna_nombre: str = 'cuenta'      # Nombre de la columna de salida para el nombre
+    columna_valor: str = 'valor'        # Nombre de la columna de salida para el valor
+    # Las fechas terminan en la primera celda vacia o invalida
+    fechas_contiguas: bool = False
+    # Conservar celdas sin valor (valor NaN) en la salida
+    conservar_nulos: bool = False
+    # Descartar filas sin codigo / sin nombre
+    requiere_codigo: bool = False
+    requiere_nombre: bool = False
+    # Filas resumen: el codigo es `marcador_resumen` y se asigna segun el nombre
+    marcador_resumen: str = '--'
+    codigos_resumen: Dict[str, str] = field(default_factory=dict)
+    codigos_descartar: Tuple[str, ...] = ()
+    calcular_nivel: bool = False
+    # Hojas sin columna de codigo: fila -> (codigo, nombre, col_nombre, categoria)
+    filas: Dict[int, Tuple[str, str, str, str]] = field(default_factory=dict)
+    # Valores guardados como texto con coma decimal
+    coma_decimal: bool = False
+    # Agregar columna 'hoja' (datasets armados con varias hojas)
+    incluir_hoja: bool = False
+    # Consolidacion del dataset completo
+    deduplicar: bool = False
+    orden: Tuple[str, ...] = ()
+    tipos: Tuple[Tuple[str, str], ...] = ()
+    # Si es False la hoja solo se procesa cuando se pide explicitamente
+    activa: bool = True
+
+
+# =============================================================================
+# PYG - FILAS RESUMEN
+# =============================================================================
+
+# Codigos para cuentas resumen (filas con "--")
+CODIGOS_RESUMEN_PYG = {
+    'MARGEN NETO DE INTERESES': 'MNI',
+    'MARGEN BRUTO FINANCIERO': 'MBF',
+    'MARGEN NETO FINANCIERO': 'MNF',
+    'MARGEN DE INTERMEDIACION': 'MDI',
+    'MARGEN OPERACIONAL': 'MOP',
+    'GANANCIA O PERDIDA ANTES DE IMPUESTOS': 'GAI',
+    'GANANCIA O PERDIDA DEL EJERCICIO': 'GDE',
+}
+
+
+# =============================================================================
+# CAMEL - FILAS DE INDICADORES
+# =============================================================================
+
+# Formato: fila_excel: (codigo, nombre, columna_nombre, categoria)
+FILAS_CAMEL = {
+    # Fila 6-11: Indicadores de solvencia y estructura (columna B)
+    6: ('SOL', 'Indice de Solvencia PTC/APPR', 'B', 'C - Capital'),
+    9: ('AIN', 'Activos Improductivos Netos / Total Activos', 'B', 'A - Activos'),
+    10: ('CAR_ACT', 'Cartera Total / Activo Total', 'B', 'A - Activos'),
+    11: ('INV_ACT', 'Inversiones / Total Activo', 'B', 'A - Activos'),
+
+    # Filas 12-19: Participación de crédito (columna C) - Para treemap
+    12: ('PART_INMOB_VIP', 'Participacion Credito Inmobiliario y Vivienda Interes Publico', 'C', 'Composicion Cartera'),
+    13: ('PART_PROD', 'Participacion Credito Productivo Nuevo', 'C', 'Composicion Cartera'),
+    14: ('PART_CONS', 'Participacion Credito de Consumo', 'C', 'Composicion Cartera'),
+    15: ('PART_INMOB', 'Participacion Credito Inmobiliario', 'C', 'Composicion Cartera'),
+    16: ('PART_MICRO', 'Participacion Credito Microcredito', 'C', 'Composicion Cartera'),
+    17: ('PART_VIS', 'Participacion Credito Vivienda Interes Social y Publico', 'C', 'Composicion Cartera'),
+    18: ('PART_EDU', 'Participacion Credito Educativo', 'C', 'Composicion Cartera'),
+    19: ('PART_INV_PUB', 'Participacion Credito Inversion Publica', 'C', 'Composicion Cartera'),
+
+    # Filas 22-31: Morosidad (columna C) - excepto fila 29
+    22: ('MOR_TOT', 'Morosidad Total', 'C', 'A - Activos'),
+    23: ('MOR_INMOB_VIP', 'Morosidad Credito Inmobiliario y Vivienda Interes Publico', 'C', 'A - Activos'),
+    24: ('MOR_PROD', 'Morosidad Credito Productivo Nuevo', 'C', 'A - Activos'),
+    25: ('MOR_CONS', 'Morosidad Credito de Consumo', 'C', 'A - Activos'),
+    26: ('MOR_INMOB', 'Morosidad Credito Inmobiliaria', 'C', 'A - Activos'),
+    27: ('MOR_MICRO', 'Morosidad Credito Microcredito', 'C', 'A - Activos'),
+    28: ('MOR_VIS', 'Morosidad Credito Vivienda Interes Social', 'C', 'A - Activos'),
+    # Fila 29 esta vacia
+    30: ('MOR_EDU', 'Morosidad Credito Educativo', 'C', 'A - Activos'),
+    31: ('MOR_INV_PUB', 'Morosidad Credito Inversion Publica', 'C', 'A - Activos'),
+
+    # Filas 33-41: Cobertura (columna C)
+    33: ('COB_TOT', 'Cobertura Total Cartera', 'C', 'A - Activos'),
+    34: ('COB_INMOB_VIP', 'Cobertura Credito Inmobiliario y Vivienda Interes Publico', 'C', 'A - Activos'),
+    35: ('COB_PROD', 'Cobertura Credito Productivo Nuevo', 'C', 'A - Activos'),
+    36: ('COB_CONS', 'Cobertura Credito de Consumo', 'C', 'A - Activos'),
+    37: ('COB_INMOB', 'Cobertura Credito Inmobiliaria', 'C', 'A - Activos'),
+    38: ('COB_MICRO', 'Cobertura Credito Microcredito', 'C', 'A - Activos'),
+    39: ('COB_VIS', 'Cobertura Credito Vivienda Interes Social', 'C', 'A - Activos'),
+    40: ('COB_EDU', 'Cobertura Credito Educativo', 'C', 'A - Activos'),
+    41: ('COB_INV_PUB', 'Cobertura Credito Inversion Publica', 'C', 'A - Activos'),
+
+    # Filas 43-46: Management (columna B)
+    43: ('AP_PC', 'Activos Productivos / Pasivos con Costo', 'B', 'M - Management'),
+    44: ('GO_MNF', 'Gastos Operacion / Margen Neto Financiero', 'B', 'M - Management'),
+    45: ('GP_ACT', 'Gastos Personal / Total Activo Promedio', 'B', 'M - Management'),
+    46: ('GO_ACT', 'Gastos Operacion / Total Activo Promedio', 'B', 'M - Management'),
+
+    # Filas 48-52: Earnings (columna B)
+    48: ('ROA', 'Rendimiento Operativo sobre Activo (ROA)', 'B', 'E - Earnings'),
+    49: ('ROE', 'Rendimiento sobre Patrimonio (ROE)', 'B', 'E - Earnings'),
+    51: ('DEP_SPREAD', 'Dependencia Spread', 'B', 'E - Earnings'),
+    52: ('DEP_BRECHA', 'Dependencia Brecha', 'B', 'E - Earnings'),
+
+    # Fila 54: Liquidez (columna B)
+    54: ('LIQ', 'Indice de Liquidez Fondos Disponibles / Total Depositos', 'B', 'L - Liquidity'),
+}
+
+
+# =============================================================================
+# HOJAS PROCESADAS
+# =============================================================================
+
+ESPEC_BAL = EspecHoja(
+    dataset='balance',
+    hoja='BAL',
+    fila_fechas=5,
+    col_valores='C',
+    fila_inicio=7,
+    conservar_nulos=True,
+    calcular_nivel=True,
+    tipos=(('banco', 'category'), ('nivel', 'int8')),
+)
+
+# Se guardan los valores acumulados; pyg.parquet se deriva despues
+# (procesar_pyg.derivar_pyg)
+ESPEC_PYG = EspecHoja(
+    dataset='pyg_acumulado',
+    hoja='PYG',
+    fila_fechas=5,
+    col_valores='C',
+    fila_inicio=6,
+    fila_fin=140,
+    columna_valor='valor_acumulado',
+    fechas_contiguas=True,
+    requiere_codigo=True,
+    requiere_nombre=True,
+    codigos_resumen=CODIGOS_RESUMEN_PYG,
+    codigos_descartar=('nan',),
+)
+
+ESPEC_CAMEL = EspecHoja(
+    dataset='camel',
+    hoja='CAMEL',
+    fila_fechas=5,
+    col_valores='D',
+    columna_nombre='indicador',
+    filas=FILAS_CAMEL,
+    coma_decimal=True,
+    deduplicar=True,
+    orden=('banco', 'codigo', 'fecha'),
+)
+
+# Hojas retiradas del dashboard. Se asume la misma estructura que BAL
+# (codigo en A, nombre en B, fechas en la fila 5 desde C); se procesan
+# solo a pedido (actualizar.py --hojas).
+ESPEC_INDICAD = EspecHoja(
+    dataset='indicadores',
+    hoja='INDICAD',
+    fila_fechas=5,
+    col_valores='C',
+    incluir_hoja=True,
+    calcular_nivel=True,
+    activa=False,
+)
+
+ESPEC_INDIC_CARTERA = EspecHoja(
+    dataset='indicadores',
+    hoja='INDIC CARTERA',
+    fila_fechas=5,
+    col_valores='C',
+    incluir_hoja=True,
+    calcular_nivel=True,
+    activa=False,
+)
+
+ESPEC_ESTRUC_CART = EspecHoja(
+    dataset='cartera',
+    hoja='ESTRUC CART',
+    fila_fechas=5,
+    col_valores='C',
+    incluir_hoja=True,
+    calcular_nivel=True,
+    activa=False,
+)
+
+ESPEC_REFINA_REES = EspecHoja(
+    dataset='cartera',
+    hoja='REFINA REES',
+    fila_fechas=5,
+    col_valores='C',
+    incluir_hoja=True,
+    calcular_nivel=True,
+    activa=False,
+)
+
+ESPEC_FUENTES_USOS = EspecHoja(
+    dataset='fuentes_usos',
+    hoja='FUENTES USOS',
+    fila_fechas=5,
+    col_valores='C',
+    calcular_nivel=True,
+    activa=False,
+)
+
+HOJAS_EXCEL = (
+    ESPEC_BAL,
+    ESPEC_PYG,
+    ESPEC_CAMEL,
+    ESPEC_INDICAD,
+    ESPEC_INDIC_CARTERA,
+    ESPEC_ESTRUC_CART,
+    ESPEC_REFINA_REES,
+    ESPEC_FUENTES_USOS,
+)
+
+
+def obtener_especs(datasets=None) -> Tuple[EspecHoja, ...]:
+    """
+    Especificaciones a procesar.
+
+    Args:
+        datasets: Nombres de dataset a incluir (por defecto, las hojas activas)
+    """
+    if datasets is None:
+        return tuple(e for e in HOJAS_EXCEL if e.activa)
+    return tuple(e for e in HOJAS_EXCEL if e.dataset in datasets)
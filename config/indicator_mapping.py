@@ -43,6 +43,11 @@ CODIGOS_BALANCE = {
     'resultados': '36',
 }
 
+# Treemaps y crecimiento del Panorama: cuentas de 1 y 2 digitos y solo las
+# columnas que usan (ver indice_panorama en pages/1_Panorama.py)
+NIVELES_PANORAMA = (1, 2)
+COLUMNAS_PANORAMA = ('periodo', 'codigo', 'valor')
+
 # Subcuentas importantes de cartera
 CODIGOS_CARTERA = {
     'cartera_comercial': '1401',
@@ -327,6 +332,9 @@ BANCOS_SISTEMA = [
     'Visionfund',
 ]
 
+# Bancos preseleccionados por defecto en las paginas (nombres como vienen en los datos)
+BANCOS_DEFAULT = ['Pichincha', 'Pacifico', 'Guayaquil', 'Produbanco']
+
 # =============================================================================
 # PALETA DE COLORES POR BANCO
 # =============================================================================
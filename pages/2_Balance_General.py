@@ -15,9 +15,18 @@ import sys
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import cargar_balance, obtener_fechas_disponibles
+from utils.data_loader import cargar_indice
+from utils.recarga import iniciar_tareas_de_fondo
+from utils.vistas import (
+    ANO_INICIO_POR_DEFECTO,
+    obtener_datos_heatmap_mensual,
+    obtener_jerarquia_cuentas,
+    obtener_serie_banco,
+    obtener_serie_sistema,
+    obtener_valores_bancos_mes,
+)
 from utils.charts import COLORES
-from config.indicator_mapping import CODIGOS_BALANCE, ETIQUETAS_BALANCE, COLORES_BANCOS, obtener_color_banco
+from config.indicator_mapping import BANCOS_DEFAULT, CODIGOS_BALANCE, ETIQUETAS_BALANCE, COLORES_BANCOS, obtener_color_banco
 
 # =============================================================================
 # CONFIGURACION
@@ -29,9 +38,6 @@ st.set_page_config(
     layout="wide",
 )
 
-# Bancos preseleccionados por defecto
-BANCOS_DEFAULT = ['Pichincha', 'Pacifico', 'Guayaquil', 'Produbanco']
-
 # Nombres de meses en español
 MESES = {
     1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril',
@@ -39,189 +45,14 @@ MESES = {
     9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
 }
 
-# =============================================================================
-# FUNCIONES DE DATOS
-# =============================================================================
-
-@st.cache_data
-def obtener_jerarquia_cuentas(df: pd.DataFrame) -> dict:
-    """
-    Construye un diccionario jerárquico de cuentas.
-    Retorna: {codigo_1d: {nombre, subcuentas: {codigo_2d: {nombre, subcuentas: {codigo_4d: {nombre, subcuentas: {codigo_6d: nombre}}}}}}}
-    """
-    cuentas = df[['codigo', 'cuenta']].drop_duplicates()
-    cuentas = cuentas[cuentas['codigo'].str.match(r'^[0-9]+$', na=False)]
-
-    jerarquia = {}
-
-    # Nivel 1: 1 dígito (activos, pasivos, patrimonio, contingentes, orden)
-    for _, row in cuentas[cuentas['codigo'].str.len() == 1].iterrows():
-        if row['codigo'] in ['1', '2', '3', '6', '7']:  # Incluir cuentas de orden
-            jerarquia[row['codigo']] = {
-                'nombre': row['cuenta'],
-                'subcuentas': {}
-            }
-
-    # Nivel 2: 2 dígitos
-    for _, row in cuentas[cuentas['codigo'].str.len() == 2].iterrows():
-        parent = row['codigo'][0]
-        if parent in jerarquia:
-            jerarquia[parent]['subcuentas'][row['codigo']] = {
-                'nombre': row['cuenta'],
-                'subcuentas': {}
-            }
-
-    # Nivel 3: 4 dígitos
-    for _, row in cuentas[cuentas['codigo'].str.len() == 4].iterrows():
-        parent_1d = row['codigo'][0]
-        parent_2d = row['codigo'][:2]
-        if parent_1d in jerarquia and parent_2d in jerarquia[parent_1d]['subcuentas']:
-            jerarquia[parent_1d]['subcuentas'][parent_2d]['subcuentas'][row['codigo']] = {
-                'nombre': row['cuenta'],
-                'subcuentas': {}
-            }
-
-    # Nivel 4: 6 dígitos
-    for _, row in cuentas[cuentas['codigo'].str.len() == 6].iterrows():
-        parent_1d = row['codigo'][0]
-        parent_2d = row['codigo'][:2]
-        parent_4d = row['codigo'][:4]
-        if (parent_1d in jerarquia and
-            parent_2d in jerarquia[parent_1d]['subcuentas'] and
-            parent_4d in jerarquia[parent_1d]['subcuentas'][parent_2d]['subcuentas']):
-            jerarquia[parent_1d]['subcuentas'][parent_2d]['subcuentas'][parent_4d]['subcuentas'][row['codigo']] = row['cuenta']
-
-    return jerarquia
-
-
-@st.cache_data
-def obtener_serie_banco(df: pd.DataFrame, banco: str, codigo: str) -> pd.DataFrame:
-    """Obtiene serie temporal de un banco para una cuenta especifica."""
-    df_filtrado = df[(df['banco'] == banco) & (df['codigo'] == codigo)].copy()
-    df_filtrado = df_filtrado.sort_values('fecha')
-    df_filtrado['valor_millones'] = df_filtrado['valor'] / 1000
-    return df_filtrado[['fecha', 'valor', 'valor_millones']]
-
-
-@st.cache_data
-def obtener_serie_sistema(df: pd.DataFrame, codigo: str) -> pd.DataFrame:
-    """Obtiene serie temporal agregada del sistema."""
-    df_filtrado = df[df['codigo'] == codigo].copy()
-    serie = df_filtrado.groupby('fecha')['valor'].sum().reset_index()
-    serie['valor_millones'] = serie['valor'] / 1000
-    serie = serie.sort_values('fecha')
-    return serie
-
-
-@st.cache_data
-def obtener_datos_heatmap_mensual(df_completo: pd.DataFrame, codigo: str, bancos: list = None,
-                                   fecha_inicio: pd.Timestamp = None, fecha_fin: pd.Timestamp = None) -> pd.DataFrame:
-    """Prepara datos para heatmap de crecimiento YoY mensual por banco.
-
-    Calcula el crecimiento de cada mes vs el mismo mes del año anterior.
-    Retorna matriz: filas = bancos, columnas = fechas (YYYY-MM)
-
-    NOTA: Usa df_completo (sin filtrar) para calcular YoY correctamente,
-    luego filtra el resultado por fecha_inicio/fecha_fin.
-    """
-    df_filtrado = df_completo[df_completo['codigo'] == codigo].copy()
-
-    if bancos:
-        df_filtrado = df_filtrado[df_filtrado['banco'].isin(bancos)]
-
-    if df_filtrado.empty:
-        return pd.DataFrame()
-
-    df_filtrado['ano'] = df_filtrado['fecha'].dt.year
-    df_filtrado['mes'] = df_filtrado['fecha'].dt.month
-    df_filtrado['valor_millones'] = df_filtrado['valor'] / 1000
-
-    # Crear columna fecha_str para el pivote
-    df_filtrado['fecha_str'] = df_filtrado['fecha'].dt.strftime('%Y-%m')
-
-    # Calcular crecimiento YoY: cada mes vs mismo mes año anterior
-    df_filtrado = df_filtrado.sort_values(['banco', 'ano', 'mes'])
-
-    # Para cada banco y mes, calcular variación vs año anterior
-    df_filtrado['valor_ano_anterior'] = df_filtrado.groupby(['banco', 'mes'])['valor_millones'].shift(1)
-    df_filtrado['crecimiento_yoy'] = ((df_filtrado['valor_millones'] / df_filtrado['valor_ano_anterior']) - 1) * 100
-
-    # Filtrar por rango de fechas si se especifica
-    if fecha_inicio is not None:
-        df_filtrado = df_filtrado[df_filtrado['fecha'] >= fecha_inicio]
-    if fecha_fin is not None:
-        df_filtrado = df_filtrado[df_filtrado['fecha'] <= fecha_fin]
-
-    if df_filtrado.empty:
-        return pd.DataFrame()
-
-    # Pivotar: filas = bancos, columnas = fecha_str
-    heatmap_data = df_filtrado.pivot_table(
-        index='banco',
-        columns='fecha_str',
-        values='crecimiento_yoy',
-        aggfunc='first'
-    )
-
-    # Ordenar bancos por valor del último período disponible (más grande arriba)
-    ultima_fecha = df_filtrado['fecha'].max()
-    valores_ultima_fecha = df_filtrado[df_filtrado['fecha'] == ultima_fecha].set_index('banco')['valor_millones']
-    orden_bancos = valores_ultima_fecha.sort_values(ascending=True).index
-    heatmap_data = heatmap_data.reindex(orden_bancos)
-
-    return heatmap_data
-
-
-@st.cache_data
-def obtener_valores_bancos_mes(df: pd.DataFrame, codigo: str, fecha: pd.Timestamp) -> pd.DataFrame:
-    """Obtiene valores de todos los bancos para una cuenta y mes especificos.
-
-    Args:
-        df: DataFrame de balance
-        codigo: Codigo de cuenta contable
-        fecha: Fecha especifica (se usara año y mes)
-
-    Returns:
-        DataFrame con columnas: banco, valor_millones (ordenado descendente)
-    """
-    # Filtrar por codigo y fecha (año y mes)
-    df_filtrado = df[
-        (df['codigo'] == codigo) &
-        (df['fecha'].dt.year == fecha.year) &
-        (df['fecha'].dt.month == fecha.month)
-    ].copy()
-
-    if df_filtrado.empty:
-        return pd.DataFrame()
-
-    # Calcular valor en millones
-    df_filtrado['valor_millones'] = df_filtrado['valor'] / 1000
-
-    # Filtrar solo valores positivos y que no sean NaN
-    df_filtrado = df_filtrado[
-        (df_filtrado['valor_millones'].notna()) &
-        (df_filtrado['valor_millones'] > 0)
-    ]
-
-    if df_filtrado.empty:
-        return pd.DataFrame()
-
-    # Agrupar por banco (en caso de duplicados, tomar el primer valor)
-    resultado = df_filtrado.groupby('banco', as_index=False).agg({
-        'valor_millones': 'first'
-    })
-
-    # Ordenar por valor descendente
-    resultado = resultado.sort_values('valor_millones', ascending=False)
-
-    return resultado
-
-
 # =============================================================================
 # PAGINA PRINCIPAL
 # =============================================================================
 
 def main():
+    # Precalentamiento y recarga de datos (tambien al entrar directo a esta pagina)
+    iniciar_tareas_de_fondo()
+
     st.title("📊 Balance General")
     st.markdown("Analisis temporal avanzado del sistema bancario ecuatoriano.")
 
@@ -241,22 +72,22 @@ def main():
 
     # Cargar datos
     try:
-        df_balance, calidad = cargar_balance()
+        indice = cargar_indice('balance')
     except Exception as e:
         st.error(f"Error al cargar datos: {e}")
         return
 
     # Lista de bancos
-    bancos = sorted(df_balance['banco'].unique().tolist())
-    fechas = obtener_fechas_disponibles(df_balance)
+    bancos = indice.bancos
+    fechas = indice.fechas[::-1]
 
     # ==========================================================================
     # SIDEBAR - INFORMACION GENERAL
     # ==========================================================================
 
     # Rango de fechas disponibles
-    fecha_min = df_balance['fecha'].min()
-    fecha_max = df_balance['fecha'].max()
+    fecha_min = fechas[-1]
+    fecha_max = fechas[0]
 
     st.sidebar.markdown("### Informacion del Modulo")
     st.sidebar.markdown(f"**Datos disponibles:** {fecha_min.strftime('%b %Y')} - {fecha_max.strftime('%b %Y')}")
@@ -273,7 +104,7 @@ def main():
     st.caption("Compara la evolucion temporal de multiples bancos")
 
     # Obtener jerarquia de cuentas
-    jerarquia = obtener_jerarquia_cuentas(df_balance)
+    jerarquia = obtener_jerarquia_cuentas()
 
     # -------------------------------------------------------------------------
     # FILA 1: Filtros de Cuenta (ARRIBA del gráfico)
@@ -399,7 +230,7 @@ def main():
         ano_inicio_evol = st.selectbox(
             "Año desde",
             options=range(fecha_min.year, fecha_max.year + 1),
-            index=max(0, 2015 - fecha_min.year),
+            index=max(0, ANO_INICIO_POR_DEFECTO - fecha_min.year),
             key="ano_inicio_evol"
         )
         st.markdown("---")
@@ -434,15 +265,8 @@ def main():
     else:
         fecha_fin_evol = pd.Timestamp(f"{ano_fin_evol}-{mes_fin + 1:02d}-01") - pd.Timedelta(days=1)
 
-    # Filtrar datos
-    df_evol = df_balance[
-        (df_balance['fecha'] >= fecha_inicio_evol) &
-        (df_balance['fecha'] <= fecha_fin_evol)
-    ]
-
     # Obtener nombre de la cuenta seleccionada
-    cuenta_info = df_balance[df_balance['codigo'] == codigo_cuenta_final]['cuenta'].iloc[0] if \
-        not df_balance[df_balance['codigo'] == codigo_cuenta_final].empty else codigo_cuenta_final
+    cuenta_info = indice.nombre(codigo_cuenta_final)
 
     # Dibujar gráfico
     with col_chart:
@@ -452,10 +276,10 @@ def main():
 
             # Serie del sistema para participacion
             if modo_viz == "Participacion %" or incluir_sistema:
-                serie_sistema = obtener_serie_sistema(df_evol, codigo_cuenta_final)
+                serie_sistema = obtener_serie_sistema(codigo_cuenta_final, fecha_inicio_evol, fecha_fin_evol)
 
             for banco in bancos_seleccionados:
-                serie = obtener_serie_banco(df_evol, banco, codigo_cuenta_final)
+                serie = obtener_serie_banco(banco, codigo_cuenta_final, fecha_inicio_evol, fecha_fin_evol)
 
                 if not serie.empty:
                     if modo_viz == "Valores Absolutos":
@@ -483,7 +307,7 @@ def main():
 
             # Agregar sistema si se solicita
             if incluir_sistema and modo_viz != "Participacion %":
-                serie_sis = obtener_serie_sistema(df_evol, codigo_cuenta_final)
+                serie_sis = obtener_serie_sistema(codigo_cuenta_final, fecha_inicio_evol, fecha_fin_evol)
                 if modo_viz == "Indexado (Base 100)":
                     base = serie_sis['valor_millones'].iloc[0]
                     y_values = (serie_sis['valor_millones'] / base) * 100 if base > 0 else serie_sis['valor_millones']
@@ -630,7 +454,7 @@ def main():
         ano_inicio_heat = st.selectbox(
             "Año desde",
             options=range(fecha_min.year, fecha_max.year + 1),
-            index=max(0, 2015 - fecha_min.year),
+            index=max(0, ANO_INICIO_POR_DEFECTO - fecha_min.year),
             key="ano_inicio_heat"
         )
         st.markdown("---")
@@ -656,13 +480,11 @@ def main():
         fecha_fin_heat = pd.Timestamp(f"{ano_fin_heat}-{mes_fin_heat + 1:02d}-01") - pd.Timedelta(days=1)
 
     # Obtener nombre de la cuenta seleccionada
-    cuenta_heat_info = df_balance[df_balance['codigo'] == codigo_cuenta_heat]['cuenta'].iloc[0] if \
-        not df_balance[df_balance['codigo'] == codigo_cuenta_heat].empty else codigo_cuenta_heat
+    cuenta_heat_info = indice.nombre(codigo_cuenta_heat)
 
-    # Generar datos del heatmap (usa df_balance completo para calcular YoY correctamente)
+    # Generar datos del heatmap (usa la serie completa para calcular YoY correctamente)
     # Sin filtro de bancos - mostrar todos
     heatmap_data = obtener_datos_heatmap_mensual(
-        df_balance,  # DataFrame completo para calcular YoY
         codigo_cuenta_heat,
         None,  # Sin filtro de bancos - mostrar todos
         fecha_inicio_heat,
@@ -854,11 +676,11 @@ def main():
     fecha_r = pd.Timestamp(year=ano_r, month=mes_r, day=1)
 
     # Obtener titulo de la cuenta seleccionada
-    cuenta_info = df_balance[df_balance['codigo'] == codigo_r]['cuenta'].iloc[0] if len(df_balance[df_balance['codigo'] == codigo_r]) > 0 else codigo_r
+    cuenta_info = indice.nombre(codigo_r)
     titulo_cuenta_r = f"{codigo_r} - {cuenta_info}" if cuenta_info != codigo_r else codigo_r
 
     # Obtener datos de ranking
-    datos_ranking = obtener_valores_bancos_mes(df_balance, codigo_r, fecha_r)
+    datos_ranking = obtener_valores_bancos_mes(codigo_r, fecha_r)
 
     if not datos_ranking.empty:
         # Crear grafico de barras
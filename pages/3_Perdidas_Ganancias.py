@@ -5,19 +5,20 @@ Analisis de resultados y rentabilidad del sistema bancario.
 """
 
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
 import sys
-import calendar
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import cargar_pyg, cargar_balance, obtener_fechas_disponibles
-from config.indicator_mapping import obtener_color_banco
+from utils.data_loader import cargar_indice, cargar_serie, filtrar_por_periodos
+from utils.periodos import periodo
+from utils.recarga import iniciar_tareas_de_fondo
+from utils.vistas import ANO_INICIO_POR_DEFECTO, obtener_fechas_con_12m, obtener_sistema_12m
+from config.indicator_mapping import BANCOS_DEFAULT, obtener_color_banco
 
 # =============================================================================
 # CONFIGURACION
@@ -40,51 +41,27 @@ CUENTAS_PYG = {
     'GDE': 'Ganancia del Ejercicio',
 }
 
-# =============================================================================
-# FUNCIONES DE DATOS
-# =============================================================================
-
-@st.cache_data
-def obtener_orden_bancos_por_activos() -> list:
-    """Obtiene lista de bancos ordenados por activos totales (mayor a menor)."""
-    try:
-        df_balance, _ = cargar_balance()
-        fecha_max_bal = df_balance['fecha'].max()
-        # Codigo '1' es activo total
-        df_activos = df_balance[
-            (df_balance['fecha'] == fecha_max_bal) &
-            (df_balance['codigo'] == '1')
-        ][['banco', 'valor']].copy()
-        df_activos = df_activos.sort_values('valor', ascending=False)
-        return df_activos['banco'].tolist()
-    except Exception:
-        return []
-
-
 # =============================================================================
 # PAGINA PRINCIPAL
 # =============================================================================
 
 def main():
+    # Precalentamiento y recarga de datos (tambien al entrar directo a esta pagina)
+    iniciar_tareas_de_fondo()
+
     st.title("💰 Perdidas y Ganancias")
     st.markdown("Analisis de perdidas y ganancias del sistema bancario ecuatoriano.")
 
     # Cargar datos
     try:
-        df_pyg, calidad = cargar_pyg()
+        indice = cargar_indice('pyg')
     except Exception as e:
         st.error(f"Error al cargar datos de PYG: {e}")
         return
 
-    # Lista de bancos y fechas
-    bancos = sorted(df_pyg['banco'].unique().tolist())
-    fechas = obtener_fechas_disponibles(df_pyg)
-
-    # Filtrar solo registros con valor_12m valido
-    df_pyg = df_pyg[df_pyg['valor_12m'].notna()]
-
-    # Fechas disponibles
-    fechas = obtener_fechas_disponibles(df_pyg)
+    # Lista de bancos y fechas (solo meses con valor_12m valido)
+    bancos = indice.bancos
+    fechas = obtener_fechas_con_12m()
     fecha_min = min(fechas)
     fecha_max = max(fechas)
 
@@ -95,9 +72,6 @@ def main():
         9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
     }
 
-    # Bancos por defecto para seleccion (con nombres exactos como aparecen en los datos)
-    BANCOS_DEFAULT = ['Pichincha', 'Pacifico', 'Guayaquil', 'Produbanco']
-
     # Filtrar solo los que existen en los datos
     bancos_exactos = [b for b in BANCOS_DEFAULT if b in bancos]
     if not bancos_exactos:
@@ -154,7 +128,7 @@ def main():
         ano_inicio = st.selectbox(
             "Año desde",
             options=range(fecha_min.year, fecha_max.year + 1),
-            index=max(0, 2015 - fecha_min.year),  # Enero 2015 por defecto
+            index=max(0, ANO_INICIO_POR_DEFECTO - fecha_min.year),  # Enero 2015 por defecto
             key="ano_inicio_pyg"
         )
 
@@ -188,21 +162,18 @@ def main():
         )
 
     with col_chart:
-        fecha_inicio_sel = pd.Timestamp(year=ano_inicio, month=mes_inicio, day=1)
-        # Usar ultimo dia del mes para coincidir con formato de datos
-        last_day_fin = calendar.monthrange(ano_fin, mes_fin)[1]
-        fecha_fin_sel = pd.Timestamp(year=ano_fin, month=mes_fin, day=last_day_fin)
+        # Rango por periodo: no depende del dia del mes con que vengan las fechas
+        periodo_inicio_sel = periodo(ano_inicio, mes_inicio)
+        periodo_fin_sel = periodo(ano_fin, mes_fin)
 
         if bancos_seleccionados:
             fig_evol = go.Figure()
 
             for i, banco in enumerate(bancos_seleccionados):
-                df_banco = df_pyg[
-                    (df_pyg['banco'] == banco) &
-                    (df_pyg['codigo'] == codigo_cuenta) &
-                    (df_pyg['fecha'] >= fecha_inicio_sel) &
-                    (df_pyg['fecha'] <= fecha_fin_sel)
-                ].copy().sort_values('fecha')
+                # Una fila de series_pyg por banco en lugar de filtrar todo pyg
+                df_banco = filtrar_por_periodos(
+                    cargar_serie('pyg', codigo_cuenta, (banco,)), periodo_inicio_sel, periodo_fin_sel
+                ).sort_values('fecha')
 
                 if not df_banco.empty:
                     df_banco['valor_millones'] = df_banco['valor_12m'] / 1000
@@ -213,11 +184,7 @@ def main():
                         y_label = "Indice (Base 100)"
                     elif modo == 'Participacion':
                         # Calcular participacion sobre total del sistema
-                        df_total = df_pyg[
-                            (df_pyg['codigo'] == codigo_cuenta) &
-                            (df_pyg['fecha'] >= fecha_inicio_sel) &
-                            (df_pyg['fecha'] <= fecha_fin_sel)
-                        ].groupby('fecha')['valor_12m'].sum().reset_index()
+                        df_total = obtener_sistema_12m(codigo_cuenta, periodo_inicio_sel, periodo_fin_sel)
                         df_banco = df_banco.merge(df_total, on='fecha', suffixes=('', '_total'))
                         y_data = (df_banco['valor_12m'] / df_banco['valor_12m_total'] * 100)
                         y_label = "Participacion (%)"
@@ -237,11 +204,7 @@ def main():
 
             # Agregar total del sistema si se solicita
             if incluir_sistema and modo == 'Absoluto':
-                df_sistema = df_pyg[
-                    (df_pyg['codigo'] == codigo_cuenta) &
-                    (df_pyg['fecha'] >= fecha_inicio_sel) &
-                    (df_pyg['fecha'] <= fecha_fin_sel)
-                ].groupby('fecha')['valor_12m'].sum().reset_index()
+                df_sistema = obtener_sistema_12m(codigo_cuenta, periodo_inicio_sel, periodo_fin_sel)
                 df_sistema['valor_millones'] = df_sistema['valor_12m'] / 1000
 
                 fig_evol.add_trace(go.Scatter(
@@ -305,15 +268,11 @@ def main():
             key="ano_rank_pyg"
         )
 
-    # Usar ultimo dia del mes para coincidir con formato de datos
-    last_day_rank = calendar.monthrange(ano_rank, mes_rank)[1]
-    fecha_rank = pd.Timestamp(year=ano_rank, month=mes_rank, day=last_day_rank)
+    periodo_rank = periodo(ano_rank, mes_rank)
 
     # Obtener datos de ranking
-    df_rank = df_pyg[
-        (df_pyg['fecha'] == fecha_rank) &
-        (df_pyg['codigo'] == codigo_rank)
-    ].copy()
+    df_rank = indice.corte(codigo_rank, periodo_rank)
+    df_rank = df_rank[df_rank['valor_12m'].notna()].copy()
 
     if not df_rank.empty:
         df_rank['valor_millones'] = df_rank['valor_12m'] / 1000
@@ -6,7 +6,6 @@ Analisis de indicadores financieros del sistema bancario ecuatoriano.
 
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -15,7 +14,14 @@ import sys
 
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.data_loader import cargar_camel, cargar_balance, obtener_fechas_disponibles
+from utils.data_loader import cargar_calidad, cargar_indice
+from utils.recarga import iniciar_tareas_de_fondo
+from utils.vistas import (
+    bancos_evolucion_camel,
+    obtener_evolucion_indicador,
+    obtener_heatmap_indicador,
+    obtener_ranking_indicador,
+)
 from config.indicator_mapping import (
     COLORES_BANCOS,
     obtener_color_banco,
@@ -211,118 +217,13 @@ RANGOS_HEATMAP = {
 }
 
 
-# =============================================================================
-# FUNCIONES DE DATOS
-# =============================================================================
-
-@st.cache_data
-def obtener_fecha_disponible(df: pd.DataFrame, codigo: str, fecha_objetivo) -> pd.Timestamp:
-    """
-    Obtiene la fecha mas reciente disponible para un indicador.
-    Si no existe dato para la fecha objetivo, busca el mes anterior.
-
-    Esto maneja el caso del indice de solvencia que tiene rezago de 1 mes.
-    """
-    # Intentar con fecha objetivo
-    df_fecha = df[(df['codigo'] == codigo) & (df['fecha'] == fecha_objetivo)]
-
-    if not df_fecha.empty:
-        return fecha_objetivo
-
-    # Si no hay datos, buscar la fecha mas cercana anterior
-    df_codigo = df[df['codigo'] == codigo]
-    fechas_disponibles = df_codigo['fecha'].sort_values(ascending=False)
-
-    for fecha in fechas_disponibles:
-        if fecha <= fecha_objetivo:
-            return fecha
-
-    # Si no hay ninguna fecha anterior, retornar la mas reciente
-    return fechas_disponibles.iloc[0] if len(fechas_disponibles) > 0 else fecha_objetivo
-
-
-@st.cache_data
-def obtener_ranking_indicador(df: pd.DataFrame, codigo: str, fecha, excluir_bancos: list = None) -> pd.DataFrame:
-    """Obtiene ranking de bancos para un indicador en una fecha."""
-    # Obtener fecha disponible (maneja rezago)
-    fecha_real = obtener_fecha_disponible(df, codigo, fecha)
-
-    df_filtrado = df[(df['codigo'] == codigo) & (df['fecha'] == fecha_real)].copy()
-
-    # Excluir bancos si se especifica
-    if excluir_bancos:
-        df_filtrado = df_filtrado[~df_filtrado['banco'].isin(excluir_bancos)]
-
-    df_filtrado['valor_pct'] = df_filtrado['valor'] * 100
-    df_filtrado = df_filtrado.sort_values('valor', ascending=False)
-    return df_filtrado[['banco', 'valor', 'valor_pct']], fecha_real
-
-
-@st.cache_data
-def obtener_evolucion_indicador(df: pd.DataFrame, codigo: str, bancos: list) -> pd.DataFrame:
-    """Obtiene evolucion temporal de un indicador para varios bancos."""
-    df_filtrado = df[(df['codigo'] == codigo) & (df['banco'].isin(bancos))].copy()
-    df_filtrado = df_filtrado.sort_values(['banco', 'fecha'])
-    df_filtrado['valor_pct'] = df_filtrado['valor'] * 100
-    return df_filtrado
-
-
-@st.cache_data
-@st.cache_data
-def obtener_heatmap_indicador(df: pd.DataFrame, codigo: str, fecha_inicio=None, fecha_fin=None) -> pd.DataFrame:
-    """Obtiene datos para heatmap de un indicador (bancos x meses)."""
-    df_filtrado = df[df['codigo'] == codigo].copy()
-
-    # Filtrar por rango de fechas si se especifica
-    if fecha_inicio is not None:
-        df_filtrado = df_filtrado[df_filtrado['fecha'] >= fecha_inicio]
-    if fecha_fin is not None:
-        df_filtrado = df_filtrado[df_filtrado['fecha'] <= fecha_fin]
-
-    if df_filtrado.empty:
-        return pd.DataFrame()
-
-    # Crear columna de periodo (Año-Mes)
-    df_filtrado['periodo'] = df_filtrado['fecha'].dt.strftime('%Y-%m')
-
-    # Pivot: bancos x periodos
-    heatmap_data = df_filtrado.pivot(index='banco', columns='periodo', values='valor')
-
-    # Ordenar por tamaño de banco (activos)
-    try:
-        df_balance, _ = cargar_balance()
-        # Obtener fecha mas reciente disponible
-        fecha_max = df_balance['fecha'].max()
-        # Filtrar activos totales (codigo '1')
-        df_activos = df_balance[
-            (df_balance['codigo'] == '1') &
-            (df_balance['fecha'] == fecha_max)
-        ][['banco', 'valor']].copy()
-        df_activos = df_activos.set_index('banco')
-
-        # Ordenar bancos del heatmap por activos (de menor a mayor, para que mayor quede arriba)
-        bancos_ordenados = df_activos.sort_values('valor', ascending=True).index
-        bancos_en_heatmap = [b for b in bancos_ordenados if b in heatmap_data.index]
-
-        # Reordenar heatmap
-        if bancos_en_heatmap:
-            heatmap_data = heatmap_data.reindex(bancos_en_heatmap)
-    except Exception as e:
-        # Si falla la carga de balance, ordenar por ultimo periodo
-        if len(heatmap_data.columns) > 0:
-            ultima_col = heatmap_data.columns[-1]
-            heatmap_data = heatmap_data.sort_values(ultima_col, ascending=False, na_position='last')
-
-    return heatmap_data * 100  # Convertir a porcentaje
-
-
 # =============================================================================
 # VISUALIZACIONES
 # =============================================================================
 
-def crear_grafico_evolucion(df: pd.DataFrame, codigo: str, bancos: list, nombre_indicador: str, fecha_inicio=None):
+def crear_grafico_evolucion(codigo: str, bancos: list, nombre_indicador: str, fecha_inicio=None):
     """Crea grafico de evolucion temporal de un indicador."""
-    df_evol = obtener_evolucion_indicador(df, codigo, bancos)
+    df_evol = obtener_evolucion_indicador(codigo, bancos)
 
     if df_evol.empty:
         st.warning("No hay datos disponibles para los bancos seleccionados")
@@ -354,10 +255,9 @@ def crear_grafico_evolucion(df: pd.DataFrame, codigo: str, bancos: list, nombre_
     st.plotly_chart(fig, use_container_width=True)
 
 
-def crear_ranking_barras(df: pd.DataFrame, codigo: str, fecha, nombre_indicador: str,
-                         excluir_bancos: list = None):
+def crear_ranking_barras(codigo: str, fecha, nombre_indicador: str, excluir_bancos: list = None):
     """Crea ranking de barras horizontales para un indicador."""
-    df_ranking, fecha_real = obtener_ranking_indicador(df, codigo, fecha, excluir_bancos)
+    df_ranking, fecha_real = obtener_ranking_indicador(codigo, fecha, excluir_bancos)
 
     if df_ranking.empty:
         st.warning("No hay datos disponibles")
@@ -398,9 +298,9 @@ def crear_ranking_barras(df: pd.DataFrame, codigo: str, fecha, nombre_indicador:
         st.caption(f"⚠️ Excluidos del ranking: {', '.join(excluir_bancos)} (valores atípicos)")
 
 
-def crear_heatmap_indicador(df: pd.DataFrame, codigo: str, nombre_indicador: str, fecha_inicio=None, fecha_fin=None):
+def crear_heatmap_indicador(codigo: str, nombre_indicador: str, fecha_inicio=None, fecha_fin=None):
     """Crea heatmap de evolucion mensual de un indicador."""
-    heatmap_data = obtener_heatmap_indicador(df, codigo, fecha_inicio, fecha_fin)
+    heatmap_data = obtener_heatmap_indicador(codigo, fecha_inicio, fecha_fin)
 
     if heatmap_data.empty:
         st.warning("No hay datos suficientes para el heatmap en el rango seleccionado")
@@ -449,11 +349,15 @@ def crear_heatmap_indicador(df: pd.DataFrame, codigo: str, nombre_indicador: str
 
 def main():
     """Funcion principal del modulo CAMEL."""
+    # Precalentamiento y recarga de datos (tambien al entrar directo a esta pagina)
+    iniciar_tareas_de_fondo()
+
     st.title("📈 Indicadores CAMEL")
 
     # Cargar datos
     try:
-        df_camel, calidad = cargar_camel()
+        indice = cargar_indice('camel')
+        calidad = cargar_calidad('camel')
     except FileNotFoundError as e:
         st.error(f"No se encontro el archivo de datos CAMEL: {e}")
         st.info("Ejecuta `python procesar_camel.py` para generar los datos")
@@ -462,7 +366,7 @@ def main():
     # Sidebar
     st.sidebar.header("Filtros")
 
-    fechas = obtener_fechas_disponibles(df_camel)
+    fechas = indice.fechas[::-1]
     fecha_default = fechas[0] if fechas else None
     fecha_seleccionada = st.sidebar.selectbox(
         "Fecha de analisis",
@@ -471,7 +375,7 @@ def main():
         format_func=lambda x: x.strftime('%B %Y') if pd.notna(x) else str(x)
     )
 
-    bancos_disponibles = sorted(df_camel['banco'].unique())
+    bancos_disponibles = indice.bancos
 
     st.sidebar.markdown("---")
     st.sidebar.markdown(f"**Indicadores:** {calidad['indicadores_unicos']}")
@@ -506,8 +410,8 @@ def main():
             if indicador_codigo == 'COB_TOT':
                 excluir_bancos = ['Citibank', 'Coopnacional']
 
-            crear_ranking_barras(df_camel, indicador_codigo, fecha_seleccionada,
-                                indicador_nombre, excluir_bancos)
+            crear_ranking_barras(indicador_codigo, fecha_seleccionada,
+                                 indicador_nombre, excluir_bancos)
 
     # Tab 3: Evolucion Temporal
     with tab3:
@@ -527,14 +431,14 @@ def main():
             bancos_evol = st.multiselect(
                 "Bancos a comparar",
                 bancos_disponibles,
-                default=['Pichincha', 'Guayaquil', 'Pacifico'] if all(b in bancos_disponibles for b in ['Pichincha', 'Guayaquil', 'Pacifico']) else bancos_disponibles[:3],
+                default=bancos_evolucion_camel(bancos_disponibles),
                 max_selections=8
             )
 
             # Fecha de inicio (predeterminado: Enero 2015)
             st.markdown("---")
-            fecha_min_sistema = df_camel['fecha'].min()
-            fecha_max_sistema = df_camel['fecha'].max()
+            fecha_min_sistema = fechas[-1]
+            fecha_max_sistema = fechas[0]
 
             # Determinar fecha de inicio por defecto (Enero 2015 o la mas reciente si no existe)
             fecha_default_inicio = pd.Timestamp(year=2015, month=1, day=1)
@@ -552,7 +456,7 @@ def main():
 
         with col2:
             if bancos_evol:
-                crear_grafico_evolucion(df_camel, indicador_codigo_evol, bancos_evol, indicador_nombre_evol, fecha_inicio_evol)
+                crear_grafico_evolucion(indicador_codigo_evol, bancos_evol, indicador_nombre_evol, fecha_inicio_evol)
             else:
                 st.info("Selecciona al menos un banco para ver la evolucion")
 
@@ -574,11 +478,11 @@ def main():
             st.subheader("Rango de Fechas")
 
             # Obtener fechas minima y maxima del dataset
-            fecha_min = df_camel['fecha'].min()
-            fecha_max = df_camel['fecha'].max()
+            fecha_min = fechas[-1]
+            fecha_max = fechas[0]
 
             # Selector de año inicial y final
-            anos_disponibles = sorted(df_camel['fecha'].dt.year.unique())
+            anos_disponibles = sorted({f.year for f in fechas})
 
             col_a, col_b = st.columns(2)
             with col_a:
@@ -636,7 +540,6 @@ def main():
 
         with col2:
             crear_heatmap_indicador(
-                df_camel,
                 indicador_codigo_heat,
                 indicador_nombre_heat,
                 fecha_inicio_heat,
@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Orquestador del proceso de actualizacion de datos (ETL).
+
+Reemplaza la secuencia manual de scripts por un grafo explicito de etapas:
+
+    descargar -> descomprimir -> parsear -> derivar_pyg -> validar
+                                                              |
+        +------------------+----------------+-----------------+
+        v                  v                v                 v
+    preparar_balance   preparar_pyg   preparar_camel   preparar_opcionales
+        |                  |                |                 |
+        +--> modelo_dimensional <--+        |                 |
+                     |                      |                 |
+                     +---------> publicar <-+-----------------+
+
+Cada etapa preparar_<dataset> limpia su dataset y escribe todo lo que se
+publica de el (dataset, calidad, cobertura, series y cubo); las cuatro son
+independientes y, como modelo_dimensional, corren en paralelo en procesos
+separados. publicar solo junta esas carpetas y publica la version.
+
+Cada etapa declara sus entradas (archivos y etapas previas). Antes de
+ejecutarla se calcula una huella (hash) de esas entradas y del codigo que
+la implementa; si coincide con la de la ultima corrida y sus salidas
+existen, la etapa se omite (las etapas sin salidas declaradas, como
+descargar, se ejecutan siempre).
+
+La etapa parsear lee cada libro una sola vez y extrae todas las hojas
+declaradas en config/hojas_excel.py; los libros se reparten entre procesos.
+
+USO:
+    python scripts/actualizar.py                      # desde Excel ya extraidos
+    python scripts/actualizar.py --zips DIR           # descomprimir + procesar
+    python scripts/actualizar.py --descargar --zips DIR
+    python scripts/actualizar.py --forzar             # ignorar huellas
+    python scripts/actualizar.py --hojas cartera      # agregar datasets opcionales
+
+Resultados intermedios: master_data/_etl/
+Estado de la ultima corrida: master_data/_etl/estado.json
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.append(str(SCRIPTS_DIR))
+
+import procesar_balance
+import procesar_pyg
+
+sys.path.append(str(SCRIPTS_DIR.parent))
+
+from config.hojas_excel import HOJAS_EXCEL, obtener_especs
+from utils.almacenamiento import columnas_particion, escribir_dataset
+from utils.dimensional import DATASETS_DIMENSIONALES
+from utils.extraccion import extraer_directorio
+from utils.limpieza import leer_calidad
+from utils.periodos import fecha_a_periodo
+from utils.preparacion import preparar_dataset, preparar_modelo_dimensional
+from utils.publicacion import publicar_version, PUNTERO_VERSION
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+EXCEL_DIR = procesar_balance.EXCEL_DIR
+MASTER_DIR = SCRIPTS_DIR.parent / "master_data"
+ETL_DIR = MASTER_DIR / "_etl"
+ESTADO_FILE = ETL_DIR / "estado.json"
+CONFIG_DIR = SCRIPTS_DIR.parent / "config"
+UTILS_DIR = SCRIPTS_DIR.parent / "utils"
+
+
+# =============================================================================
+# DEFINICION DE ETAPAS
+# =============================================================================
+
+@dataclass
+class Etapa:
+    """Nodo del grafo de actualizacion."""
+    nombre: str
+    ejecutar: Callable[[Dict], None]
+    depende_de: List[str] = field(default_factory=list)
+    # Archivos externos que alimentan la etapa (para la huella)
+    entradas: Callable[[Dict], List[Path]] = lambda ctx: []
+    # Archivos que la etapa produce (deben existir para poder omitirla;
+    # una etapa sin salidas nunca se omite)
+    salidas: Callable[[Dict], List[Path]] = lambda ctx: []
+    # Modulos cuyo codigo forma parte de la huella
+    codigo: List[Path] = field(default_factory=list)
+    # Si devuelve False la etapa no aplica en esta corrida
+    activa: Callable[[Dict], bool] = lambda ctx: True
+    # Opciones de la corrida que cambian el resultado (para la huella)
+    parametros: Callable[[Dict], object] = lambda ctx: None
+
+
+def _archivos_excel(ctx: Dict) -> List[Path]:
+    excel_dir = Path(ctx['excel_dir'])
+    if not excel_dir.exists():
+        return []
+    return sorted(excel_dir.glob("**/*.xlsx")) + sorted(excel_dir.glob("**/*.xls"))
+
+
+def _archivos_zip(ctx: Dict) -> List[Path]:
+    if not ctx.get('zip_dir'):
+        return []
+    return sorted(Path(ctx['zip_dir']).glob("*.zip"))
+
+
+def _intermedio(nombre: str) -> Path:
+    return ETL_DIR / f"{nombre}.parquet"
+
+
+def _staging(nombre: str) -> Path:
+    """Carpeta donde una etapa de preparacion deja lo que se publica."""
+    return ETL_DIR / "publicar" / nombre
+
+
+def _vaciar(carpeta: Path) -> Path:
+    if carpeta.exists():
+        shutil.rmtree(carpeta)
+    carpeta.mkdir(parents=True)
+    return carpeta
+
+
+def _especs(ctx: Dict):
+    """Hojas activas mas los datasets opcionales pedidos con --hojas."""
+    opcionales = set(ctx.get('hojas') or [])
+    return tuple(e for e in HOJAS_EXCEL if e.activa or e.dataset in opcionales)
+
+
+def _datasets_parseados(ctx: Dict) -> List[str]:
+    return list(dict.fromkeys(e.dataset for e in _especs(ctx)))
+
+
+def _datasets_opcionales(ctx: Dict) -> List[str]:
+    activos = {e.dataset for e in obtener_especs()}
+    return [d for d in _datasets_parseados(ctx) if d not in activos]
+
+
+# Las funciones de ejecucion son de nivel de modulo para que puedan
+# enviarse a los procesos del pool.
+
+def etapa_descargar(ctx: Dict) -> None:
+    subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "descargar.py")],
+        check=True
+    )
+
+
+def etapa_descomprimir(ctx: Dict) -> None:
+    import descomprimir_zips
+    descomprimir_zips.descomprimir_directorio(ctx['zip_dir'])
+
+
+def etapa_parsear(ctx: Dict) -> None:
+    especs = _especs(ctx)
+    datasets, reporte = extraer_directorio(Path(ctx['excel_dir']), especs, workers=ctx.get('workers', 1))
+
+    for nombre in ('balance', 'pyg_acumulado', 'camel'):
+        if nombre not in datasets:
+            raise RuntimeError(f"No se procesaron datos de {nombre}")
+
+    for nombre in _datasets_parseados(ctx):
+        ruta = _intermedio(nombre)
+        if nombre in datasets:
+            datasets[nombre].to_parquet(ruta, index=False)
+        elif ruta.exists():
+            ruta.unlink()
+
+    df_balance = datasets['balance']
+    info = procesar_balance.generar_info(
+        df_balance,
+        reporte['balance']['bancos_procesados'],
+        reporte['balance']['bancos_error'],
+    )
+    info['hojas_procesadas'] = list(dict.fromkeys(e.hoja for e in especs))
+    # La fecha se fija al publicar: asi la salida solo cambia si cambian los datos
+    info.pop('ultima_actualizacion', None)
+    with open(ETL_DIR / "balance_info.json", 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2, ensure_ascii=False)
+
+
+def etapa_derivar_pyg(ctx: Dict) -> None:
+    df = pd.read_parquet(_intermedio('pyg_acumulado'))
+    procesar_pyg.derivar_pyg(df).to_parquet(_intermedio('pyg'), index=False)
+
+
+# Columnas minimas que deben tener los datasets publicados
+COLUMNAS_REQUERIDAS = {
+    'balance': ['banco', 'fecha', 'periodo', 'codigo', 'cuenta', 'valor', 'nivel'],
+    'pyg': ['banco', 'fecha', 'periodo', 'codigo', 'cuenta', 'valor_acumulado', 'valor_mes', 'valor_12m'],
+    'camel': ['banco', 'fecha', 'periodo', 'codigo', 'indicador', 'valor', 'categoria'],
+}
+
+
+def etapa_validar(ctx: Dict) -> None:
+    errores = []
+    resumen = {}
+
+    for nombre, columnas in COLUMNAS_REQUERIDAS.items():
+        df = pd.read_parquet(_intermedio(nombre))
+
+        faltantes = [c for c in columnas if c not in df.columns]
+        if faltantes:
+            errores.append(f"{nombre}: faltan columnas {faltantes}")
+            continue
+
+        if df.empty:
+            errores.append(f"{nombre}: sin registros")
+            continue
+
+        if (df['periodo'] != fecha_a_periodo(df['fecha'])).any():
+            errores.append(f"{nombre}: columna periodo no coincide con fecha")
+
+        duplicados = df.duplicated(subset=['banco', 'fecha', 'codigo']).sum()
+        if nombre == 'camel' and duplicados:
+            errores.append(f"{nombre}: {duplicados} registros duplicados")
+
+        resumen[nombre] = {
+            'registros': len(df),
+            'bancos': int(df['banco'].nunique()),
+            'fecha_min': str(df['fecha'].min()),
+            'fecha_max': str(df['fecha'].max()),
+            'duplicados': int(duplicados),
+        }
+
+    for nombre in _datasets_opcionales(ctx):
+        if _intermedio(nombre).exists():
+            resumen[nombre] = {'registros': len(pd.read_parquet(_intermedio(nombre), columns=['banco']))}
+
+    if errores:
+        raise ValueError("; ".join(errores))
+
+    with open(ETL_DIR / "validacion.json", 'w', encoding='utf-8') as f:
+        json.dump(resumen, f, indent=2, ensure_ascii=False)
+
+
+def etapa_preparar(ctx: Dict, dataset: str) -> None:
+    """Escribe en _staging(dataset) todo lo que se publica de un dataset (utils/preparacion.py)."""
+    destino = _vaciar(_staging(dataset))
+    df, _ = preparar_dataset(pd.read_parquet(_intermedio(dataset)), dataset, destino,
+                             por_banco=ctx.get('por_banco', False),
+                             punto_fijo=ctx.get('punto_fijo', True))
+
+    if dataset in DATASETS_DIMENSIONALES:
+        # Entrada de modelo_dimensional: limpio (y disperso) como se publica
+        df.to_parquet(_intermedio(f"{dataset}_limpio"), index=False)
+
+
+def etapa_preparar_opcionales(ctx: Dict) -> None:
+    """Datasets pedidos con --hojas, tal como salen de parsear."""
+    destino = _vaciar(_staging('opcionales'))
+    for nombre in _datasets_opcionales(ctx):
+        if _intermedio(nombre).exists():
+            particiones = columnas_particion(nombre, por_banco=ctx.get('por_banco', False))
+            escribir_dataset(pd.read_parquet(_intermedio(nombre)), destino, nombre, particiones,
+                             punto_fijo=ctx.get('punto_fijo', True))
+
+
+def etapa_modelo_dimensional(ctx: Dict) -> None:
+    """dim_banco, dim_cuenta, dim_periodo y hechos_<dataset> de balance y pyg."""
+    destino = _vaciar(_staging('dimensional'))
+    planos = {n: pd.read_parquet(_intermedio(f"{n}_limpio")) for n in DATASETS_DIMENSIONALES}
+    preparar_modelo_dimensional(planos, destino, punto_fijo=ctx.get('punto_fijo', True))
+
+
+def _carpetas_publicables(ctx: Dict) -> List[Path]:
+    carpetas = [_staging(d) for d in COLUMNAS_REQUERIDAS] + [_staging('dimensional')]
+    if _datasets_opcionales(ctx):
+        carpetas.append(_staging('opcionales'))
+    return carpetas
+
+
+def etapa_publicar(ctx: Dict) -> None:
+    with open(ETL_DIR / "validacion.json", 'r', encoding='utf-8') as f:
+        resumen = json.load(f)
+    with open(ETL_DIR / "balance_info.json", 'r', encoding='utf-8') as f:
+        info_balance = json.load(f)
+
+    info = {nombre: dict(datos) for nombre, datos in resumen.items()}
+    info['balance'].update(info_balance)
+    info['balance']['ultima_actualizacion'] = datetime.now().isoformat()
+    calidad = leer_calidad(_staging('balance'), 'balance')
+    info['balance']['registros_publicados'] = calidad['registros_presentes']
+
+    # Cada archivo o carpeta preparada es un dataset de la version
+    archivos = {}
+    for carpeta in _carpetas_publicables(ctx):
+        for ruta in sorted(carpeta.iterdir()):
+            archivos[ruta.stem] = ruta
+
+    version = publicar_version(
+        archivos,
+        info=info,
+        master_dir=MASTER_DIR,
+    )
+    print(f"[OK] Version publicada: {version}")
+
+
+ETAPAS = [
+    Etapa(
+        nombre='descargar',
+        ejecutar=etapa_descargar,
+        codigo=[SCRIPTS_DIR / "descargar.py"],
+        activa=lambda ctx: ctx['descargar'],
+    ),
+    Etapa(
+        nombre='descomprimir',
+        ejecutar=etapa_descomprimir,
+        depende_de=['descargar'],
+        entradas=_archivos_zip,
+        salidas=lambda ctx: [Path(ctx['excel_dir'])],
+        codigo=[SCRIPTS_DIR / "descomprimir_zips.py"],
+        activa=lambda ctx: bool(ctx.get('zip_dir')),
+    ),
+    Etapa(
+        nombre='parsear',
+        ejecutar=etapa_parsear,
+        depende_de=['descomprimir'],
+        entradas=_archivos_excel,
+        salidas=lambda ctx: [_intermedio(d) for d in _datasets_parseados(ctx)] + [ETL_DIR / "balance_info.json"],
+        codigo=[CONFIG_DIR / "hojas_excel.py", UTILS_DIR / "extraccion.py", UTILS_DIR / "periodos.py",
+                SCRIPTS_DIR / "procesar_balance.py"],
+        parametros=lambda ctx: sorted(ctx.get('hojas') or []),
+    ),
+    Etapa(
+        nombre='derivar_pyg',
+        ejecutar=etapa_derivar_pyg,
+        depende_de=['parsear'],
+        salidas=lambda ctx: [_intermedio('pyg')],
+        codigo=[SCRIPTS_DIR / "procesar_pyg.py"],
+    ),
+    Etapa(
+        nombre='validar',
+        ejecutar=etapa_validar,
+        depende_de=['parsear', 'derivar_pyg'],
+        salidas=lambda ctx: [ETL_DIR / "validacion.json"],
+        parametros=lambda ctx: sorted(ctx.get('hojas') or []),
+    ),
+    *[
+        Etapa(
+            nombre=f"preparar_{dataset}",
+            ejecutar=partial(etapa_preparar, dataset=dataset),
+            # balance y camel salen de parsear, pyg de derivar_pyg
+            depende_de=['derivar_pyg' if dataset == 'pyg' else 'parsear', 'validar'],
+            salidas=lambda ctx, dataset=dataset: [_staging(dataset)] + (
+                [_intermedio(f"{dataset}_limpio")] if dataset in DATASETS_DIMENSIONALES else []),
+            codigo=[UTILS_DIR / "almacenamiento.py", UTILS_DIR / "cobertura.py", UTILS_DIR / "cubo.py",
+                    UTILS_DIR / "limpieza.py", UTILS_DIR / "periodos.py", UTILS_DIR / "preparacion.py",
+                    UTILS_DIR / "series.py"],
+            parametros=lambda ctx: (ctx.get('por_banco', False), ctx.get('punto_fijo', True)),
+        )
+        for dataset in COLUMNAS_REQUERIDAS
+    ],
+    Etapa(
+        nombre='preparar_opcionales',
+        ejecutar=etapa_preparar_opcionales,
+        depende_de=['parsear', 'validar'],
+        salidas=lambda ctx: [_staging('opcionales')],
+        codigo=[UTILS_DIR / "almacenamiento.py"],
+        activa=lambda ctx: bool(_datasets_opcionales(ctx)),
+        parametros=lambda ctx: (sorted(ctx.get('hojas') or []), ctx.get('por_banco', False),
+                                ctx.get('punto_fijo', True)),
+    ),
+    Etapa(
+        nombre='modelo_dimensional',
+        ejecutar=etapa_modelo_dimensional,
+        depende_de=[f"preparar_{d}" for d in DATASETS_DIMENSIONALES],
+        salidas=lambda ctx: [_staging('dimensional')],
+        codigo=[UTILS_DIR / "almacenamiento.py", UTILS_DIR / "dimensional.py",
+                UTILS_DIR / "preparacion.py"],
+        parametros=lambda ctx: ctx.get('punto_fijo', True),
+    ),
+    Etapa(
+        nombre='publicar',
+        ejecutar=etapa_publicar,
+        # balance_info.json sale de parsear; el resto, de las etapas de preparacion
+        depende_de=['parsear', 'validar'] + [f"preparar_{d}" for d in COLUMNAS_REQUERIDAS]
+                   + ['preparar_opcionales', 'modelo_dimensional'],
+        salidas=lambda ctx: [MASTER_DIR / PUNTERO_VERSION],
+        codigo=[UTILS_DIR / "almacenamiento.py", UTILS_DIR / "limpieza.py", UTILS_DIR / "publicacion.py"],
+        parametros=lambda ctx: sorted(ctx.get('hojas') or []),
+    ),
+]
+
+
+# =============================================================================
+# HUELLAS Y ESTADO
+# =============================================================================
+
+def calcular_huella(etapa: Etapa, ctx: Dict, huellas_previas: Dict[str, str]) -> str:
+    """
+    Calcula la huella de una etapa a partir de:
+    - el codigo fuente del orquestador y de los modulos de la etapa
+    - nombre, tamano y fecha de modificacion de sus archivos de entrada
+    - las opciones de la corrida que afectan a la etapa
+    - el contenido de las salidas de las etapas de las que depende
+
+    Usar el contenido de las salidas (y no la huella de la etapa previa)
+    permite omitir etapas posteriores cuando una etapa se re-ejecuta pero
+    produce exactamente el mismo resultado.
+    """
+    h = hashlib.sha256()
+    h.update(etapa.nombre.encode())
+
+    for ruta in [Path(__file__)] + etapa.codigo:
+        if ruta.exists():
+            h.update(ruta.read_bytes())
+
+    for ruta in etapa.entradas(ctx):
+        stat = ruta.stat()
+        h.update(f"{ruta}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+
+    h.update(repr(etapa.parametros(ctx)).encode())
+
+    etapas = {e.nombre: e for e in ETAPAS}
+    for dep in etapa.depende_de:
+        h.update(dep.encode())
+        if not huellas_previas.get(dep):
+            continue
+        for ruta in etapas[dep].salidas(ctx):
+            _agregar_contenido(h, ruta)
+
+    return h.hexdigest()
+
+
+def _agregar_contenido(h, ruta: Path) -> None:
+    """Suma a la huella el contenido de un archivo o de todos los de una carpeta."""
+    archivos = [ruta] if ruta.is_file() else sorted(p for p in ruta.rglob('*') if p.is_file())
+    for archivo in archivos:
+        h.update(archivo.relative_to(ruta.parent).as_posix().encode())
+        h.update(hashlib.sha256(archivo.read_bytes()).digest())
+
+
+def cargar_estado() -> Dict:
+    if not ESTADO_FILE.exists():
+        return {}
+    with open(ESTADO_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_estado(estado: Dict) -> None:
+    with open(ESTADO_FILE, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+
+
+def puede_omitirse(etapa: Etapa, ctx: Dict, huella: str, estado_previo: Dict) -> bool:
+    """
+    True si la etapa ya corrio con la misma huella y sus salidas existen.
+
+    Una etapa sin salidas declaradas (descargar) no tiene forma de saber si
+    su resultado sigue vigente: siempre se ejecuta cuando esta activa.
+    """
+    salidas = etapa.salidas(ctx)
+    if not salidas or not all(p.exists() for p in salidas):
+        return False
+    return estado_previo.get(etapa.nombre, {}).get('huella') == huella
+
+
+def _ejecutar_con_tiempo(ejecutar: Callable[[Dict], None], ctx: Dict) -> float:
+    inicio = time.perf_counter()
+    ejecutar(ctx)
+    return time.perf_counter() - inicio
+
+
+# =============================================================================
+# EJECUCION DEL GRAFO
+# =============================================================================
+
+def ejecutar_grafo(ctx: Dict, forzar: bool = False, workers: int = 3) -> Dict[str, Dict]:
+    """
+    Ejecuta las etapas respetando dependencias.
+
+    Una etapa se lanza cuando todas sus dependencias terminaron (o fueron
+    omitidas). Si una etapa falla, sus dependientes se marcan como
+    'bloqueada' y no se ejecutan.
+
+    Returns:
+        Dict etapa -> {estado, huella, duracion}
+    """
+    ETL_DIR.mkdir(parents=True, exist_ok=True)
+
+    estado_previo = cargar_estado().get('etapas', {})
+    etapas = {e.nombre: e for e in ETAPAS}
+    resultados: Dict[str, Dict] = {}
+    huellas: Dict[str, str] = {}
+    pendientes = list(etapas)
+    en_curso = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while pendientes or en_curso:
+            for nombre in list(pendientes):
+                etapa = etapas[nombre]
+                estados_deps = [resultados.get(d, {}).get('estado') for d in etapa.depende_de]
+
+                if any(e in ('error', 'bloqueada') for e in estados_deps):
+                    resultados[nombre] = {'estado': 'bloqueada', 'duracion': 0.0}
+                    pendientes.remove(nombre)
+                    continue
+
+                if any(e is None for e in estados_deps):
+                    continue
+
+                pendientes.remove(nombre)
+
+                if not etapa.activa(ctx):
+                    huellas[nombre] = ''
+                    resultados[nombre] = {'estado': 'inactiva', 'duracion': 0.0}
+                    continue
+
+                huella = calcular_huella(etapa, ctx, huellas)
+                huellas[nombre] = huella
+
+                if not forzar and puede_omitirse(etapa, ctx, huella, estado_previo):
+                    resultados[nombre] = {'estado': 'omitida', 'huella': huella, 'duracion': 0.0}
+                    print(f"[=] {nombre}: sin cambios, se omite")
+                    continue
+
+                print(f"[>] {nombre}: ejecutando...")
+                en_curso[pool.submit(_ejecutar_con_tiempo, etapa.ejecutar, ctx)] = nombre
+
+            if not en_curso:
+                continue
+
+            terminados, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                nombre = en_curso.pop(futuro)
+                try:
+                    duracion = futuro.result()
+                    resultados[nombre] = {'estado': 'ok', 'huella': huellas[nombre], 'duracion': duracion}
+                    print(f"[OK] {nombre}: {duracion:.1f} s")
+                except Exception as e:
+                    resultados[nombre] = {'estado': 'error', 'error': str(e), 'duracion': 0.0}
+                    print(f"[ERROR] {nombre}: {e}")
+
+    # Solo se recuerdan las huellas de etapas completadas
+    etapas_estado = dict(estado_previo)
+    for nombre, res in resultados.items():
+        if res['estado'] in ('ok', 'omitida'):
+            etapas_estado[nombre] = {'huella': res['huella'], 'duracion': res['duracion']}
+        elif res['estado'] == 'error':
+            etapas_estado.pop(nombre, None)
+
+    guardar_estado({
+        'ultima_corrida': datetime.now().isoformat(),
+        'etapas': etapas_estado,
+    })
+
+    return resultados
+
+
+def imprimir_resumen(resultados: Dict[str, Dict], duracion_total: float) -> None:
+    print("\n" + "=" * 60)
+    print("RESUMEN DE ETAPAS")
+    print("=" * 60)
+    print(f"  {'Etapa':<20} {'Estado':<10} {'Duracion':>10}")
+    print("  " + "-" * 42)
+    for etapa in ETAPAS:
+        res = resultados.get(etapa.nombre, {'estado': '-', 'duracion': 0.0})
+        print(f"  {etapa.nombre:<20} {res['estado']:<10} {res['duracion']:>9.1f}s")
+        if res.get('error'):
+            print(f"    -> {res['error']}")
+    print("  " + "-" * 42)
+    print(f"  {'Total (reloj)':<31} {duracion_total:>9.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Actualizacion completa de master_data")
+    parser.add_argument('--descargar', action='store_true',
+                        help="Ejecutar la descarga desde el portal (requiere Selenium)")
+    parser.add_argument('--zips', default=None,
+                        help="Carpeta con los ZIP descargados (activa la etapa de descompresion)")
+    parser.add_argument('--excel', default=None,
+                        help=f"Carpeta con los Excel por banco (por defecto {EXCEL_DIR})")
+    parser.add_argument('--forzar', action='store_true',
+                        help="Ejecutar todas las etapas aunque sus entradas no hayan cambiado")
+    parser.add_argument('--workers', type=int, default=3,
+                        help="Procesos para etapas independientes y para leer libros en paralelo")
+    parser.add_argument('--hojas', nargs='*', default=[],
+                        choices=sorted({e.dataset for e in HOJAS_EXCEL if not e.activa}),
+                        help="Datasets opcionales a extraer ademas de balance, pyg y camel")
+    parser.add_argument('--por-banco', action='store_true',
+                        help="Particionar balance y pyg por banco ademas de por año")
+    parser.add_argument('--sin-punto-fijo', action='store_true',
+                        help="Guardar los valores monetarios como float64 en lugar de int64 escalado")
+    args = parser.parse_args()
+
+    if args.excel:
+        excel_dir = args.excel
+    elif args.zips:
+        excel_dir = str(Path(args.zips) / 'archivos_excel')
+    else:
+        excel_dir = str(EXCEL_DIR)
+
+    ctx = {
+        'descargar': args.descargar,
+        'zip_dir': args.zips,
+        'excel_dir': excel_dir,
+        'workers': args.workers,
+        'hojas': args.hojas,
+        'por_banco': args.por_banco,
+        'punto_fijo': not args.sin_punto_fijo,
+    }
+
+    print("=" * 60)
+    print("ACTUALIZACION DE DATOS")
+    print("=" * 60)
+    print(f"  Excel: {excel_dir}")
+    if args.zips:
+        print(f"  ZIPs:  {args.zips}")
+
+    inicio = time.perf_counter()
+    resultados = ejecutar_grafo(ctx, forzar=args.forzar, workers=args.workers)
+    imprimir_resumen(resultados, time.perf_counter() - inicio)
+
+    if any(r['estado'] in ('error', 'bloqueada') for r in resultados.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
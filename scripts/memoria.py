@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memoria que ocupan balance, pyg y camel una vez cargados.
+
+Carga los datasets de la version publicada como lo hace el dashboard y
+muestra filas, bytes por columna (deep), dtypes, RSS del proceso antes y
+despues de cargar y la cache de resultados: memoria, disco y contadores de
+cada funcion cacheada en este proceso (ver utils/memoria.py).
+
+USO:
+    python scripts/memoria.py                  # tabla
+    python scripts/memoria.py --json           # JSON (para monitoreo)
+    python scripts/memoria.py --datasets camel
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.data_loader import DATASETS
+from utils.memoria import memoria_proceso, reporte_memoria, tabla_cache
+
+
+def _mb(valor) -> str:
+    return f"{valor / 1024 ** 2:,.1f} MB" if valor is not None else "n/d"
+
+
+def imprimir_reporte(reporte: dict, rss_inicial) -> None:
+    print("=" * 60)
+    print(f"MEMORIA DE DATOS ({reporte['huella']})")
+    print("=" * 60)
+    for dataset, medida in reporte['datasets'].items():
+        print(f"\n  {dataset}: {medida['filas']:,} filas, {_mb(medida['bytes'])} "
+              f"({medida['bytes_por_fila']:.0f} B/fila)")
+        for columna in medida['columnas']:
+            print(f"    {columna['columna']:<18} {columna['dtype']:<16} "
+                  f"{_mb(columna['bytes']):>12} {columna['pct']:>6.1f}%")
+    for dataset, error in reporte['errores'].items():
+        print(f"\n  [ERROR] {dataset}: {error}")
+
+    proceso = reporte['proceso']
+    print("\n  " + "-" * 40)
+    print(f"  {'Datasets':<22} {_mb(reporte['total_datasets_bytes']):>14}")
+    print(f"  {'RSS antes de cargar':<22} {_mb(rss_inicial):>14}")
+    print(f"  {'RSS actual':<22} {_mb(proceso['rss_bytes']):>14}")
+    print(f"  {'RSS maximo':<22} {_mb(proceso['rss_pico_bytes']):>14}")
+
+    cache = reporte['cache']
+    print(f"  {'Cache de resultados':<22} {_mb(cache['bytes']):>14} (presupuesto {_mb(cache['presupuesto_bytes'])})")
+    print(f"  {'Cache en disco':<22} {_mb(cache['disco']['bytes']):>14} "
+          f"({cache['disco']['archivos']} archivos, maximo {_mb(cache['disco']['max_bytes'])})")
+
+    print("\n  Funciones cacheadas (contadores de este proceso):")
+    print(f"    {'funcion':<44} {'llamadas':>9} {'aciertos':>9} {'fallos':>7} {'disco':>6} {'desalojos':>10}")
+    for _, fila in tabla_cache(reporte).iterrows():
+        print(f"    {fila['funcion']:<44} {fila['llamadas']:>9} {fila['aciertos']:>9} {fila['fallos']:>7} "
+              f"{fila['disco']:>6} {fila['desalojos']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de los datasets cargados")
+    parser.add_argument('--datasets', nargs='*', default=list(DATASETS), choices=DATASETS,
+                        help="Datasets a medir (por defecto todos)")
+    parser.add_argument('--json', action='store_true',
+                        help="Imprimir el reporte como JSON")
+    args = parser.parse_args()
+
+    rss_inicial = memoria_proceso()['rss_bytes']
+    reporte = reporte_memoria(args.datasets)
+    reporte['proceso']['rss_inicial_bytes'] = rss_inicial
+
+    if args.json:
+        print(json.dumps(reporte, indent=2, ensure_ascii=False))
+    else:
+        imprimir_reporte(reporte, rss_inicial)
+
+    if reporte['errores']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paridad de los motores de consultas (utils/consultas.py) contra pandas.
+
+Para cada dataset toma varios codigos y meses de la version publicada,
+ejecuta fechas_disponibles, serie_sistema, ranking, heatmap y
+variacion_anual con el motor pandas y con los demas motores, y compara los
+resultados con pandas.testing (mismas columnas, tipos y orden; valores con
+tolerancia relativa TOLERANCIA). Informa tambien el tiempo de cada motor.
+
+USO:
+    python scripts/paridad_consultas.py                   # arrow y polars
+    python scripts/paridad_consultas.py --motores arrow
+    python scripts/paridad_consultas.py --codigos 20 --meses 6
+
+Sale con codigo 1 si algun resultado difiere. polars se omite si no esta
+instalado.
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils import consultas
+from utils.data_loader import cargar_indice
+
+# Dataset -> columna de valores que consultan las paginas
+COLUMNAS = {
+    'balance': 'valor',
+    'pyg': 'valor_12m',
+    'camel': 'valor',
+}
+
+# Diferencia relativa admitida (las sumas cambian de orden entre motores)
+TOLERANCIA = 1e-9
+
+
+def _espaciados(valores: list, cantidad: int) -> list:
+    """`cantidad` elementos repartidos a lo largo de `valores`."""
+    if len(valores) <= cantidad:
+        return list(valores)
+    return [valores[i] for i in np.linspace(0, len(valores) - 1, cantidad).round().astype(int)]
+
+
+def _casos(dataset: str, codigos: int, meses: int):
+    """(nombre de la consulta, argumentos) a comparar para un dataset."""
+    columna = COLUMNAS[dataset]
+    fechas = consultas.fechas_disponibles(dataset, motor='pandas')
+    yield 'fechas_disponibles', (dataset,), {}
+    for codigo in _espaciados(cargar_indice(dataset).codigos, codigos):
+        yield 'serie_sistema', (dataset, codigo, columna), {}
+        yield 'serie_sistema', (dataset, codigo, columna, fechas[len(fechas) // 2], fechas[-1]), {}
+        yield 'heatmap', (dataset, codigo), {'columna': columna}
+        yield 'variacion_anual', (dataset, codigo, columna, fechas[len(fechas) // 2]), {}
+        for fecha in _espaciados(fechas, meses):
+            yield 'ranking', (dataset, codigo, fecha, columna), {}
+
+
+def _comparar(referencia, resultado) -> None:
+    if isinstance(referencia, pd.DataFrame):
+        pd.testing.assert_frame_equal(referencia, resultado, rtol=TOLERANCIA)
+    elif referencia != resultado:
+        raise AssertionError(f"{referencia[:3]}... != {resultado[:3]}...")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad de motores de consultas contra pandas")
+    parser.add_argument('--motores', nargs='*', default=['arrow', 'polars'],
+                        choices=[m for m in consultas.MOTORES if m != 'pandas'])
+    parser.add_argument('--datasets', nargs='*', default=list(COLUMNAS), choices=list(COLUMNAS))
+    parser.add_argument('--codigos', type=int, default=5, help="Codigos por dataset")
+    parser.add_argument('--meses', type=int, default=3, help="Meses por codigo en ranking")
+    args = parser.parse_args()
+
+    # Los motores no disponibles (polars sin instalar) se avisan y se omiten
+    motores = []
+    for motor in args.motores:
+        if consultas.motor_disponible(motor) and motor not in motores:
+            motores.append(motor)
+    if not motores:
+        print("[ERROR] Ningun motor para comparar")
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"PARIDAD DE CONSULTAS: pandas vs {', '.join(motores)}")
+    print("=" * 60)
+
+    tiempos = defaultdict(float)    # (motor, consulta) -> segundos
+    casos = diferencias = 0
+    for dataset in args.datasets:
+        inicio = time.perf_counter()
+        cargar_indice(dataset)
+        print(f"  {dataset}: indice pandas en {time.perf_counter() - inicio:.2f}s")
+
+        for consulta, posicionales, nombrados in _casos(dataset, args.codigos, args.meses):
+            funcion = getattr(consultas, consulta)
+            inicio = time.perf_counter()
+            referencia = funcion(*posicionales, motor='pandas', **nombrados)
+            tiempos['pandas', consulta] += time.perf_counter() - inicio
+            casos += 1
+
+            for motor in motores:
+                inicio = time.perf_counter()
+                resultado = funcion(*posicionales, motor=motor, **nombrados)
+                tiempos[motor, consulta] += time.perf_counter() - inicio
+                try:
+                    _comparar(referencia, resultado)
+                except AssertionError as e:
+                    diferencias += 1
+                    print(f"  [ERROR] {motor} {consulta}{posicionales}: {str(e).splitlines()[0]}")
+
+    print("\n  " + "-" * 50)
+    print(f"  {'Consulta':<18}" + "".join(f"{m:>12}" for m in ['pandas'] + motores))
+    for consulta in sorted({c for _, c in tiempos}):
+        print(f"  {consulta:<18}" + "".join(
+            f"{tiempos[m, consulta] * 1000:>10.1f}ms" for m in ['pandas'] + motores))
+    print("  " + "-" * 50)
+
+    if diferencias:
+        print(f"[ERROR] {diferencias} resultados distintos en {casos} casos")
+        sys.exit(1)
+    print(f"[OK] {casos} casos identicos en {', '.join(motores)}")
+
+
+if __name__ == "__main__":
+    main()
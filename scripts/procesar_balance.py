@@ -9,146 +9,66 @@ Estructura del Excel:
 - Columna B, desde fila 7: Nombres de cuenta
 - Desde C7: Valores en miles de dolares
 
-Genera: master_data/balance.parquet
+La estructura se declara en config/hojas_excel.py (ESPEC_BAL) y la extraccion
+la hace utils/extraccion.py.
+
+Genera: master_data/versiones/<version>/balance/ (particionado por año),
+cobertura_balance, calidad_balance.json, series_balance, cubo_balance/ y el
+modelo dimensional (dim_* y hechos_*, con el pyg de la version vigente)
 """
 
 import pandas as pd
-import numpy as np
 from pathlib import Path
 from datetime import datetime
-import re
-import json
+import sys
+from typing import List, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config.hojas_excel import ESPEC_BAL
+from utils.almacenamiento import tamano_dataset
+from utils.extraccion import extraer_directorio
+from utils.preparacion import completar_planos, preparar_dataset, preparar_modelo_dimensional
+from utils.publicacion import obtener_directorio_datos, publicar_version
 
 # =============================================================================
 # CONFIGURACION
 # =============================================================================
 
-EXCEL_DIR = Path("datos_bancos_diciembre_2025/archivos_excel")
-MASTER_DIR = Path("master_data")
-
-# Crear directorio si no existe
-MASTER_DIR.mkdir(exist_ok=True)
-
-
-def extraer_nombre_banco(carpeta: str) -> str:
-    """Extrae nombre del banco de la carpeta."""
-    nombre = re.sub(
-        r'\s+(ENERO|FEBRERO|MARZO|ABRIL|MAYO|JUNIO|JULIO|AGOSTO|SEPTIEMBRE|OCTUBRE|NOVIEMBRE|DICIEMBRE)\s+\d{4}$',
-        '', carpeta, flags=re.IGNORECASE
-    )
-    return nombre.strip()
-
-
-def calcular_nivel(codigo: str) -> int:
-    """Calcula nivel jerarquico segun cantidad de digitos."""
-    if pd.isna(codigo) or codigo == '':
-        return 0
-
-    codigo_limpio = str(codigo).strip().replace('.', '').replace(' ', '')
-
-    if not codigo_limpio.isdigit():
-        return 0
-
-    longitud = len(codigo_limpio)
-
-    if longitud <= 1:
-        return 1
-    elif longitud <= 2:
-        return 2
-    elif longitud <= 4:
-        return 3
-    elif longitud <= 6:
-        return 4
-    else:
-        return 5
+# Rutas relativas a la raiz del proyecto, no al directorio de trabajo
+RAIZ = Path(__file__).resolve().parent.parent
+EXCEL_DIR = RAIZ / "datos_bancos_diciembre_2025" / "archivos_excel"
+MASTER_DIR = RAIZ / "master_data"
+STAGING_DIR = MASTER_DIR / "_etl" / "procesar_balance"
 
 
-def procesar_banco(ruta_excel: Path, nombre_banco: str) -> pd.DataFrame:
+def extraer_balance(excel_dir: Path = EXCEL_DIR, workers: int = 1) -> Tuple[pd.DataFrame, List[str], List[str]]:
     """
-    Procesa la hoja BAL de un banco.
+    Procesa la hoja BAL de todos los bancos en excel_dir.
 
     Returns:
-        DataFrame con columnas: banco, fecha, codigo, cuenta, valor, nivel
+        Tuple[DataFrame, list, list]: DataFrame consolidado, bancos procesados
+        y bancos con error
     """
-    try:
-        # Leer hoja BAL sin header (lo procesamos manualmente)
-        df_raw = pd.read_excel(ruta_excel, sheet_name='BAL', header=None)
-
-        # Extraer fechas de fila 5 (indice 4), desde columna C (indice 2)
-        fechas_raw = df_raw.iloc[4, 2:].values
-
-        # Convertir fechas
-        fechas = []
-        for f in fechas_raw:
-            if pd.isna(f):
-                continue
-            try:
-                if isinstance(f, datetime):
-                    fechas.append(f)
-                else:
-                    fechas.append(pd.to_datetime(f))
-            except:
-                continue
-
-        if not fechas:
-            print(f"  [ERROR] No se encontraron fechas validas en {nombre_banco}")
-            return pd.DataFrame()
-
-        # Extraer datos desde fila 7 (indice 6)
-        df_datos = df_raw.iloc[6:].copy()
-
-        # Columna A = codigos, Columna B = cuentas, Columnas C+ = valores
-        codigos = df_datos.iloc[:, 0].values
-        cuentas = df_datos.iloc[:, 1].values
-        valores = df_datos.iloc[:, 2:2+len(fechas)].values
-
-        # Crear DataFrame en formato largo
-        registros = []
-
-        for i in range(len(codigos)):
-            codigo = codigos[i]
-            cuenta = cuentas[i]
-
-            # Saltar filas vacias
-            if pd.isna(codigo) and pd.isna(cuenta):
-                continue
-
-            codigo_str = str(codigo).strip() if pd.notna(codigo) else ''
-            cuenta_str = str(cuenta).strip() if pd.notna(cuenta) else ''
-
-            # Saltar si ambos estan vacios
-            if not codigo_str and not cuenta_str:
-                continue
-
-            nivel = calcular_nivel(codigo_str)
-
-            for j, fecha in enumerate(fechas):
-                valor = valores[i, j] if j < valores.shape[1] else None
-
-                # Convertir valor a float
-                if pd.notna(valor):
-                    try:
-                        valor_float = float(valor)
-                    except:
-                        valor_float = None
-                else:
-                    valor_float = None
-
-                registros.append({
-                    'banco': nombre_banco,
-                    'fecha': fecha,
-                    'codigo': codigo_str,
-                    'cuenta': cuenta_str,
-                    'valor': valor_float,
-                    'nivel': nivel
-                })
+    datasets, reporte = extraer_directorio(excel_dir, [ESPEC_BAL], workers=workers)
+    return (
+        datasets.get('balance', pd.DataFrame()),
+        reporte['balance']['bancos_procesados'],
+        reporte['balance']['bancos_error'],
+    )
 
-        df_resultado = pd.DataFrame(registros)
-        return df_resultado
 
-    except Exception as e:
-        print(f"  [ERROR] {nombre_banco}: {e}")
-        return pd.DataFrame()
+def generar_info(df: pd.DataFrame, bancos_procesados: List[str], bancos_error: List[str]) -> dict:
+    """Informacion de la corrida que se guarda en el manifiesto de la version."""
+    return {
+        'ultima_actualizacion': datetime.now().isoformat(),
+        'bancos_procesados': bancos_procesados,
+        'bancos_error': bancos_error,
+        'total_registros': len(df),
+        'fecha_min': str(df['fecha'].min()),
+        'fecha_max': str(df['fecha'].max()),
+        'hojas_procesadas': ['BAL'],
+    }
 
 
 def main():
@@ -156,91 +76,46 @@ def main():
     print("PROCESADOR DE BALANCE GENERAL (HOJA BAL)")
     print("=" * 70)
 
-    # Buscar carpetas de bancos
-    carpetas = [d for d in EXCEL_DIR.iterdir() if d.is_dir()]
-
-    if not carpetas:
-        print(f"[ERROR] No se encontraron carpetas en {EXCEL_DIR}")
-        return
-
-    print(f"\n[INFO] Encontrados {len(carpetas)} bancos\n")
-
-    todos_los_dfs = []
-    bancos_procesados = []
-    bancos_error = []
-
-    for i, carpeta in enumerate(sorted(carpetas), 1):
-        nombre_banco = extraer_nombre_banco(carpeta.name)
-        print(f"[{i:2}/{len(carpetas)}] {nombre_banco}...", end=" ")
-
-        # Buscar archivo Excel
-        excels = list(carpeta.glob("*.xlsx")) + list(carpeta.glob("*.xls"))
-
-        if not excels:
-            print("[ERROR] No se encontro archivo Excel")
-            bancos_error.append(nombre_banco)
-            continue
-
-        ruta_excel = excels[0]
-
-        # Procesar
-        df = procesar_banco(ruta_excel, nombre_banco)
-
-        if df.empty:
-            bancos_error.append(nombre_banco)
-            print("[ERROR]")
-        else:
-            todos_los_dfs.append(df)
-            bancos_procesados.append(nombre_banco)
-            print(f"[OK] {len(df):,} registros")
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    df_consolidado, bancos_procesados, bancos_error = extraer_balance(EXCEL_DIR)
 
     # Consolidar
     print("\n" + "=" * 70)
     print("CONSOLIDANDO DATOS")
     print("=" * 70)
 
-    if not todos_los_dfs:
+    if df_consolidado.empty:
         print("[ERROR] No se procesaron datos")
         return
 
-    df_consolidado = pd.concat(todos_los_dfs, ignore_index=True)
+    # Guardar solo valores distintos de cero (particionado por año), la
+    # cobertura y los derivados en staging, y publicar una nueva version
+    df_disperso, archivos = preparar_dataset(df_consolidado, 'balance', STAGING_DIR)
 
-    # Optimizar tipos
-    df_consolidado['banco'] = df_consolidado['banco'].astype('category')
-    df_consolidado['codigo'] = df_consolidado['codigo'].astype(str)
-    df_consolidado['cuenta'] = df_consolidado['cuenta'].astype(str)
-    df_consolidado['nivel'] = df_consolidado['nivel'].astype('int8')
+    # El modelo dimensional se rearma con el pyg de la version vigente
+    planos = completar_planos({'balance': df_disperso}, obtener_directorio_datos(MASTER_DIR))
+    if planos is None:
+        print("[AVISO] La version vigente no trae pyg limpio: se publica sin modelo dimensional")
+    else:
+        archivos.update(preparar_modelo_dimensional(planos, STAGING_DIR))
 
-    # Guardar Parquet
-    ruta_parquet = MASTER_DIR / "balance.parquet"
-    df_consolidado.to_parquet(ruta_parquet, index=False, compression='snappy')
+    tamano_mb = tamano_dataset(archivos['balance']) / (1024 * 1024)
 
-    tamano_mb = ruta_parquet.stat().st_size / (1024 * 1024)
+    info = generar_info(df_consolidado, bancos_procesados, bancos_error)
+    info['registros_publicados'] = len(df_disperso)
+    version = publicar_version(
+        archivos,
+        info={'balance': info},
+        master_dir=MASTER_DIR,
+    )
 
-    print(f"\n[OK] Guardado: {ruta_parquet}")
-    print(f"    - Registros: {len(df_consolidado):,}")
+    print(f"\n[OK] Publicado: {MASTER_DIR / 'versiones' / version}")
+    print(f"    - Registros: {len(df_consolidado):,} ({len(df_disperso):,} distintos de cero)")
     print(f"    - Tamano: {tamano_mb:.2f} MB")
     print(f"    - Bancos: {df_consolidado['banco'].nunique()}")
     print(f"    - Fechas: {df_consolidado['fecha'].nunique()}")
     print(f"    - Cuentas unicas: {df_consolidado['cuenta'].nunique()}")
 
-    # Guardar metadata
-    metadata = {
-        'ultima_actualizacion': datetime.now().isoformat(),
-        'bancos_procesados': bancos_procesados,
-        'bancos_error': bancos_error,
-        'total_bancos': len(bancos_procesados),
-        'total_registros': len(df_consolidado),
-        'fecha_min': str(df_consolidado['fecha'].min()),
-        'fecha_max': str(df_consolidado['fecha'].max()),
-        'hojas_procesadas': ['BAL']
-    }
-
-    with open(MASTER_DIR / "metadata.json", 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
-
-    print(f"\n[OK] Metadata guardada en {MASTER_DIR / 'metadata.json'}")
-
     # Resumen
     print("\n" + "=" * 70)
     print("RESUMEN")
@@ -12,140 +12,34 @@ Estructura de la hoja PYG:
 - Nombres de cuenta: columna B
 - Datos: desde columna C
 - Fechas: fila 5, desde columna C
+
+La estructura se declara en config/hojas_excel.py (ESPEC_PYG).
 """
 
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
+import math
+import sys
 import warnings
 
-warnings.filterwarnings('ignore')
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configuración
-CARPETA_DATOS = Path("datos_bancos_diciembre_2025/archivos_excel")
-CARPETA_SALIDA = Path("master_data")
-
-# Códigos para cuentas resumen (filas con "--")
-CODIGOS_RESUMEN = {
-    'MARGEN NETO DE INTERESES': 'MNI',
-    'MARGEN BRUTO FINANCIERO': 'MBF',
-    'MARGEN NETO FINANCIERO': 'MNF',
-    'MARGEN DE INTERMEDIACION': 'MDI',
-    'MARGEN OPERACIONAL': 'MOP',
-    'GANANCIA O PERDIDA ANTES DE IMPUESTOS': 'GAI',
-    'GANANCIA O PERDIDA DEL EJERCICIO': 'GDE',
-}
-
-
-def limpiar_nombre_cuenta(nombre: str) -> str:
-    """Limpia el nombre de la cuenta para usar como clave."""
-    if pd.isna(nombre):
-        return ''
-    nombre = str(nombre).upper()
-    nombre = nombre.replace('Á', 'A').replace('É', 'E').replace('Í', 'I')
-    nombre = nombre.replace('Ó', 'O').replace('Ú', 'U').replace('Ñ', 'N')
-    return nombre
-
-
-def obtener_codigo_resumen(nombre: str) -> str:
-    """Obtiene el código para una cuenta resumen."""
-    nombre_limpio = limpiar_nombre_cuenta(nombre)
-    for clave, codigo in CODIGOS_RESUMEN.items():
-        if clave in nombre_limpio:
-            return codigo
-    return None
-
-
-def procesar_archivo_pyg(ruta_excel: Path) -> pd.DataFrame:
-    """Procesa la hoja PYG de un archivo Excel."""
-    try:
-        # Extraer nombre del banco de la ruta
-        nombre_banco = ruta_excel.parent.name.split()[0]
-
-        # Leer hoja PYG sin encabezado
-        df_raw = pd.read_excel(ruta_excel, sheet_name='PYG', header=None)
-
-        if df_raw.shape[0] < 10 or df_raw.shape[1] < 5:
-            print(f"  [WARN] Archivo muy pequeño: {ruta_excel.name}")
-            return pd.DataFrame()
-
-        # Extraer fechas de la fila 5 (índice 4), desde columna C (índice 2)
-        fechas_raw = df_raw.iloc[4, 2:].values
-        fechas = []
-        for f in fechas_raw:
-            if pd.notna(f):
-                if isinstance(f, datetime):
-                    fechas.append(f)
-                elif isinstance(f, str):
-                    try:
-                        fechas.append(pd.to_datetime(f))
-                    except:
-                        break
-                else:
-                    break
-            else:
-                break
-
-        if len(fechas) == 0:
-            print(f"  [WARN] Sin fechas válidas: {ruta_excel.name}")
-            return pd.DataFrame()
-
-        # Procesar filas de datos (desde fila 6, índice 5)
-        registros = []
-
-        for idx in range(5, min(140, len(df_raw))):
-            codigo_raw = df_raw.iloc[idx, 0]
-            nombre = df_raw.iloc[idx, 1]
-
-            # Determinar código
-            if pd.isna(codigo_raw):
-                continue
-
-            codigo_str = str(codigo_raw).strip()
-
-            if codigo_str == '--':
-                # Cuenta resumen
-                codigo = obtener_codigo_resumen(nombre)
-                if codigo is None:
-                    continue
-            elif codigo_str == 'nan':
-                continue
-            else:
-                codigo = codigo_str
-
-            # Limpiar nombre
-            if pd.isna(nombre):
-                continue
-            nombre_limpio = str(nombre).strip()
-
-            # Extraer valores
-            valores = df_raw.iloc[idx, 2:2+len(fechas)].values
-
-            for i, (fecha, valor) in enumerate(zip(fechas, valores)):
-                if pd.notna(valor):
-                    try:
-                        valor_num = float(valor)
-                        registros.append({
-                            'banco': nombre_banco,
-                            'fecha': pd.Timestamp(fecha),
-                            'codigo': codigo,
-                            'cuenta': nombre_limpio,
-                            'valor_acumulado': valor_num
-                        })
-                    except (ValueError, TypeError):
-                        pass
-
-        if len(registros) == 0:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(registros)
-        return df
+from config.hojas_excel import ESPEC_PYG, CODIGOS_RESUMEN_PYG
+from utils.almacenamiento import escala_punto_fijo, tamano_dataset
+from utils.extraccion import extraer_directorio
+from utils.periodos import agregar_periodo
+from utils.preparacion import completar_planos, preparar_dataset, preparar_modelo_dimensional
+from utils.publicacion import obtener_directorio_datos, publicar_version
 
-    except Exception as e:
-        print(f"  [ERROR] {ruta_excel.name}: {e}")
-        return pd.DataFrame()
+warnings.filterwarnings('ignore')
 
+# Configuración (rutas relativas a la raiz del proyecto)
+RAIZ = Path(__file__).resolve().parent.parent
+CARPETA_DATOS = RAIZ / "datos_bancos_diciembre_2025" / "archivos_excel"
+CARPETA_SALIDA = RAIZ / "master_data"
+CARPETA_STAGING = CARPETA_SALIDA / "_etl" / "procesar_pyg"
 
 def desacumular_valores(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -194,41 +88,29 @@ def calcular_suma_movil_12m(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def main():
-    print("=" * 60)
-    print("PROCESAMIENTO DE HOJA PYG (PÉRDIDAS Y GANANCIAS)")
-    print("=" * 60)
-
-    # Crear carpeta de salida
-    CARPETA_SALIDA.mkdir(exist_ok=True)
-
-    # Buscar archivos Excel
-    archivos = list(CARPETA_DATOS.glob("**/*.xlsx"))
-    print(f"\nArchivos encontrados: {len(archivos)}")
-
-    if len(archivos) == 0:
-        print("[ERROR] No se encontraron archivos Excel")
-        return
+def extraer_pyg(carpeta_datos: Path = CARPETA_DATOS, workers: int = 1) -> pd.DataFrame:
+    """
+    Procesa la hoja PYG de todos los archivos Excel de carpeta_datos.
 
-    # Procesar cada archivo
-    dataframes = []
+    Returns:
+        DataFrame combinado con valores acumulados (sin desacumular)
+    """
+    datasets, _ = extraer_directorio(carpeta_datos, [ESPEC_PYG], workers=workers)
+    df_combinado = datasets.get('pyg_acumulado', pd.DataFrame())
+    print(f"Total registros acumulados: {len(df_combinado):,}")
+    return df_combinado
 
-    for i, archivo in enumerate(archivos):
-        print(f"\n[{i+1}/{len(archivos)}] {archivo.parent.name}")
-        df = procesar_archivo_pyg(archivo)
-        if not df.empty:
-            dataframes.append(df)
-            print(f"  -> {len(df):,} registros")
 
-    if len(dataframes) == 0:
-        print("\n[ERROR] No se procesaron datos")
-        return
+def derivar_pyg(df_combinado: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deriva valor_mes y valor_12m a partir de los valores acumulados.
 
-    # Combinar todos los DataFrames
-    print("\n" + "-" * 40)
-    print("Combinando datos...")
-    df_combinado = pd.concat(dataframes, ignore_index=True)
-    print(f"Total registros acumulados: {len(df_combinado):,}")
+    Returns:
+        DataFrame con columnas: banco, fecha, periodo, codigo, cuenta,
+        valor_acumulado, valor_mes, valor_12m
+    """
+    # Intermedios anteriores a la clave de periodo no traen la columna
+    df_combinado = agregar_periodo(df_combinado)
 
     # Desacumular valores
     print("\nDesacumulando valores mensuales...")
@@ -239,10 +121,43 @@ def main():
     print("\nCalculando suma móvil de 12 meses...")
     df_final = calcular_suma_movil_12m(df_desacumulado)
 
+    # Las restas y sumas moviles arrastran error de float: se redondean a la
+    # precision de los acumulados para que sigan siendo exactas en punto fijo
+    escala = escala_punto_fijo(df_final['valor_acumulado'])
+    if escala:
+        decimales = int(round(math.log10(escala)))
+        df_final['valor_mes'] = df_final['valor_mes'].round(decimales)
+        df_final['valor_12m'] = df_final['valor_12m'].round(decimales)
+
     # Seleccionar columnas finales
-    columnas_finales = ['banco', 'fecha', 'codigo', 'cuenta',
+    columnas_finales = ['banco', 'fecha', 'periodo', 'codigo', 'cuenta',
                         'valor_acumulado', 'valor_mes', 'valor_12m']
-    df_final = df_final[columnas_finales]
+    return df_final[columnas_finales]
+
+
+def main():
+    print("=" * 60)
+    print("PROCESAMIENTO DE HOJA PYG (PÉRDIDAS Y GANANCIAS)")
+    print("=" * 60)
+
+    # Crear carpeta de salida
+    CARPETA_STAGING.mkdir(parents=True, exist_ok=True)
+
+    df_combinado = extraer_pyg(CARPETA_DATOS)
+
+    if df_combinado.empty:
+        print("\n[ERROR] No se procesaron datos")
+        return
+
+    # Limpia y deja en staging el dataset y sus derivados
+    df_final, archivos = preparar_dataset(derivar_pyg(df_combinado), 'pyg', CARPETA_STAGING)
+
+    # El modelo dimensional se rearma con el balance de la version vigente
+    planos = completar_planos({'pyg': df_final}, obtener_directorio_datos(CARPETA_SALIDA))
+    if planos is None:
+        print("[AVISO] La version vigente no trae balance limpio: se publica sin modelo dimensional")
+    else:
+        archivos.update(preparar_modelo_dimensional(planos, CARPETA_STAGING))
 
     # Estadísticas
     print("\n" + "=" * 40)
@@ -260,18 +175,25 @@ def main():
     registros_con_12m = df_final['valor_12m'].notna().sum()
     print(f"Registros con valor_12m: {registros_con_12m:,} ({registros_con_12m/len(df_final)*100:.1f}%)")
 
-    # Guardar
-    ruta_salida = CARPETA_SALIDA / "pyg.parquet"
-    df_final.to_parquet(ruta_salida, index=False)
-    print(f"\n[OK] Guardado: {ruta_salida}")
-    print(f"    Tamaño: {ruta_salida.stat().st_size / 1024 / 1024:.1f} MB")
+    # Publicar una nueva version
+    version = publicar_version(
+        archivos,
+        info={'pyg': {
+            'ultima_actualizacion': datetime.now().isoformat(),
+            'fecha_min': str(df_final['fecha'].min()),
+            'fecha_max': str(df_final['fecha'].max()),
+        }},
+        master_dir=CARPETA_SALIDA,
+    )
+    print(f"\n[OK] Publicado: {CARPETA_SALIDA / 'versiones' / version}")
+    print(f"    Tamaño: {tamano_dataset(archivos['pyg']) / 1024 / 1024:.1f} MB")
 
     # Mostrar muestra de cuentas principales
     print("\n" + "-" * 40)
     print("Cuentas principales procesadas:")
     cuentas_principales = df_final[
         (df_final['codigo'].str.len() <= 3) |
-        (df_final['codigo'].isin(['MNI', 'MBF', 'MNF', 'MDI', 'MOP', 'GAI', 'GDE']))
+        (df_final['codigo'].isin(list(CODIGOS_RESUMEN_PYG.values())))
     ]['codigo'].unique()
     for c in sorted(cuentas_principales):
         nombre = df_final[df_final['codigo'] == c]['cuenta'].iloc[0]
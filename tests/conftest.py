@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Rutas de importacion (igual que scripts/: raiz y scripts) y versiones
+sinteticas de master_data para las pruebas.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+RAIZ = Path(__file__).parent.parent
+
+for ruta in (RAIZ, RAIZ / 'scripts'):
+    if str(ruta) not in sys.path:
+        sys.path.insert(0, str(ruta))
+
+from utils.periodos import fecha_a_periodo  # noqa: E402
+
+BANCOS = ('BP GUAYAQUIL', 'BP LOJA', 'BP PACIFICO', 'BP PICHINCHA')
+CUENTAS = {'1': 'ACTIVO', '14': 'CARTERA', '1401': 'CARTERA COMERCIAL', '2': 'PASIVO', '21': 'OBLIGACIONES'}
+# (banco, codigo) en cero todos los meses
+CUENTAS_EN_CERO = {('BP LOJA', '21'), ('BP LOJA', '1401')}
+
+
+def datos_sinteticos(meses: int = 30) -> dict:
+    """balance, pyg y camel densos (como los deja la etapa parsear)."""
+    rng = np.random.default_rng(0)
+    fechas = pd.date_range('2022-01-31', periods=meses, freq='ME')
+
+    filas = []
+    for banco in BANCOS:
+        for fecha in fechas:
+            for codigo, cuenta in CUENTAS.items():
+                valor = round(float(rng.uniform(100, 1000)), 2)
+                if (banco, codigo) in CUENTAS_EN_CERO:
+                    valor = 0.0
+                elif rng.random() < 0.1:
+                    valor = rng.choice([0.0, np.nan])
+                filas.append((banco, fecha, codigo, cuenta, valor))
+    balance = pd.DataFrame(filas, columns=['banco', 'fecha', 'codigo', 'cuenta', 'valor'])
+    balance['nivel'] = balance['codigo'].str.len().map({1: 1, 2: 2, 4: 3})
+
+    filas = []
+    for banco in BANCOS:
+        for i, fecha in enumerate(fechas):
+            for codigo, cuenta in {'GDE': 'GANANCIA', '51': 'INTERESES'}.items():
+                filas.append((banco, fecha, codigo, cuenta, round(float(rng.uniform(1, 100)), 2),
+                              round(float(rng.uniform(1, 10)), 2),
+                              round(float(rng.uniform(10, 200)), 2) if i >= 12 else np.nan))
+    pyg = pd.DataFrame(filas, columns=['banco', 'fecha', 'codigo', 'cuenta', 'valor_acumulado',
+                                       'valor_mes', 'valor_12m'])
+
+    filas = []
+    for banco in BANCOS:
+        for fecha in fechas:
+            for codigo, indicador in {'SOL': 'SOLVENCIA', 'ROE': 'ROE'}.items():
+                filas.append((banco, fecha, codigo, indicador, 'C', float(rng.uniform(0, 0.3))))
+    camel = pd.DataFrame(filas, columns=['banco', 'fecha', 'codigo', 'indicador', 'categoria', 'valor'])
+
+    datos = {'balance': balance, 'pyg': pyg, 'camel': camel}
+    for df in datos.values():
+        df['periodo'] = fecha_a_periodo(df['fecha']).astype('int16')
+    return datos
+
+
+def publicar_sintetica(master_dir: Path) -> str:
+    """Publica los datos sinteticos con las etapas de preparacion y publicacion del ETL."""
+    import actualizar
+
+    etl_dir = master_dir / '_etl'
+    etl_dir.mkdir(parents=True)
+    for nombre, df in datos_sinteticos().items():
+        df.to_parquet(etl_dir / f"{nombre}.parquet", index=False)
+    with open(etl_dir / 'validacion.json', 'w', encoding='utf-8') as f:
+        json.dump({n: {'registros': 1} for n in ('balance', 'pyg', 'camel')}, f)
+    with open(etl_dir / 'balance_info.json', 'w', encoding='utf-8') as f:
+        json.dump({'bancos_procesados': list(BANCOS), 'bancos_error': [], 'hojas_procesadas': ['BAL']}, f)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(actualizar, 'ETL_DIR', etl_dir)
+        mp.setattr(actualizar, 'MASTER_DIR', master_dir)
+        for nombre in actualizar.COLUMNAS_REQUERIDAS:
+            actualizar.etapa_preparar({}, nombre)
+        actualizar.etapa_modelo_dimensional({})
+        actualizar.etapa_publicar({})
+    return (master_dir / 'CURRENT').read_text().strip()
+
+
+def publicar_antigua(master_dir: Path) -> str:
+    """
+    Version como las publicadas antes de limpiar en el ETL: balance denso
+    (con ceros y nulos), sin calidad_<dataset>.json, cobertura ni series.
+    """
+    from utils.almacenamiento import columnas_particion, escribir_dataset
+    from utils.publicacion import publicar_version
+
+    staging = master_dir / '_staging'
+    archivos = {
+        nombre: escribir_dataset(df, staging, nombre, columnas_particion(nombre), punto_fijo=True)
+        for nombre, df in datos_sinteticos().items()
+    }
+    return publicar_version(archivos, master_dir=master_dir)
+
+
+def _servir(monkeypatch, master_dir: Path) -> None:
+    import utils.publicacion as publicacion
+    monkeypatch.setattr(publicacion, 'MASTER_DATA_DIR', master_dir)
+
+
+@pytest.fixture(autouse=True)
+def _cache_en_disco_temporal(tmp_path, monkeypatch):
+    """La cache en disco de cada prueba va a tmp_path, no a .cache/ del repo."""
+    import utils.cache as cache
+    monkeypatch.setattr(cache, 'DIRECTORIO_CACHE_DISCO', tmp_path / 'cache_calculos')
+
+
+@pytest.fixture(scope='session')
+def _dir_sintetica(tmp_path_factory):
+    master_dir = tmp_path_factory.mktemp('sintetica') / 'master_data'
+    publicar_sintetica(master_dir)
+    return master_dir
+
+
+@pytest.fixture(scope='session')
+def _dir_antigua(tmp_path_factory):
+    master_dir = tmp_path_factory.mktemp('antigua') / 'master_data'
+    publicar_antigua(master_dir)
+    return master_dir
+
+
+@pytest.fixture
+def version_sintetica(_dir_sintetica, monkeypatch):
+    """master_data con una version publicada por el ETL actual."""
+    _servir(monkeypatch, _dir_sintetica)
+    return _dir_sintetica
+
+
+@pytest.fixture
+def version_antigua(_dir_antigua, monkeypatch):
+    """master_data con una version de formato anterior (balance denso)."""
+    _servir(monkeypatch, _dir_antigua)
+    return _dir_antigua
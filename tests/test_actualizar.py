@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Omision de etapas por huella en scripts/actualizar.py."""
+
+import dataclasses
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import actualizar
+
+
+def _descarga_simulada(ctx):
+    """Reemplazo de etapa_descargar: deja constancia de cada llamada."""
+    marca = Path(ctx['registro'])
+    marca.write_text(marca.read_text() + 'x' if marca.exists() else 'x')
+
+
+@pytest.fixture
+def grafo_descarga(tmp_path, monkeypatch):
+    """Solo la etapa descargar (con su declaracion real) y un _etl temporal."""
+    real = next(e for e in actualizar.ETAPAS if e.nombre == 'descargar')
+    monkeypatch.setattr(actualizar, 'ETAPAS', [dataclasses.replace(real, ejecutar=_descarga_simulada)])
+    monkeypatch.setattr(actualizar, 'ETL_DIR', tmp_path / '_etl')
+    monkeypatch.setattr(actualizar, 'ESTADO_FILE', tmp_path / '_etl' / 'estado.json')
+    return tmp_path / 'descargas.txt'
+
+
+def test_descargar_se_ejecuta_en_cada_corrida(grafo_descarga):
+    ctx = {'descargar': True, 'registro': str(grafo_descarga)}
+
+    primera = actualizar.ejecutar_grafo(ctx, workers=1)
+    segunda = actualizar.ejecutar_grafo(ctx, workers=1)
+
+    assert primera['descargar']['estado'] == 'ok'
+    assert segunda['descargar']['estado'] == 'ok'
+    assert grafo_descarga.read_text() == 'xx'
+
+
+def test_descargar_inactiva_sin_opcion(grafo_descarga):
+    resultados = actualizar.ejecutar_grafo({'descargar': False, 'registro': str(grafo_descarga)}, workers=1)
+
+    assert resultados['descargar']['estado'] == 'inactiva'
+    assert not grafo_descarga.exists()
+
+
+def test_etapa_con_salidas_se_omite_si_no_cambia(tmp_path):
+    salida = tmp_path / 'salida.parquet'
+    salida.write_bytes(b'')
+    etapa = actualizar.Etapa(nombre='x', ejecutar=_descarga_simulada, salidas=lambda ctx: [salida])
+    estado = {'x': {'huella': 'abc'}}
+
+    assert actualizar.puede_omitirse(etapa, {}, 'abc', estado)
+    assert not actualizar.puede_omitirse(etapa, {}, 'otra', estado)
+    salida.unlink()
+    assert not actualizar.puede_omitirse(etapa, {}, 'abc', estado)
+
+
+def test_huella_de_publicar_cambia_con_los_intermedios(tmp_path, monkeypatch):
+    """Valores revisados con los mismos conteos y fechas: validacion.json no cambia."""
+    monkeypatch.setattr(actualizar, 'ETL_DIR', tmp_path)
+    ctx = {'hojas': []}
+    for nombre in ('balance', 'pyg_acumulado', 'pyg', 'camel'):
+        actualizar._intermedio(nombre).write_bytes(b'v1')
+    (tmp_path / 'balance_info.json').write_text('{}')
+    (tmp_path / 'validacion.json').write_text('{}')
+    publicar = next(e for e in actualizar.ETAPAS if e.nombre == 'publicar')
+    huellas = {'parsear': 'p', 'derivar_pyg': 'd', 'validar': 'v'}
+
+    antes = actualizar.calcular_huella(publicar, ctx, huellas)
+    actualizar._intermedio('balance').write_bytes(b'v2')
+
+    assert actualizar.calcular_huella(publicar, ctx, huellas) != antes
+
+
+def _parsear_sintetico(ctx):
+    """Reemplazo de etapa_parsear: intermedios sinteticos en lugar de libros Excel."""
+    from conftest import BANCOS, datos_sinteticos
+
+    datos = datos_sinteticos()
+    datos['pyg_acumulado'] = datos['pyg']
+    for nombre in ('balance', 'pyg_acumulado', 'camel'):
+        datos[nombre].to_parquet(actualizar._intermedio(nombre), index=False)
+    (actualizar.ETL_DIR / 'balance_info.json').write_text(
+        json.dumps({'bancos_procesados': list(BANCOS), 'bancos_error': []}))
+
+
+def _derivar_sintetico(ctx):
+    shutil.copy(actualizar._intermedio('pyg_acumulado'), actualizar._intermedio('pyg'))
+
+
+@pytest.fixture
+def grafo_sintetico(tmp_path, monkeypatch):
+    """Grafo real desde parsear, con parsear y derivar_pyg sobre datos sinteticos."""
+    reemplazos = {'parsear': _parsear_sintetico, 'derivar_pyg': _derivar_sintetico}
+    monkeypatch.setattr(actualizar, 'ETAPAS', [
+        dataclasses.replace(e, ejecutar=reemplazos.get(e.nombre, e.ejecutar)) for e in actualizar.ETAPAS
+    ])
+    monkeypatch.setattr(actualizar, 'MASTER_DIR', tmp_path / 'master_data')
+    monkeypatch.setattr(actualizar, 'ETL_DIR', tmp_path / 'master_data' / '_etl')
+    monkeypatch.setattr(actualizar, 'ESTADO_FILE', tmp_path / 'master_data' / '_etl' / 'estado.json')
+    return {'descargar': False, 'zip_dir': None, 'excel_dir': str(tmp_path / 'excel'), 'hojas': []}
+
+
+def test_preparacion_por_dataset_es_independiente():
+    etapas = {e.nombre: e for e in actualizar.ETAPAS}
+
+    def ancestros(nombre):
+        directos = set(etapas[nombre].depende_de)
+        return directos.union(*(ancestros(d) for d in directos))
+
+    preparar = [n for n in etapas if n.startswith('preparar_')]
+    assert len(preparar) == 4
+    for nombre in preparar:
+        assert not ancestros(nombre) & set(preparar)
+        assert nombre in ancestros('publicar')
+
+
+def test_grafo_publica_y_omite_lo_que_no_cambio(grafo_sintetico):
+    primera = actualizar.ejecutar_grafo(grafo_sintetico, workers=3)
+
+    assert {n for n, r in primera.items() if r['estado'] == 'ok'} == {
+        'parsear', 'derivar_pyg', 'validar', 'preparar_balance', 'preparar_pyg', 'preparar_camel',
+        'modelo_dimensional', 'publicar',
+    }
+    manifest = json.loads(next((actualizar.MASTER_DIR / 'versiones').glob('*/manifest.json')).read_text())
+    for nombre in ('balance', 'cobertura_balance', 'calidad_pyg', 'series_camel', 'cubo_balance',
+                   'dim_cuenta', 'hechos_pyg'):
+        assert manifest['datasets'][nombre]['version_origen'] == manifest['version']
+
+    segunda = actualizar.ejecutar_grafo(grafo_sintetico, workers=3)
+
+    assert {r['estado'] for r in segunda.values()} == {'inactiva', 'omitida'}
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""cache_por_huella: claves y carpetas de la cache en disco."""
+
+import pytest
+
+import utils.cache as cache
+from utils.cache import cache_por_huella, estadisticas_cache
+
+
+@cache_por_huella(disco=True)
+def _ranking_de_prueba(codigo: str, top_n: int = 10) -> list:
+    return [codigo] * top_n
+
+
+def _carpeta() -> str:
+    return f"{cache._nombre_funcion(_ranking_de_prueba.__wrapped__)}-{cache._hash_codigo(_ranking_de_prueba.__wrapped__)}"
+
+
+def test_llamadas_equivalentes_comparten_entrada(version_sintetica):
+    nombre = cache._nombre_funcion(_ranking_de_prueba.__wrapped__)
+    _ranking_de_prueba.clear()
+    antes = estadisticas_cache()[nombre]['fallos']
+
+    _ranking_de_prueba('14', 10)
+    _ranking_de_prueba('14', top_n=10)
+    _ranking_de_prueba('14')
+
+    assert estadisticas_cache()[nombre]['fallos'] == antes + 1
+
+
+def test_hash_cambia_con_las_librerias(monkeypatch):
+    antes = cache._hash_codigo(_ranking_de_prueba.__wrapped__)
+    monkeypatch.setattr(cache, 'version', lambda libreria: '0.0')
+    cache.huella_codigo.cache_clear()
+    try:
+        assert cache._hash_codigo(_ranking_de_prueba.__wrapped__) != antes
+    finally:
+        monkeypatch.undo()
+        cache.huella_codigo.cache_clear()
+
+
+def test_borra_carpetas_de_otro_hash(version_sintetica):
+    directorio = cache.DIRECTORIO_CACHE_DISCO
+    nombre = cache._nombre_funcion(_ranking_de_prueba.__wrapped__)
+    vieja = directorio / f"{nombre}-000000000000"
+    vieja.mkdir(parents=True)
+    (vieja / 'entrada.pkl').write_bytes(b'viejo')
+    otra_funcion = directorio / f"{nombre}_otra-000000000000"
+    otra_funcion.mkdir()
+
+    _ranking_de_prueba.clear()
+    assert _ranking_de_prueba('21', 3) == ['21'] * 3
+
+    assert not vieja.exists()
+    assert otra_funcion.exists()
+    assert len(list((directorio / _carpeta()).glob('*.pkl'))) == 1
+
+
+def test_datos_compartidos_son_de_solo_lectura(version_sintetica):
+    from utils.data_loader import cargar_todos_los_datos
+
+    cargar_todos_los_datos.clear()
+    datos = cargar_todos_los_datos()
+
+    assert isinstance(datos['errores'], tuple)
+    with pytest.raises(TypeError):
+        datos['resumen']['total_registros'] = 0
+    with pytest.raises(TypeError):
+        datos['errores'] = ()
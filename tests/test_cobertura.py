@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Balance disperso: dispersar, cobertura y series con cuentas en cero."""
+
+import numpy as np
+import pandas as pd
+
+from conftest import CUENTAS, CUENTAS_EN_CERO, datos_sinteticos
+from utils.cobertura import dispersar
+from utils.data_loader import cargar_indice, cargar_serie
+from utils.series import escribir_series, leer_series
+
+
+def test_dispersar_conserva_cuentas_en_cero():
+    denso = datos_sinteticos()['balance']
+    disperso, _ = dispersar(denso)
+
+    pares = set(disperso[['banco', 'codigo']].itertuples(index=False, name=None))
+    assert pares == set(denso[['banco', 'codigo']].itertuples(index=False, name=None))
+    assert disperso['valor'].notna().all()
+    # Una sola fila (en cero) por cuenta sin valores
+    for par in CUENTAS_EN_CERO:
+        filas = disperso[(disperso['banco'] == par[0]) & (disperso['codigo'] == par[1])]
+        assert filas['valor'].tolist() == [0.0]
+
+
+def test_ida_y_vuelta_de_cuenta_en_cero(tmp_path):
+    denso = datos_sinteticos()['balance']
+    disperso, cobertura = dispersar(denso)
+    escribir_series(disperso, tmp_path, 'balance', cobertura)
+
+    serie = leer_series(tmp_path, 'balance', codigos=['21'], bancos=['BP LOJA'])
+
+    assert len(serie) == denso['fecha'].nunique()
+    assert (serie['valor'] == 0).all()
+
+
+def test_series_reconstruyen_el_balance_denso(tmp_path):
+    denso = datos_sinteticos()['balance']
+    disperso, cobertura = dispersar(denso)
+    escribir_series(disperso, tmp_path, 'balance', cobertura)
+
+    serie = leer_series(tmp_path, 'balance')
+    esperado = denso.assign(valor=denso['valor'].fillna(0.0))
+    combinado = esperado.merge(serie, on=['banco', 'codigo', 'periodo'], suffixes=('', '_serie'))
+
+    assert len(combinado) == len(denso)
+    np.testing.assert_array_equal(combinado['valor'], combinado['valor_serie'])
+
+
+def test_version_publicada_sirve_cuentas_en_cero(version_sintetica):
+    serie = cargar_serie('balance', '21', ('BP LOJA',))
+
+    assert not serie.empty
+    assert (serie['valor'] == 0).all()
+    assert set(cargar_indice('balance').codigos) == set(CUENTAS)
+    assert isinstance(serie['fecha'].iloc[0], pd.Timestamp)
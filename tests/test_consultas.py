@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Paridad de los motores de consultas con pandas (ver scripts/paridad_consultas.py)."""
+
+import pytest
+
+from conftest import CUENTAS
+from paridad_consultas import COLUMNAS, _casos, _comparar
+from utils import consultas
+
+
+@pytest.mark.parametrize('version', ['version_sintetica', 'version_antigua'])
+@pytest.mark.parametrize('motor', ['arrow', 'polars'])
+def test_motor_igual_a_pandas(motor, version, request):
+    # Sin polars, consultas.py usaria arrow y la prueba no mediria nada
+    assert consultas.motor_disponible(motor), f"{motor} no esta instalado (ver requirements-dev.txt)"
+    request.getfixturevalue(version)
+
+    for dataset in COLUMNAS:
+        for consulta, posicionales, nombrados in _casos(dataset, codigos=len(CUENTAS), meses=4):
+            funcion = getattr(consultas, consulta)
+            referencia = funcion(*posicionales, motor='pandas', **nombrados)
+            try:
+                _comparar(referencia, funcion(*posicionales, motor=motor, **nombrados))
+            except AssertionError as e:
+                raise AssertionError(f"{motor} {consulta}{posicionales}: {e}") from e
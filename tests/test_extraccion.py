@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Salida de utils/extraccion.extraer_hoja para cada tipo de EspecHoja.
+
+Las hojas son DataFrames sinteticos como los que devuelve
+pd.read_excel(..., header=None); los resultados esperados son los que
+daban los parsers celda por celda de procesar_balance, procesar_pyg y
+procesar_camel para las mismas hojas.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from config.hojas_excel import ESPEC_BAL, ESPEC_CAMEL, ESPEC_INDICAD, ESPEC_PYG
+from utils.extraccion import extraer_hoja
+
+ENE, FEB, MAR = datetime(2024, 1, 31), datetime(2024, 2, 29), datetime(2024, 3, 31)
+
+
+def _hoja(filas: dict, alto: int = None) -> pd.DataFrame:
+    """Hoja cruda a partir de {fila Excel (desde 1): valores desde la columna A}."""
+    alto = alto or max(filas)
+    ancho = max(len(v) for v in filas.values())
+    celdas = [[None] * ancho for _ in range(alto)]
+    for fila, valores in filas.items():
+        celdas[fila - 1][:len(valores)] = valores
+    return pd.DataFrame(celdas, dtype=object)
+
+
+def _esperado(filas: list, columnas: list) -> pd.DataFrame:
+    df = pd.DataFrame(filas, columns=columnas)
+    df.insert(2, 'periodo', (df['fecha'].dt.year - 2003) * 12 + df['fecha'].dt.month - 1)
+    return df
+
+
+def _comparar(resultado: pd.DataFrame, esperado: pd.DataFrame) -> None:
+    tm.assert_frame_equal(resultado, esperado, check_dtype=False)
+
+
+# =============================================================================
+# BAL: codigo por fila, nulos conservados, nivel
+# =============================================================================
+
+def test_balance():
+    hoja = _hoja({
+        1: ['BALANCE GENERAL'],
+        5: [None, None, ENE, FEB],
+        6: ['CODIGO', 'CUENTA'],
+        7: ['1', 'ACTIVO', 100, 110.5],
+        8: [11, ' FONDOS DISPONIBLES ', 5, 'x'],
+        9: [None, None, 1, 2],
+        10: ['1101.05', 'CAJA', None, 7],
+        11: [None, 'TOTAL', 200, 210],
+    })
+
+    resultado = extraer_hoja(hoja, ESPEC_BAL, 'BP UNO')
+
+    _comparar(resultado, _esperado([
+        ('BP UNO', ENE, '1', 'ACTIVO', 100.0, 1),
+        ('BP UNO', FEB, '1', 'ACTIVO', 110.5, 1),
+        ('BP UNO', ENE, '11', 'FONDOS DISPONIBLES', 5.0, 2),
+        ('BP UNO', FEB, '11', 'FONDOS DISPONIBLES', np.nan, 2),
+        ('BP UNO', ENE, '1101.05', 'CAJA', np.nan, 4),
+        ('BP UNO', FEB, '1101.05', 'CAJA', 7.0, 4),
+        ('BP UNO', ENE, '', 'TOTAL', 200.0, 0),
+        ('BP UNO', FEB, '', 'TOTAL', 210.0, 0),
+    ], ['banco', 'fecha', 'codigo', 'cuenta', 'valor', 'nivel']))
+
+
+# =============================================================================
+# PYG: fechas contiguas, filas resumen '--' y nulos descartados
+# =============================================================================
+
+def test_pyg():
+    hoja = _hoja({
+        # La fecha de F queda fuera: las fechas terminan en la primera celda vacia
+        5: [None, None, ENE, FEB, None, MAR],
+        6: ['51', 'INTERESES Y DESCUENTOS GANADOS', 10, 20, 99, 99],
+        7: ['--', 'Margen de Intermediación', 3, 4, 99, 99],
+        8: ['--', 'OTRO TOTAL', 1, 1],
+        9: [None, 'SIN CODIGO', 1, 1],
+        10: ['52', None, 1, 1],
+        11: ['nan', 'CODIGO NAN', 1, 1],
+        12: ['53', 'COMISIONES', None, 5],
+        13: ['--', 'GANANCIA O PÉRDIDA DEL EJERCICIO', 6, 8],
+    })
+
+    resultado = extraer_hoja(hoja, ESPEC_PYG, 'BP UNO')
+
+    _comparar(resultado, _esperado([
+        ('BP UNO', ENE, '51', 'INTERESES Y DESCUENTOS GANADOS', 10.0),
+        ('BP UNO', FEB, '51', 'INTERESES Y DESCUENTOS GANADOS', 20.0),
+        ('BP UNO', ENE, 'MDI', 'Margen de Intermediación', 3.0),
+        ('BP UNO', FEB, 'MDI', 'Margen de Intermediación', 4.0),
+        ('BP UNO', FEB, '53', 'COMISIONES', 5.0),
+        ('BP UNO', ENE, 'GDE', 'GANANCIA O PÉRDIDA DEL EJERCICIO', 6.0),
+        ('BP UNO', FEB, 'GDE', 'GANANCIA O PÉRDIDA DEL EJERCICIO', 8.0),
+    ], ['banco', 'fecha', 'codigo', 'cuenta', 'valor_acumulado']))
+
+
+def test_pyg_respeta_fila_fin():
+    hoja = _hoja({
+        5: [None, None, ENE],
+        6: ['51', 'INTERESES', 10],
+        141: ['52', 'FUERA DEL RANGO', 20],
+    })
+
+    resultado = extraer_hoja(hoja, ESPEC_PYG, 'BP UNO')
+
+    assert resultado['codigo'].tolist() == ['51']
+
+
+# =============================================================================
+# CAMEL: filas fijas, coma decimal y fechas con huecos
+# =============================================================================
+
+def test_camel():
+    hoja = _hoja({
+        5: [None, None, None, ENE, None, MAR],
+        6: [None, 'SOLVENCIA', None, 0.12, 99, '13,5'],
+        7: [None, 'FILA NO DECLARADA', None, 1, 1, 1],
+        49: [None, 'ROE', None, 'n/d', 99, '1,25'],
+        54: [None, 'LIQUIDEZ', None, None, 99, 0.3],
+    })
+
+    resultado = extraer_hoja(hoja, ESPEC_CAMEL, 'BP UNO')
+
+    _comparar(resultado, _esperado([
+        ('BP UNO', ENE, 'SOL', 'Indice de Solvencia PTC/APPR', 0.12, 'C - Capital'),
+        ('BP UNO', MAR, 'SOL', 'Indice de Solvencia PTC/APPR', 13.5, 'C - Capital'),
+        ('BP UNO', MAR, 'ROE', 'Rendimiento sobre Patrimonio (ROE)', 1.25, 'E - Earnings'),
+        ('BP UNO', MAR, 'LIQ', 'Indice de Liquidez Fondos Disponibles / Total Depositos', 0.3,
+         'L - Liquidity'),
+    ], ['banco', 'fecha', 'codigo', 'indicador', 'valor', 'categoria']))
+
+
+def test_camel_hoja_corta_omite_filas_inexistentes():
+    hoja = _hoja({5: [None, None, None, ENE], 6: [None, None, None, 0.1], 10: [None, None, None, 0.2]})
+
+    resultado = extraer_hoja(hoja, ESPEC_CAMEL, 'BP UNO')
+
+    assert resultado['codigo'].tolist() == ['SOL', 'CAR_ACT']
+
+
+# =============================================================================
+# Hojas opcionales: columna 'hoja'
+# =============================================================================
+
+def test_hoja_opcional_incluye_nombre_de_hoja():
+    hoja = _hoja({5: [None, None, ENE], 7: ['1', 'INDICADOR', 0.5], 8: ['2', 'SIN VALOR', None]})
+
+    resultado = extraer_hoja(hoja, ESPEC_INDICAD, 'BP UNO')
+
+    _comparar(resultado, _esperado([
+        ('BP UNO', ENE, '1', 'INDICADOR', 0.5, 1, 'INDICAD'),
+    ], ['banco', 'fecha', 'codigo', 'cuenta', 'valor', 'nivel', 'hoja']))
+
+
+def test_hoja_sin_fechas_devuelve_vacio():
+    hoja = _hoja({5: [None, None, 'no es fecha'], 7: ['1', 'ACTIVO', 1]})
+
+    assert extraer_hoja(hoja, ESPEC_BAL, 'BP UNO').empty
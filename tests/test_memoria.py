@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Reporte de memoria: datasets, cache en memoria y en disco, contadores."""
+
+from utils.memoria import reporte_memoria, tabla_cache
+from utils.vistas import obtener_jerarquia_cuentas
+
+
+def test_reporte_incluye_contadores_de_cache(version_sintetica):
+    obtener_jerarquia_cuentas()
+    obtener_jerarquia_cuentas()
+
+    reporte = reporte_memoria()
+
+    assert reporte['errores'] == {}
+    contadores = reporte['cache']['funciones']['vistas.obtener_jerarquia_cuentas']
+    assert contadores['llamadas'] >= 2 and contadores['aciertos'] >= 1
+    assert reporte['cache']['disco']['archivos'] >= 1
+
+    tabla = tabla_cache(reporte)
+    fila = tabla[tabla['funcion'] == 'vistas.obtener_jerarquia_cuentas'].iloc[0]
+    assert fila['llamadas'] == contadores['llamadas']
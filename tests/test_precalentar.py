@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Precalentamiento: tiempos y errores por dataset, vistas por defecto."""
+
+import shutil
+
+import pandas as pd
+
+import utils.publicacion as publicacion
+from config.indicator_mapping import CODIGOS_BALANCE
+from utils import vistas
+from utils.cache import estadisticas_cache
+from utils.data_loader import cargar_indice
+from utils.precalentar import precalentar, ultimo_precalentamiento
+
+
+def test_informa_tiempo_por_dataset(version_sintetica):
+    resultado = precalentar()
+
+    assert set(resultado['datasets']) == {'balance', 'pyg', 'camel'}
+    assert all(segundos >= 0 for segundos in resultado['datasets'].values())
+    assert resultado['errores'] == {}
+    assert ultimo_precalentamiento() is resultado
+
+
+def test_informa_datasets_que_fallan(version_sintetica, tmp_path, monkeypatch):
+    # Estructura plana con solo camel
+    plano = tmp_path / 'master_data'
+    plano.mkdir()
+    shutil.copy(publicacion.directorio_servido() / 'camel.parquet', plano / 'camel.parquet')
+    monkeypatch.setattr(publicacion, 'MASTER_DATA_DIR', plano)
+
+    resultado = precalentar()
+
+    assert 'camel' in resultado['datasets']
+    assert {'datasets/balance', 'datasets/pyg'} <= set(resultado['errores'])
+
+
+def test_calienta_las_vistas_por_defecto(version_sintetica):
+    precalentar()
+    antes = estadisticas_cache()
+
+    # Lo que piden las paginas al abrirse, con los argumentos como los arman ellas
+    fecha = vistas.indice_panorama().fechas[::-1][0]
+    vistas.calcular_metricas_sistema(fecha)
+    vistas.obtener_datos_treemap_jerarquico(fecha, tipo='activos')
+    vistas.obtener_ranking_bancos(fecha, CODIGOS_BALANCE['activo_total'], 50)
+
+    indice = cargar_indice('balance')
+    codigo = next(iter(vistas.obtener_jerarquia_cuentas()))
+    inicio = pd.Timestamp(f"{max(2015, indice.fechas[0].year)}-01-01")
+    fin = pd.Timestamp(f"{indice.fechas[-1].year}-12-31")
+    vistas.obtener_datos_heatmap_mensual(codigo, None, inicio, fin)
+    vistas.obtener_serie_sistema(codigo, inicio, fin)
+    ultima = indice.fechas[-1]
+    vistas.obtener_valores_bancos_mes(codigo, pd.Timestamp(year=ultima.year, month=ultima.month, day=1))
+
+    vistas.obtener_fechas_con_12m()
+    vistas.obtener_ranking_indicador('SOL', cargar_indice('camel').fechas[::-1][0], None)
+
+    despues = estadisticas_cache()
+    for funcion, contadores in despues.items():
+        if funcion.startswith('vistas.'):
+            assert contadores['fallos'] == antes[funcion]['fallos'], funcion
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Ids de version y herencia de datasets en utils/publicacion.py."""
+
+import shutil
+from datetime import datetime
+
+import pandas.testing as tm
+
+import utils.publicacion as publicacion
+
+
+def _archivos(tmp_path):
+    archivo = tmp_path / 'camel.parquet'
+    archivo.write_bytes(b'datos')
+    return {'camel': archivo}
+
+
+def test_publicaciones_seguidas_tienen_ids_distintos(tmp_path):
+    master_dir = tmp_path / 'master_data'
+
+    primera = publicacion.publicar_version(_archivos(tmp_path), master_dir=master_dir)
+    segunda = publicacion.publicar_version(_archivos(tmp_path), master_dir=master_dir)
+
+    assert primera != segunda
+    assert publicacion.obtener_version_actual(master_dir) == segunda
+
+
+def test_reintento_en_el_mismo_instante_no_falla(tmp_path, monkeypatch):
+    class _Reloj(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2026, 2, 1, 10, 15, 0, 482913)
+
+    monkeypatch.setattr(publicacion, 'datetime', _Reloj)
+    master_dir = tmp_path / 'master_data'
+
+    primera = publicacion.publicar_version(_archivos(tmp_path), master_dir=master_dir)
+    segunda = publicacion.publicar_version(_archivos(tmp_path), master_dir=master_dir)
+
+    assert primera == segunda
+    assert primera.startswith('20260201T101500482913-')
+    assert publicacion.obtener_version_actual(master_dir) == primera
+
+
+# =============================================================================
+# Derivados de un dataset que se reemplaza
+# =============================================================================
+
+def _balance_revisado():
+    """Balance sintetico con todos los valores duplicados (mismas filas y fechas)."""
+    from conftest import datos_sinteticos
+
+    balance = datos_sinteticos()['balance']
+    balance['valor'] = balance['valor'] * 2
+    return balance
+
+
+def _manifest(master_dir):
+    return publicacion.cargar_manifest(master_dir)['datasets']
+
+
+def test_no_hereda_derivados_de_la_base_reemplazada(version_sintetica, tmp_path):
+    from utils.almacenamiento import escribir_dataset
+
+    master_dir = tmp_path / 'master_data'
+    shutil.copytree(version_sintetica, master_dir)
+    balance = escribir_dataset(_balance_revisado(), tmp_path / 'staging', 'balance')
+
+    publicacion.publicar_version({'balance': balance}, master_dir=master_dir)
+
+    datasets = _manifest(master_dir)
+    assert 'cubo_balance' not in datasets
+    assert 'series_balance' not in datasets
+    assert 'cubo_pyg' in datasets
+    assert 'series_pyg' in datasets
+    # Las claves del modelo dimensional se comparten entre balance y pyg
+    for nombre in ('dim_banco', 'dim_cuenta', 'dim_periodo', 'hechos_balance', 'hechos_pyg'):
+        assert nombre not in datasets
+
+
+def test_preparar_dataset_republica_los_derivados(version_sintetica, tmp_path):
+    from utils.cubo import CuboDatos
+    from utils.preparacion import preparar_dataset
+    from utils.series import leer_series
+
+    master_dir = tmp_path / 'master_data'
+    shutil.copytree(version_sintetica, master_dir)
+    publicado, archivos = preparar_dataset(_balance_revisado(), 'balance', tmp_path / 'staging')
+
+    version = publicacion.publicar_version(archivos, master_dir=master_dir)
+
+    datasets = _manifest(master_dir)
+    assert datasets['cubo_balance']['version_origen'] == version
+    assert datasets['series_balance']['version_origen'] == version
+    directorio = publicacion.obtener_directorio_datos(master_dir)
+    fila = publicado.iloc[0]
+    cubo = CuboDatos.abrir(directorio, 'balance')
+    assert cubo.valor(fila['banco'], fila['codigo'], fila['fecha']) == fila['valor']
+    serie = leer_series(directorio, 'balance', codigos=[fila['codigo']], bancos=[fila['banco']])
+    assert serie.loc[serie['fecha'] == fila['fecha'], 'valor'].item() == fila['valor']
+
+
+def test_modelo_dimensional_con_el_pyg_vigente(version_sintetica, tmp_path):
+    from utils.almacenamiento import leer_dataset
+    from utils.dimensional import DIMENSIONES, rehidratar
+    from utils.preparacion import completar_planos, preparar_dataset, preparar_modelo_dimensional
+
+    master_dir = tmp_path / 'master_data'
+    shutil.copytree(version_sintetica, master_dir)
+    staging = tmp_path / 'staging'
+    publicado, archivos = preparar_dataset(_balance_revisado(), 'balance', staging)
+    planos = completar_planos({'balance': publicado}, publicacion.obtener_directorio_datos(master_dir))
+    archivos.update(preparar_modelo_dimensional(planos, staging))
+
+    version = publicacion.publicar_version(archivos, master_dir=master_dir)
+
+    assert _manifest(master_dir)['hechos_balance']['version_origen'] == version
+    directorio = publicacion.obtener_directorio_datos(master_dir)
+    dimensiones = {n: leer_dataset(directorio, n) for n in DIMENSIONES}
+    for dataset, valor in (('balance', 'valor'), ('pyg', 'valor_mes')):
+        hechos = leer_dataset(directorio, f"hechos_{dataset}")
+        esperado = leer_dataset(directorio, dataset)
+        filas = rehidratar(hechos, dimensiones, ['banco', 'codigo', 'fecha'])
+        filas[valor] = hechos[valor]
+        combinado = filas.merge(esperado, on=['banco', 'codigo', 'fecha'], suffixes=('', '_plano'))
+        assert len(combinado) == len(filas) == len(esperado)
+        tm.assert_series_equal(combinado[valor], combinado[f"{valor}_plano"], check_names=False)
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+Escritura y lectura de datasets parquet.
+
+Balance y PYG se escriben como datasets particionados estilo hive por año
+(opcionalmente tambien por banco):
+
+    balance/
+    ├── ano=2003/part-0.parquet
+    ├── ano=2004/part-0.parquet
+    └── ...
+
+Al leer con filtro de años o bancos solo se abren los archivos de esas
+particiones. Los datasets sin particionar siguen siendo un unico
+<nombre>.parquet y se leen con la misma funcion.
+
+Todos los datasets se escriben ordenados por (codigo, fecha, banco), con
+compresion zstd, row groups de FILAS_POR_ROW_GROUP filas y diccionario en
+las columnas de texto repetitivas. Con ese orden las estadisticas min/max de
+cada row group permiten saltar los que no contienen el codigo buscado.
+
+Punto fijo: las columnas monetarias (miles de USD) pueden guardarse como
+int64 escalado (valor * escala). Al escribir se elige la menor escala de
+ESCALAS_PUNTO_FIJO que reproduce exactamente cada valor; si ninguna lo hace
+la columna queda en float64. La escala se guarda en los metadatos del
+esquema y leer_dataset() devuelve por defecto la vista float.
+"""
+
+import json
+import math
+import shutil
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .periodos import COLUMNA_PERIODO, ano_periodo, como_periodo, periodo_a_fecha
+
+COLUMNA_ANO = 'ano'
+
+# Columnas de particion por dataset (los demas se guardan en un solo archivo)
+PARTICIONES = {
+    'balance': (COLUMNA_ANO,),
+    'pyg': (COLUMNA_ANO,),
+}
+
+
+# Formato de escritura
+ORDEN_ESCRITURA = ('codigo', 'fecha', 'banco')
+COMPRESION = 'zstd'
+FILAS_POR_ROW_GROUP = 64_000
+COLUMNAS_DICCIONARIO = ('banco', 'codigo', 'cuenta', 'indicador', 'categoria', 'hoja')
+
+
+# Punto fijo
+ESCALAS_PUNTO_FIJO = (100, 10_000, 1_000_000)
+METADATA_PUNTO_FIJO = b'punto_fijo'
+COLUMNAS_MONETARIAS = {
+    'balance': ('valor',),
+    'pyg': ('valor_acumulado', 'valor_mes', 'valor_12m'),
+    'hechos_balance': ('valor',),
+    'hechos_pyg': ('valor_acumulado', 'valor_mes', 'valor_12m'),
+}
+
+# Limite para que el entero escalado sea exacto tambien como float64
+_MAXIMO_EXACTO = 2 ** 53
+
+
+def escala_punto_fijo(valores: pd.Series) -> Optional[int]:
+    """
+    Menor escala de ESCALAS_PUNTO_FIJO con la que round(v * escala) / escala
+    reproduce exactamente todos los valores, o None si ninguna sirve.
+    """
+    datos = pd.to_numeric(valores, errors='coerce').to_numpy(dtype='float64')
+    datos = datos[~np.isnan(datos)]
+    if not np.isfinite(datos).all():
+        return None
+    for escala in ESCALAS_PUNTO_FIJO:
+        escalados = np.round(datos * escala)
+        if (np.abs(escalados) < _MAXIMO_EXACTO).all() and (escalados / escala == datos).all():
+            return escala
+    return None
+
+
+def codificar_punto_fijo(valores: pd.Series, escala: int) -> pd.Series:
+    """float -> Int64 escalado (los NaN quedan como nulos)."""
+    datos = np.round(valores.to_numpy(dtype='float64') * escala)
+    nulos = np.isnan(datos)
+    return pd.Series(
+        pd.arrays.IntegerArray(np.where(nulos, 0, datos).astype('int64'), nulos),
+        index=valores.index,
+    )
+
+
+def decodificar_punto_fijo(valores: pd.Series, escala: int) -> pd.Series:
+    """
+    Int64 escalado -> float64 (nulos como NaN).
+
+    El arreglo queda de solo lectura, igual que las columnas que arrow
+    convierte sin copiar: los datasets cargados se comparten entre sesiones.
+    """
+    datos = valores.to_numpy(dtype='float64', na_value=np.nan) / escala
+    datos.flags.writeable = False
+    return pd.Series(datos, index=valores.index, copy=False)
+
+
+def sumar_exacto(df: pd.DataFrame, columna: str, por: Optional[str] = None,
+                 escala: Optional[int] = None):
+    """
+    Suma de una columna sin error de redondeo acumulado.
+
+    Con escala de punto fijo (`escala`, o df.attrs['escalas'] de
+    leer_dataset(..., punto_fijo=True)) suma los enteros escalados y divide
+    una sola vez; la vista float64 se vuelve a escalar, exacta porque la
+    escala se verifico al escribir. Sin escala usa math.fsum.
+
+    Con `por` suma por grupo y devuelve una Series indexada por `por`.
+    """
+    escala = escala or df.attrs.get('escalas', {}).get(columna)
+    valores = df[columna]
+    if escala:
+        if pd.api.types.is_float_dtype(valores.dtype):
+            valores = codificar_punto_fijo(valores, escala)
+        if por is None:
+            return int(valores.sum()) / escala
+        sumas = valores.groupby(df[por], observed=True).sum()
+        return (sumas.astype('int64') / escala).rename(columna)
+    if por is None:
+        return math.fsum(valores.dropna())
+    return valores.groupby(df[por], observed=True).agg(lambda g: math.fsum(g.dropna()))
+
+
+def columnas_particion(nombre: str, por_banco: bool = False) -> Tuple[str, ...]:
+    """Columnas de particion de un dataset (agrega 'banco' si por_banco)."""
+    columnas = PARTICIONES.get(nombre, ())
+    if por_banco and columnas:
+        columnas = columnas + ('banco',)
+    return columnas
+
+
+def ruta_dataset(directorio: Path, nombre: str) -> Path:
+    """Directorio particionado <nombre>/ si existe, si no <nombre>.parquet."""
+    particionado = Path(directorio) / nombre
+    if particionado.is_dir():
+        return particionado
+    return Path(directorio) / f"{nombre}.parquet"
+
+
+def escribir_dataset(
+    df: pd.DataFrame,
+    directorio: Path,
+    nombre: str,
+    particiones: Sequence[str] = (),
+    orden: Sequence[str] = ORDEN_ESCRITURA,
+    punto_fijo: bool = False,
+    metadata: Optional[Dict[bytes, bytes]] = None,
+    filas_por_row_group: int = FILAS_POR_ROW_GROUP,
+) -> Path:
+    """
+    Escribe un dataset como archivo unico o particionado por `particiones`.
+
+    Args:
+        df: Datos (con columna 'fecha' si se particiona por año)
+        directorio: Carpeta de destino
+        nombre: Nombre del dataset
+        particiones: Columnas de particion (COLUMNA_ANO se deriva de 'fecha')
+        orden: Columnas por las que se ordenan las filas (las que existan)
+        punto_fijo: Guardar COLUMNAS_MONETARIAS[nombre] como int64 escalado
+            cuando la conversion es exacta
+        metadata: Claves adicionales para los metadatos del esquema
+            (ver leer_metadata)
+        filas_por_row_group: Filas por row group (menos para filas anchas)
+
+    Returns:
+        Ruta escrita (archivo o directorio)
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    archivo = directorio / f"{nombre}.parquet"
+    carpeta = directorio / nombre
+    for anterior in (archivo, carpeta):
+        if anterior.is_dir():
+            shutil.rmtree(anterior)
+        elif anterior.exists():
+            anterior.unlink()
+
+    orden = [c for c in orden if c in df.columns]
+    df = df.sort_values(orden, kind='stable', ignore_index=True) if orden else df.reset_index(drop=True)
+    diccionario = [c for c in COLUMNAS_DICCIONARIO if c in df.columns and c not in particiones]
+
+    escalas = {}
+    if punto_fijo:
+        for columna in COLUMNAS_MONETARIAS.get(nombre, ()):
+            if columna not in df.columns:
+                continue
+            escala = escala_punto_fijo(df[columna])
+            if escala is None:
+                print(f"  [AVISO] {nombre}.{columna}: sin escala exacta, se guarda como float64")
+                continue
+            df[columna] = codificar_punto_fijo(df[columna], escala)
+            escalas[columna] = escala
+
+    if not particiones:
+        pq.write_table(
+            _con_metadata(pa.Table.from_pandas(df, preserve_index=False), escalas, metadata),
+            archivo,
+            compression=COMPRESION,
+            use_dictionary=diccionario,
+            row_group_size=filas_por_row_group,
+        )
+        return archivo
+
+    if COLUMNA_ANO in particiones:
+        df[COLUMNA_ANO] = df['fecha'].dt.year.astype('int16')
+    for columna in particiones:
+        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype(str)
+
+    tabla = _con_metadata(pa.Table.from_pandas(df, preserve_index=False), escalas, metadata)
+    formato = ds.ParquetFileFormat()
+    ds.write_dataset(
+        tabla,
+        carpeta,
+        format=formato,
+        file_options=formato.make_write_options(compression=COMPRESION, use_dictionary=diccionario),
+        partitioning=ds.partitioning(tabla.select(list(particiones)).schema, flavor='hive'),
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='error',
+        max_rows_per_group=filas_por_row_group,
+        min_rows_per_group=filas_por_row_group,
+    )
+    return carpeta
+
+
+def _con_metadata(tabla: pa.Table, escalas: Dict[str, int], extra: Optional[Dict[bytes, bytes]]) -> pa.Table:
+    if not escalas and not extra:
+        return tabla
+    metadata = dict(tabla.schema.metadata or {})
+    if escalas:
+        metadata[METADATA_PUNTO_FIJO] = json.dumps(escalas).encode()
+    metadata.update(extra or {})
+    return tabla.replace_schema_metadata(metadata)
+
+
+def leer_metadata(directorio: Path, nombre: str) -> Dict[bytes, bytes]:
+    """
+    Metadatos del esquema de un dataset (sin leer los datos).
+
+    Raises:
+        FileNotFoundError: si el dataset no existe
+    """
+    ruta = ruta_dataset(directorio, nombre)
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontro {ruta}")
+    return dict(ds.dataset(ruta, format='parquet', partitioning='hive').schema.metadata or {})
+
+
+def tamano_dataset(ruta: Path) -> int:
+    """Bytes en disco de un archivo o de un dataset particionado."""
+    ruta = Path(ruta)
+    if ruta.is_file():
+        return ruta.stat().st_size
+    return sum(p.stat().st_size for p in ruta.rglob('*') if p.is_file())
+
+
+def _filtro_anos(campos: Sequence[str], anos: Sequence[int]) -> ds.Expression:
+    if COLUMNA_ANO in campos:
+        return ds.field(COLUMNA_ANO).isin([int(a) for a in anos])
+    # Archivo sin particionar: rango de fechas por año
+    filtro = None
+    for ano in sorted(set(int(a) for a in anos)):
+        rango = ((ds.field('fecha') >= pd.Timestamp(ano, 1, 1).to_pydatetime()) &
+                 (ds.field('fecha') < pd.Timestamp(ano + 1, 1, 1).to_pydatetime()))
+        filtro = rango if filtro is None else filtro | rango
+    return filtro
+
+
+def _filtro_periodos(campos: Sequence[str], esquema: pa.Schema, desde, hasta) -> ds.Expression:
+    """Rango de meses [desde, hasta] (fechas o periodos enteros)."""
+    inicio = como_periodo(desde) if desde is not None else None
+    fin = como_periodo(hasta) if hasta is not None else None
+
+    filtro = None
+    if COLUMNA_PERIODO in esquema.names:
+        if inicio is not None:
+            filtro = ds.field(COLUMNA_PERIODO) >= inicio
+        if fin is not None:
+            tope = ds.field(COLUMNA_PERIODO) <= fin
+            filtro = tope if filtro is None else filtro & tope
+    else:
+        # Datos sin clave de periodo: mismo rango sobre la fecha (mes completo)
+        if inicio is not None:
+            primer_dia = periodo_a_fecha(inicio).replace(day=1)
+            filtro = ds.field('fecha') >= primer_dia.to_pydatetime()
+        if fin is not None:
+            tope = ds.field('fecha') < (periodo_a_fecha(fin) + pd.Timedelta(days=1)).to_pydatetime()
+            filtro = tope if filtro is None else filtro & tope
+
+    # La particion por año descarta archivos completos
+    if COLUMNA_ANO in campos:
+        if inicio is not None:
+            particion = ds.field(COLUMNA_ANO) >= int(ano_periodo(inicio))
+            filtro = particion if filtro is None else filtro & particion
+        if fin is not None:
+            particion = ds.field(COLUMNA_ANO) <= int(ano_periodo(fin))
+            filtro = particion if filtro is None else filtro & particion
+    return filtro
+
+
+def leer_dataset(
+    directorio: Path,
+    nombre: str,
+    anos: Optional[Sequence[int]] = None,
+    bancos: Optional[Sequence[str]] = None,
+    filtro: Optional[ds.Expression] = None,
+    punto_fijo: bool = False,
+    columnas: Optional[Sequence[str]] = None,
+    codigos: Optional[Sequence[str]] = None,
+    desde=None,
+    hasta=None,
+) -> pd.DataFrame:
+    """
+    Lee un dataset (particionado o no) aplicando filtros de año y banco.
+
+    `filtro` admite una expresion pyarrow adicional (por ejemplo sobre las
+    claves enteras de las tablas de hechos).
+
+    `columnas` limita las columnas leidas (las que no existan se ignoran);
+    `codigos` y el rango `desde`/`hasta` (fechas o periodos enteros,
+    inclusive) se aplican en el lector igual que año y banco.
+
+    Las columnas guardadas en punto fijo se devuelven como float64, salvo con
+    punto_fijo=True: entonces quedan como Int64 escalado y las escalas se
+    informan en df.attrs['escalas'] (ver sumar_exacto).
+
+    En datasets particionados los filtros descartan archivos completos antes
+    de leerlos; en archivos unicos se aplican sobre las estadisticas de cada
+    row group.
+
+    Raises:
+        FileNotFoundError: si el dataset no existe
+    """
+    dataset, filtro, campos_particion = _abrir_dataset(
+        directorio, nombre, anos, bancos, filtro, codigos, desde, hasta)
+
+    if columnas is not None:
+        columnas = [c for c in columnas if c in dataset.schema.names]
+    # Un solo bloque por columna: pandas usa la memoria de arrow sin copiarla
+    # (de solo lectura) y self_destruct libera lo que si convierte, de modo
+    # que el pico de memoria no duplica la tabla
+    tabla = dataset.to_table(columns=columnas, filter=filtro).combine_chunks()
+    df = tabla.to_pandas(split_blocks=True, self_destruct=True)
+    del tabla
+
+    escalas = _escalas(dataset)
+    if punto_fijo:
+        df.attrs['escalas'] = escalas
+    else:
+        for columna, escala in escalas.items():
+            if columna in df.columns:
+                df[columna] = decodificar_punto_fijo(df[columna], escala)
+
+    if COLUMNA_ANO in df.columns and COLUMNA_ANO in campos_particion:
+        df = df.drop(columns=[COLUMNA_ANO])
+    if 'banco' in campos_particion and 'banco' in df.columns:
+        df['banco'] = df['banco'].astype(str)
+        df = df[['banco'] + [c for c in df.columns if c != 'banco']]
+    return df
+
+
+def leer_tabla(
+    directorio: Path,
+    nombre: str,
+    columnas: Optional[Sequence[str]] = None,
+    codigos: Optional[Sequence[str]] = None,
+    desde=None,
+    hasta=None,
+    filtro: Optional[ds.Expression] = None,
+) -> pa.Table:
+    """
+    Como leer_dataset() pero devuelve la tabla arrow, sin pasar por pandas.
+
+    Los filtros y la proyeccion se aplican en el lector (multihilo); las
+    columnas en punto fijo se devuelven como float64, igual que leer_dataset().
+    Lo usa el motor de consultas arrow (utils/consultas.py).
+
+    Raises:
+        FileNotFoundError: si el dataset no existe
+    """
+    dataset, filtro, campos_particion = _abrir_dataset(
+        directorio, nombre, None, None, filtro, codigos, desde, hasta)
+
+    if columnas is not None:
+        columnas = [c for c in columnas if c in dataset.schema.names]
+    # Sin los metadatos de pandas: describen las columnas en punto fijo como
+    # Int64 y to_pandas() intentaria volver a convertirlas
+    tabla = dataset.to_table(columns=columnas, filter=filtro).replace_schema_metadata(None)
+
+    for columna, escala in _escalas(dataset).items():
+        if columna in tabla.column_names:
+            decodificada = pc.divide(pc.cast(tabla[columna], pa.float64()), float(escala))
+            tabla = tabla.set_column(tabla.schema.get_field_index(columna), columna, decodificada)
+    if COLUMNA_ANO in tabla.column_names and COLUMNA_ANO in campos_particion:
+        tabla = tabla.drop_columns([COLUMNA_ANO])
+    # Columnas de particion y de texto con diccionario: como texto plano,
+    # igual que las entrega leer_dataset()
+    for i, campo in enumerate(tabla.schema):
+        if pa.types.is_dictionary(campo.type):
+            tabla = tabla.set_column(i, campo.name, pc.cast(tabla[campo.name], campo.type.value_type))
+    return tabla
+
+
+def escalas_dataset(directorio: Path, nombre: str) -> Dict[str, int]:
+    """
+    Escalas de punto fijo de un dataset (columna -> escala; vacio si se
+    guardo en float64).
+
+    Raises:
+        FileNotFoundError: si el dataset no existe
+    """
+    ruta = ruta_dataset(directorio, nombre)
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontro {ruta}")
+    return _escalas(ds.dataset(ruta, format='parquet', partitioning='hive'))
+
+
+def _escalas(dataset: ds.Dataset) -> Dict[str, int]:
+    """Escalas de punto fijo guardadas en el esquema (columna -> escala)."""
+    metadata = dataset.schema.metadata or {}
+    return json.loads(metadata[METADATA_PUNTO_FIJO]) if METADATA_PUNTO_FIJO in metadata else {}
+
+
+def _abrir_dataset(directorio, nombre, anos, bancos, filtro, codigos, desde, hasta):
+    """Dataset arrow, filtro combinado y columnas de particion."""
+    ruta = ruta_dataset(directorio, nombre)
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontro {ruta}")
+
+    dataset = ds.dataset(ruta, format='parquet', partitioning='hive')
+    particion = getattr(dataset, 'partitioning', None) if ruta.is_dir() else None
+    campos_particion = particion.schema.names if particion is not None else []
+
+    if anos:
+        por_ano = _filtro_anos(campos_particion, anos)
+        filtro = por_ano if filtro is None else filtro & por_ano
+    if bancos:
+        por_banco = ds.field('banco').isin(list(bancos))
+        filtro = por_banco if filtro is None else filtro & por_banco
+    if codigos is not None:
+        por_codigo = ds.field('codigo').isin([str(c) for c in codigos])
+        filtro = por_codigo if filtro is None else filtro & por_codigo
+    if desde is not None or hasta is not None:
+        por_periodo = _filtro_periodos(campos_particion, dataset.schema, desde, hasta)
+        filtro = por_periodo if filtro is None else filtro & por_periodo
+    return dataset, filtro, campos_particion
@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de cargadores invalidada por la huella de los datos publicados.
+
+Los cargadores se cachean sin TTL: la clave incluye huella_servida() (el id
+de la version publicada que se esta atendiendo), de modo que los datos se
+releen apenas se publica una version nueva y nunca mientras no cambien.
+
+    @cache_por_huella()
+    def obtener_ranking_bancos(fecha, codigo): ...
+
+    @cache_por_huella(recurso=True)
+    def cargar_cubo(dataset): ...
+
+La clave son la huella y argumentos escalares, nunca un DataFrame: calcularla
+cuesta un stat de master_data/CURRENT mas serializar los argumentos, unos
+microsegundos por llamada (ver huella_vigente en utils/publicacion.py).
+
+Al cambiar de version, descartar_huella() libera lo cacheado en memoria con
+la huella anterior (ver utils/recarga.py).
+
+Resultados copiados (por defecto): los guarda POLITICA, un LRU unico para
+todo el proceso. Cada resultado se guarda serializado (pickle), de modo que
+cada acierto devuelve una copia nueva como st.cache_data y el tamaño de cada
+entrada se conoce exacto. La politica aplica un limite de entradas por
+funcion (max_entradas) y un presupuesto global de memoria (PRESUPUESTO_MB):
+al pasarse, desaloja primero lo usado hace mas tiempo. Lleva contadores de
+llamadas, aciertos, fallos, lecturas de disco y desalojos por funcion
+(estadisticas_cache()).
+
+Objetos compartidos (recurso=True): st.cache_resource, una instancia por
+version y proceso (datasets, indices, cubos). No se copian ni se cuentan en
+el presupuesto; solo llevan contadores de llamadas y fallos.
+
+Con disco=True el resultado tambien se guarda en DIRECTORIO_CACHE_DISCO (un
+pickle por funcion, version y argumentos). Un reinicio u otro proceso del
+servidor lo lee de ahi en lugar de recalcularlo. La carpeta de cada funcion
+lleva un hash de su codigo, de los fuentes de utils/ y config/ y de las
+versiones de numpy, pandas y pyarrow (huella_codigo): un deploy con otro
+codigo o librerias no lee resultados viejos, y la primera llamada borra las
+carpetas de la funcion con otro hash. El directorio se poda por tamaño
+(MAX_MB_DISCO), borrando primero las entradas usadas hace mas tiempo.
+Se usa para los calculos caros de las paginas (heatmaps, jerarquias,
+rankings); los cargadores no lo necesitan porque leen parquet.
+"""
+
+import functools
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import sys
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import streamlit as st
+
+from .publicacion import huella_servida
+
+# Entradas por funcion: acota lo que queda de versiones ya reemplazadas
+MAX_ENTRADAS = 64
+
+# Memoria total para resultados copiados de todas las funciones
+PRESUPUESTO_MB = 256
+
+DIRECTORIO_CACHE_DISCO = Path(__file__).parent.parent / '.cache' / 'calculos'
+MAX_MB_DISCO = 512
+
+# Entran en el hash de las carpetas de la cache en disco (ver huella_codigo)
+CARPETAS_CODIGO = ('utils', 'config')
+LIBRERIAS_CACHE = ('numpy', 'pandas', 'pyarrow')
+
+# Carpetas de la cache en disco ya revisadas por _descartar_carpetas_viejas
+_carpetas_revisadas = set()
+
+
+# =============================================================================
+# POLITICA EN MEMORIA
+# =============================================================================
+
+class PoliticaCache:
+    """
+    LRU global de resultados serializados con limite por funcion y
+    presupuesto de bytes compartido.
+    """
+
+    def __init__(self, presupuesto_bytes: int):
+        self.presupuesto_bytes = presupuesto_bytes
+        self._entradas: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+        self._huellas: Dict[Tuple[str, str], Optional[str]] = {}
+        self._limites: Dict[str, int] = {}
+        self._por_funcion = Counter()
+        self._contadores = defaultdict(Counter)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, funcion: str, max_entradas: Optional[int]) -> None:
+        with self._lock:
+            self._limites[funcion] = max_entradas
+            self._contadores[funcion].update({})
+
+    def contar(self, funcion: str, evento: str) -> None:
+        with self._lock:
+            self._contadores[funcion][evento] += 1
+
+    def obtener(self, funcion: str, clave: str) -> Optional[bytes]:
+        """Resultado serializado (y lo marca como recien usado) o None."""
+        with self._lock:
+            datos = self._entradas.get((funcion, clave))
+            self._contadores[funcion]['aciertos' if datos is not None else 'fallos'] += 1
+            if datos is not None:
+                self._entradas.move_to_end((funcion, clave))
+            return datos
+
+    def guardar(self, funcion: str, clave: str, datos: bytes, huella: Optional[str] = None) -> None:
+        with self._lock:
+            if len(datos) > self.presupuesto_bytes:
+                # Mas grande que todo el presupuesto: no se guarda
+                self._contadores[funcion]['rechazos'] += 1
+                return
+            if (funcion, clave) in self._entradas:
+                self._quitar((funcion, clave))
+            self._entradas[(funcion, clave)] = datos
+            self._huellas[(funcion, clave)] = huella
+            self._por_funcion[funcion] += 1
+            self._bytes += len(datos)
+
+            limite = self._limites.get(funcion)
+            if limite is not None and self._por_funcion[funcion] > limite:
+                # La mas vieja de esta funcion (el orden del dict es de uso)
+                self._desalojar(next(k for k in self._entradas if k[0] == funcion))
+            while self._bytes > self.presupuesto_bytes:
+                self._desalojar(next(iter(self._entradas)))
+
+    def limpiar(self, funcion: Optional[str] = None, huella: Optional[str] = None) -> int:
+        """
+        Vacia las entradas de una funcion y/o de una huella (sin filtros,
+        todas); los contadores siguen. Devuelve cuantas quito.
+        """
+        with self._lock:
+            claves = [k for k in self._entradas
+                      if (funcion is None or k[0] == funcion)
+                      and (huella is None or self._huellas[k] == huella)]
+            for clave in claves:
+                self._quitar(clave)
+            return len(claves)
+
+    def estadisticas(self) -> Dict[str, Dict[str, int]]:
+        """Contadores, entradas y bytes por funcion."""
+        with self._lock:
+            bytes_por_funcion = Counter()
+            for (funcion, _), datos in self._entradas.items():
+                bytes_por_funcion[funcion] += len(datos)
+            return {
+                funcion: {
+                    'llamadas': contadores['llamadas'],
+                    'aciertos': contadores['aciertos'],
+                    'fallos': contadores['fallos'],
+                    'disco': contadores['disco'],
+                    'desalojos': contadores['desalojos'],
+                    'rechazos': contadores['rechazos'],
+                    'entradas': self._por_funcion[funcion],
+                    'max_entradas': self._limites.get(funcion),
+                    'bytes': bytes_por_funcion[funcion],
+                }
+                for funcion, contadores in self._contadores.items()
+            }
+
+    @property
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def _quitar(self, clave: Tuple[str, str]) -> None:
+        datos = self._entradas.pop(clave)
+        del self._huellas[clave]
+        self._por_funcion[clave[0]] -= 1
+        self._bytes -= len(datos)
+
+    def _desalojar(self, clave: Tuple[str, str]) -> None:
+        self._quitar(clave)
+        self._contadores[clave[0]]['desalojos'] += 1
+
+
+POLITICA = PoliticaCache(PRESUPUESTO_MB * 1024 ** 2)
+
+
+def estadisticas_cache() -> Dict[str, Dict[str, int]]:
+    """
+    Contadores por funcion cacheada (nombre: archivo.funcion).
+
+    En funciones recurso=True los aciertos se calculan como llamadas -
+    fallos; entradas y bytes quedan en 0 porque viven en st.cache_resource.
+    """
+    estadisticas = POLITICA.estadisticas()
+    for valores in estadisticas.values():
+        if valores['max_entradas'] is None:
+            valores['aciertos'] = valores['llamadas'] - valores['fallos']
+    return estadisticas
+
+
+# =============================================================================
+# CACHE EN DISCO
+# =============================================================================
+
+def _nombre_funcion(func: Callable) -> str:
+    """Archivo y nombre de la funcion (clave de contadores y entradas)."""
+    return f"{Path(func.__code__.co_filename).stem}.{func.__qualname__}"
+
+
+@functools.lru_cache(maxsize=None)
+def huella_codigo() -> str:
+    """
+    Hash de los fuentes de CARPETAS_CODIGO y de las versiones de Python y
+    LIBRERIAS_CACHE. Lo que calculan las funciones cacheadas depende de los
+    helpers que llaman (consultas, cubos, series, mapeos de config) y de la
+    version de pandas con que se serializo: cambiar cualquiera invalida la
+    cache en disco, no solo cambiar la funcion decorada.
+    """
+    h = hashlib.sha1(sys.version.encode())
+    raiz = Path(__file__).parent.parent
+    for carpeta in CARPETAS_CODIGO:
+        for ruta in sorted((raiz / carpeta).rglob('*.py')):
+            h.update(ruta.relative_to(raiz).as_posix().encode())
+            h.update(ruta.read_bytes())
+    for libreria in LIBRERIAS_CACHE:
+        try:
+            h.update(f"{libreria}=={version(libreria)}".encode())
+        except PackageNotFoundError:
+            h.update(f"{libreria}==".encode())
+    return h.hexdigest()
+
+
+def _hash_codigo(func: Callable) -> str:
+    """Hash del codigo fuente de func y de huella_codigo()."""
+    try:
+        fuente = inspect.getsource(func)
+    except (OSError, TypeError):
+        fuente = ''
+    return hashlib.sha1(f"{huella_codigo()}:{fuente}".encode()).hexdigest()[:12]
+
+
+def _descartar_carpetas_viejas(carpeta: Path) -> int:
+    """
+    Borra las carpetas de la misma funcion con otro hash (codigo o librerias
+    anteriores): nunca se van a volver a leer.
+
+    Returns:
+        Carpetas borradas
+    """
+    nombre = carpeta.name.rsplit('-', 1)[0]
+    viejas = [c for c in carpeta.parent.glob(f"{glob.escape(nombre)}-*")
+              if c != carpeta and c.name.rsplit('-', 1)[0] == nombre and c.is_dir()]
+    for vieja in viejas:
+        shutil.rmtree(vieja, ignore_errors=True)
+    return len(viejas)
+
+
+def _leer_disco(ruta: Path) -> Optional[bytes]:
+    try:
+        with open(ruta, 'rb') as f:
+            datos = f.read()
+    except FileNotFoundError:
+        return None
+    os.utime(ruta)  # la fecha de modificacion marca el ultimo uso
+    return datos
+
+
+def _escribir_disco(ruta: Path, datos: bytes, max_bytes: int) -> None:
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atomica: otro proceso nunca lee un pickle a medias
+    temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temporal, 'wb') as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+    podar_cache_disco(max_bytes, ruta.parent.parent)
+
+
+def uso_cache_disco(directorio: Optional[Path] = None) -> Dict[str, int]:
+    """Archivos y bytes de la cache en disco (DIRECTORIO_CACHE_DISCO si es None)."""
+    tamanos = []
+    for ruta in Path(directorio or DIRECTORIO_CACHE_DISCO).glob('*/*.pkl'):
+        try:
+            tamanos.append(ruta.stat().st_size)
+        except FileNotFoundError:
+            continue
+    return {'archivos': len(tamanos), 'bytes': sum(tamanos), 'max_bytes': MAX_MB_DISCO * 1024 ** 2}
+
+
+@st.cache_resource(show_spinner=False)
+def podar_cache_disco_al_iniciar() -> int:
+    """
+    podar_cache_disco() una vez por proceso (st.cache_resource): lo que
+    dejaron procesos anteriores, incluidas carpetas de funciones que ya no
+    existen, vuelve a quedar bajo MAX_MB_DISCO sin esperar a la primera
+    escritura.
+    """
+    liberados = podar_cache_disco()
+    if liberados:
+        print(f"[OK] Cache en disco podada al iniciar: {liberados / 1024 ** 2:.1f} MB liberados")
+    return liberados
+
+
+def podar_cache_disco(max_bytes: int = MAX_MB_DISCO * 1024 ** 2,
+                      directorio: Optional[Path] = None) -> int:
+    """
+    Borra las entradas usadas hace mas tiempo hasta que el directorio quede
+    bajo max_bytes.
+
+    Args:
+        max_bytes: Tamaño maximo del directorio
+        directorio: Directorio de la cache (DIRECTORIO_CACHE_DISCO si es None)
+
+    Returns:
+        Bytes liberados
+    """
+    entradas = []
+    for ruta in Path(directorio or DIRECTORIO_CACHE_DISCO).glob('*/*.pkl'):
+        try:
+            info = ruta.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    liberados = 0
+    for _, tamano, ruta in sorted(entradas, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        ruta.unlink(missing_ok=True)
+        total -= tamano
+        liberados += tamano
+    return liberados
+
+
+# =============================================================================
+# DECORADOR
+# =============================================================================
+
+def _clave(huella: str, firma: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """
+    Hash de la huella y los argumentos por nombre, con los valores por
+    defecto completos: f(x, 50), f(x, top_n=50) y (si 50 es el defecto)
+    f(x) comparten la entrada, asi lo que calcula precalentar() sirve a la
+    pagina aunque la llame de otra forma.
+    """
+    llamada = firma.bind(*args, **kwargs)
+    llamada.apply_defaults()
+    return hashlib.sha256(pickle.dumps((huella, sorted(llamada.arguments.items())))).hexdigest()
+
+
+def _cache_copiado(func: Callable, nombre: str, disco: bool, max_mb: int) -> Callable:
+    """Resultados serializados en POLITICA (y en disco si disco=True)."""
+    codigo = _hash_codigo(func)
+    firma = inspect.signature(func)
+    max_bytes = max_mb * 1024 ** 2
+
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        POLITICA.contar(nombre, 'llamadas')
+        huella = huella_servida()
+        # Se resuelve en cada llamada: las pruebas apuntan DIRECTORIO_CACHE_DISCO a otro lado
+        carpeta = Path(DIRECTORIO_CACHE_DISCO) / f"{nombre}-{codigo}" if disco else None
+        if carpeta is not None and carpeta not in _carpetas_revisadas:
+            _carpetas_revisadas.add(carpeta)
+            _descartar_carpetas_viejas(carpeta)
+        try:
+            clave = _clave(f"{huella}:{codigo}", firma, args, kwargs)
+        except Exception:
+            # Argumentos que no se pueden serializar (o que no encajan con
+            # la firma, func dara el error): sin cache
+            return func(*args, **kwargs)
+
+        datos = POLITICA.obtener(nombre, clave)
+        if datos is None and carpeta is not None:
+            datos = _leer_disco(carpeta / f"{clave}.pkl")
+            if datos is not None:
+                POLITICA.contar(nombre, 'disco')
+                POLITICA.guardar(nombre, clave, datos, huella)
+        if datos is not None:
+            try:
+                return pickle.loads(datos)
+            except Exception:
+                # Entrada truncada o de otra version de pandas: se recalcula
+                if carpeta is not None:
+                    (carpeta / f"{clave}.pkl").unlink(missing_ok=True)
+
+        valor = func(*args, **kwargs)
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        POLITICA.guardar(nombre, clave, datos, huella)
+        if carpeta is not None:
+            try:
+                _escribir_disco(carpeta / f"{clave}.pkl", datos, max_bytes)
+            except OSError as e:
+                # Disco lleno o carpeta borrada por otro proceso: queda en memoria
+                print(f"[AVISO] Cache en disco de {nombre}: {e}")
+        return valor
+
+    envoltura.clear = lambda: POLITICA.limpiar(nombre)
+    return envoltura
+
+
+# huella -> llamadas cacheadas en st.cache_resource con esa huella, para
+# poder quitarlas una a una (clear(*args) solo borra esa clave)
+_compartidas = defaultdict(list)
+_lock_compartidas = threading.Lock()
+
+
+def descartar_huella(huella: str) -> int:
+    """
+    Quita de memoria todo lo cacheado con `huella`: entradas de POLITICA y
+    objetos de st.cache_resource (datasets, indices, cubos). Lo cacheado
+    con otras huellas queda intacto.
+
+    La cache en disco no se toca: otros procesos pueden seguir atendiendo
+    esa version, y podar_cache_disco() la acota por tamaño.
+
+    Returns:
+        Entradas quitadas
+    """
+    with _lock_compartidas:
+        llamadas = _compartidas.pop(huella, [])
+    for limpiar, args, kwargs in llamadas:
+        limpiar(*args, huella=huella, **kwargs)
+    return len(llamadas) + POLITICA.limpiar(huella=huella)
+
+
+def _cache_compartido(func: Callable, nombre: str, **opciones) -> Callable:
+    """st.cache_resource con la huella en la clave y contadores de llamadas y fallos."""
+    # wraps conserva nombre y codigo fuente de func: Streamlit los usa
+    # para distinguir la cache de cada cargador
+    @st.cache_resource(**opciones)
+    @functools.wraps(func)
+    def _en_cache(*args, huella: str, **kwargs):
+        POLITICA.contar(nombre, 'fallos')
+        with _lock_compartidas:
+            _compartidas[huella].append((_en_cache.clear, args, kwargs))
+        return func(*args, **kwargs)
+
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        POLITICA.contar(nombre, 'llamadas')
+        return _en_cache(*args, huella=huella_servida(), **kwargs)
+
+    envoltura.clear = _en_cache.clear
+    return envoltura
+
+
+def cache_por_huella(recurso: bool = False, disco: bool = False, max_mb: int = MAX_MB_DISCO,
+                     max_entradas: int = MAX_ENTRADAS, **opciones) -> Callable:
+    """
+    Cache con la huella de los datos como parte de la clave.
+
+    Args:
+        recurso: Compartir el objeto devuelto (st.cache_resource) en lugar
+            de devolver una copia
+        disco: Guardar tambien el resultado en disco (ver modulo); solo sin
+            recurso
+        max_mb: Tamaño maximo del directorio de cache en disco
+        max_entradas: Entradas de esta funcion que se conservan
+        **opciones: Argumentos de st.cache_resource (show_spinner...); solo
+            con recurso
+    """
+    def decorador(func: Callable) -> Callable:
+        nombre = _nombre_funcion(func)
+        if recurso:
+            POLITICA.registrar(nombre, None)
+            return _cache_compartido(func, nombre, max_entries=max_entradas, **opciones)
+        POLITICA.registrar(nombre, max_entradas)
+        return _cache_copiado(func, nombre, disco, max_mb)
+
+    return decorador
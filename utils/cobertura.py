@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Almacenamiento disperso de balance.
+
+La hoja BAL trae todas las cuentas (incluidas las de 6+ digitos) para todos
+los meses y bancos, aunque la mayoria de las celdas de cuentas profundas
+esten vacias o en cero. Al publicar solo se guardan los valores distintos de
+cero, junto con una tabla de cobertura con los (banco, periodo) que cada banco
+efectivamente reporto:
+
+- fila presente                    -> valor reportado
+- fila ausente en un mes cubierto  -> 0 (celda vacia o en cero en el Excel)
+- mes no cubierto                  -> sin dato (el banco no reporto ese mes)
+
+Las sumas y rankings no cambian (los ceros no aportan). Las series que
+necesitan todos los meses usan completar_ausentes().
+
+Un (banco, codigo) en cero todos los meses conserva una fila con valor 0 (la
+del ultimo mes cubierto): sin ella la cuenta desapareceria de las series, del
+cubo, del indice y de la jerarquia de Balance en lugar de mostrarse en cero.
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .periodos import COLUMNA_PERIODO, agregar_periodo
+
+COLUMNAS_COBERTURA = ('banco', 'fecha', COLUMNA_PERIODO)
+
+# Columnas que identifican una serie y se copian a las filas completadas
+_COLUMNAS_SERIE = ('banco', 'codigo', 'cuenta', 'nivel')
+
+
+def calcular_cobertura(df: pd.DataFrame, columna: str = 'valor') -> pd.DataFrame:
+    """(banco, fecha, periodo) con al menos un valor no nulo."""
+    df = agregar_periodo(df)
+    cobertura = df.loc[df[columna].notna(), list(COLUMNAS_COBERTURA)].drop_duplicates()
+    cobertura['banco'] = cobertura['banco'].astype(str)
+    return cobertura.sort_values(['banco', COLUMNA_PERIODO], ignore_index=True)
+
+
+def dispersar(df: pd.DataFrame, columna: str = 'valor') -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Separa un dataset denso en valores presentes y cobertura.
+
+    Returns:
+        (filas con `columna` no nula y distinta de cero mas una fila en 0 por
+        cada (banco, codigo) sin ningun valor distinto de cero, tabla de
+        cobertura)
+    """
+    df = df.reset_index(drop=True)
+    cobertura = calcular_cobertura(df, columna)
+    presentes = df[columna].notna() & (df[columna] != 0)
+
+    # Meses cubiertos del banco: una celda vacia ahi vale 0
+    periodos = agregar_periodo(df)[COLUMNA_PERIODO]
+    cubierto = df[columna].notna().groupby([df['banco'], periodos], observed=True, sort=False).transform('any')
+    con_valor = presentes.groupby([df['banco'], df['codigo']], observed=True, sort=False).transform('any')
+    candidatas = df.loc[cubierto & ~con_valor, ['banco', 'codigo']].assign(**{COLUMNA_PERIODO: periodos})
+    ancla = candidatas.sort_values(COLUMNA_PERIODO, kind='stable').drop_duplicates(['banco', 'codigo'], keep='last')
+
+    filas = presentes.copy()
+    filas[ancla.index] = True
+    disperso = df[filas].copy()
+    disperso.loc[ancla.index, columna] = 0.0
+    return disperso.reset_index(drop=True), cobertura
+
+
+def completar_ausentes(df: pd.DataFrame, cobertura: pd.DataFrame, columna: str = 'valor') -> pd.DataFrame:
+    """
+    Reinserta con valor 0 las filas ausentes de meses cubiertos.
+
+    Solo completa las series (banco, codigo) que ya aparecen en `df` y los
+    meses de `cobertura`; pensado para resultados filtrados, no para el
+    dataset completo.
+    """
+    if df.empty:
+        return df
+
+    df = agregar_periodo(df)
+    columnas_serie = [c for c in _COLUMNAS_SERIE if c in df.columns]
+    series = df[columnas_serie].drop_duplicates(['banco', 'codigo'], keep='last')
+    series = series.assign(banco=series['banco'].astype(str))
+
+    grilla = series.merge(cobertura[list(COLUMNAS_COBERTURA)], on='banco')
+    existentes = pd.MultiIndex.from_arrays(
+        [df['banco'].astype(str), df['codigo'], df[COLUMNA_PERIODO]]
+    )
+    faltantes = grilla[~pd.MultiIndex.from_frame(
+        grilla[['banco', 'codigo', COLUMNA_PERIODO]]
+    ).isin(existentes)]
+    if faltantes.empty:
+        return df
+
+    faltantes = faltantes.assign(**{columna: 0.0})
+    completo = pd.concat([df, faltantes], ignore_index=True)
+    return completo.sort_values(['banco', 'codigo', COLUMNA_PERIODO], ignore_index=True)
+
+
+def mascara_cobertura(
+    cobertura: pd.DataFrame,
+    bancos: Sequence[str],
+    inicio: int,
+    n_periodos: int,
+) -> np.ndarray:
+    """Matriz bool bancos x periodos (desde `inicio`): True si el banco reporto."""
+    bancos = pd.Index([str(b) for b in bancos])
+    cubiertos = cobertura[cobertura[COLUMNA_PERIODO].between(inicio, inicio + n_periodos - 1)]
+    posicion = bancos.get_indexer(cubiertos['banco'].astype(str))
+    validos = posicion >= 0
+    mascara = np.zeros((len(bancos), n_periodos), dtype=bool)
+    mascara[posicion[validos], cubiertos[COLUMNA_PERIODO].to_numpy(dtype='int64')[validos] - inicio] = True
+    return mascara
@@ -0,0 +1,454 @@
+# -*- coding: utf-8 -*-
+"""
+Consultas de las paginas con motor seleccionable.
+
+Las paginas piden sobre un codigo de un dataset cinco tipos de resultado:
+meses disponibles, total del sistema por mes, ranking de bancos en un mes,
+matriz banco x mes y variacion interanual por banco. Este modulo las
+resuelve con uno de tres motores, elegido con la variable de entorno
+MOTOR_CONSULTAS:
+
+- pandas (por defecto): cortes de IndiceDatos sobre el dataset compartido
+  en memoria (cargar_indice)
+- arrow: lee del parquet solo las columnas, el codigo y el rango de meses
+  pedidos (filtros en el lector, multihilo) y agrega con pyarrow.compute,
+  sin cargar el dataset completo en memoria
+- polars: pl.scan_parquet con los mismos filtros y la misma proyeccion en
+  el lector, y el calculo en un LazyFrame; requiere el paquete polars (sin
+  el se usa arrow)
+
+Los tres motores devuelven los mismos DataFrames: mismas columnas, tipos
+y orden. Las sumas pueden diferir en el ultimo bit porque el orden de suma
+cambia. scripts/paridad_consultas.py compara los motores sobre una
+version publicada, y tests/test_consultas.py sobre versiones sinteticas
+del formato actual y del anterior (balance denso, sin calidad).
+
+Uso:
+    serie = serie_sistema('pyg', 'GDE', 'valor_12m', desde, hasta)
+    ranking('camel', 'SOL', fecha, motor='arrow')
+"""
+
+import functools
+import os
+from typing import List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .almacenamiento import COLUMNA_ANO, escalas_dataset, leer_tabla, ruta_dataset, sumar_exacto
+from .data_loader import cargar_indice
+from .limpieza import COLUMNA_NOMBRE, ruta_calidad
+from .periodos import ANO_BASE, COLUMNA_PERIODO, MESES_ANO, TIPO_PERIODO, ano_periodo, como_periodo
+from .publicacion import directorio_servido, huella_servida
+
+VARIABLE_ENTORNO = 'MOTOR_CONSULTAS'
+MOTORES = ('pandas', 'arrow', 'polars')
+MOTOR_POR_DEFECTO = 'pandas'
+
+# Columna con la variacion interanual en variacion_anual()
+COLUMNA_ANTERIOR = 'anterior'
+COLUMNA_VARIACION = 'variacion_pct'
+
+
+@functools.lru_cache(maxsize=None)
+def _resolver_motor(motor: str) -> str:
+    """Motor valido para un nombre pedido (avisa una sola vez por nombre)."""
+    if motor not in MOTORES:
+        print(f"[AVISO] {VARIABLE_ENTORNO}={motor} no es un motor valido "
+              f"({', '.join(MOTORES)}); se usa {MOTOR_POR_DEFECTO}")
+        return MOTOR_POR_DEFECTO
+    if motor == 'polars':
+        try:
+            import polars  # noqa: F401
+        except ImportError:
+            print("[AVISO] polars no esta instalado; las consultas usan el motor arrow")
+            return 'arrow'
+    return motor
+
+
+def motor_disponible(motor: str) -> bool:
+    """True si `motor` existe y sus dependencias estan instaladas."""
+    return _resolver_motor(motor) == motor
+
+
+def motor_activo() -> str:
+    """Motor configurado en MOTOR_CONSULTAS (pandas si no se define)."""
+    return _resolver_motor(os.environ.get(VARIABLE_ENTORNO, MOTOR_POR_DEFECTO).strip().lower())
+
+
+# =============================================================================
+# MOTOR PANDAS
+# =============================================================================
+
+class MotorPandas:
+    """Cortes del indice del dataset en memoria."""
+
+    def fechas_disponibles(self, dataset: str) -> List[pd.Timestamp]:
+        return cargar_indice(dataset).fechas
+
+    def serie_sistema(self, dataset: str, codigo: str, columna: str, desde, hasta,
+                      escala: Optional[int]) -> pd.DataFrame:
+        df = cargar_indice(dataset).rango(codigo, desde, hasta)
+        df = df[df[columna].notna()]
+        return sumar_exacto(df, columna, por='fecha', escala=escala).reset_index()
+
+    def ranking(self, dataset: str, codigo: str, fecha, columna: str) -> pd.DataFrame:
+        df = cargar_indice(dataset).corte(codigo, fecha)[['banco', columna]]
+        return _ordenar_ranking(_banco_texto(df), columna)
+
+    def filas(self, dataset: str, codigo: str, columna: str, desde, hasta) -> pd.DataFrame:
+        df = cargar_indice(dataset).rango(codigo, desde, hasta)
+        return _banco_texto(df[['banco', 'fecha', COLUMNA_PERIODO, columna]])
+
+    def variacion_anual(self, dataset: str, codigo: str, columna: str, desde, hasta,
+                        bancos: Optional[Sequence[str]]) -> pd.DataFrame:
+        inicio = como_periodo(desde) - MESES_ANO if desde is not None else None
+        df = self.filas(dataset, codigo, columna, inicio, hasta)
+        if bancos:
+            df = df[df['banco'].isin(list(bancos))]
+        anterior = df[['banco', COLUMNA_PERIODO, columna]].rename(columns={columna: COLUMNA_ANTERIOR})
+        anterior[COLUMNA_PERIODO] = (anterior[COLUMNA_PERIODO] + MESES_ANO).astype(TIPO_PERIODO)
+        df = df.merge(anterior, on=['banco', COLUMNA_PERIODO], how='left')
+        df[COLUMNA_VARIACION] = (df[columna] / df[COLUMNA_ANTERIOR] - 1) * 100
+        if desde is not None:
+            df = df[df[COLUMNA_PERIODO] >= como_periodo(desde)]
+        return df.sort_values(['banco', COLUMNA_PERIODO]).reset_index(drop=True)
+
+
+# =============================================================================
+# MOTOR ARROW
+# =============================================================================
+
+def _filtro_limpieza(dataset: str) -> Optional[ds.Expression]:
+    """
+    Limpieza de limpiar_dataset() como filtro del lector, solo para
+    versiones publicadas sin calidad_<dataset>.json (limpiadas al leer).
+    Como cargar_balance(), en esas versiones balance ademas descarta las
+    filas con valor nulo, NaN o cero (anteriores al formato disperso).
+    """
+    if ruta_calidad(directorio_servido(), dataset).exists():
+        return None
+    nombre = ds.field(COLUMNA_NOMBRE[dataset])
+    filtro = (nombre.is_valid() & (pc.utf8_trim_whitespace(nombre) != '') &
+              ds.field('banco').is_valid() & ds.field('fecha').is_valid())
+    if dataset == 'balance':
+        valor = ds.field('valor')
+        filtro = filtro & valor.is_valid() & ~pc.is_nan(valor) & (valor != 0)
+    return filtro
+
+
+def _con_periodo(tabla: pa.Table) -> pa.Table:
+    """Agrega 'periodo' a datos publicados antes de que existiera."""
+    if COLUMNA_PERIODO in tabla.column_names:
+        return tabla
+    fechas = tabla['fecha']
+    periodos = pc.add(pc.multiply(pc.subtract(pc.year(fechas), ANO_BASE), MESES_ANO),
+                      pc.subtract(pc.month(fechas), 1))
+    return tabla.append_column(COLUMNA_PERIODO, pc.cast(periodos, TIPO_PERIODO))
+
+
+class MotorArrow:
+    """Lectura filtrada del parquet y calculo con pyarrow.compute."""
+
+    def _leer(self, dataset: str, codigo: Optional[str], columnas: Sequence[str],
+              desde=None, hasta=None) -> pa.Table:
+        tabla = leer_tabla(directorio_servido(), dataset,
+                           columnas=list(columnas) + ['fecha', COLUMNA_PERIODO],
+                           codigos=[codigo] if codigo is not None else None,
+                           desde=desde, hasta=hasta, filtro=_filtro_limpieza(dataset))
+        return _con_periodo(tabla)
+
+    def fechas_disponibles(self, dataset: str) -> List[pd.Timestamp]:
+        tabla = self._leer(dataset, None, [])
+        por_mes = tabla.group_by(COLUMNA_PERIODO).aggregate([('fecha', 'max')])
+        por_mes = por_mes.sort_by(COLUMNA_PERIODO)
+        return [pd.Timestamp(f) for f in por_mes['fecha_max'].to_pylist()]
+
+    def serie_sistema(self, dataset: str, codigo: str, columna: str, desde, hasta,
+                      escala: Optional[int]) -> pd.DataFrame:
+        tabla = self._leer(dataset, codigo, [columna], desde, hasta)
+        tabla = tabla.filter(pc.is_valid(tabla[columna]))
+        if escala:
+            # Enteros escalados, como sumar_exacto()
+            enteros = pc.cast(pc.round(pc.multiply(tabla[columna], escala)), pa.int64())
+            tabla = tabla.set_column(tabla.schema.get_field_index(columna), columna, enteros)
+        suma = tabla.group_by('fecha').aggregate([(columna, 'sum')]).sort_by('fecha')
+        suma = suma.rename_columns(['fecha', columna])
+        if escala:
+            suma = suma.set_column(1, columna, pc.divide(pc.cast(suma[columna], pa.float64()), float(escala)))
+        return suma.to_pandas()
+
+    def ranking(self, dataset: str, codigo: str, fecha, columna: str) -> pd.DataFrame:
+        tabla = self._leer(dataset, codigo, ['banco', columna], fecha, fecha)
+        return _ordenar_ranking(tabla.select(['banco', columna]).to_pandas(), columna)
+
+    def filas(self, dataset: str, codigo: str, columna: str, desde, hasta) -> pd.DataFrame:
+        tabla = self._leer(dataset, codigo, ['banco', columna], desde, hasta)
+        tabla = tabla.select(['banco', 'fecha', COLUMNA_PERIODO, columna])
+        return tabla.sort_by([(COLUMNA_PERIODO, 'ascending'), ('banco', 'ascending')]).to_pandas()
+
+    def variacion_anual(self, dataset: str, codigo: str, columna: str, desde, hasta,
+                        bancos: Optional[Sequence[str]]) -> pd.DataFrame:
+        inicio = como_periodo(desde) - MESES_ANO if desde is not None else None
+        tabla = self._leer(dataset, codigo, ['banco', columna], inicio, hasta)
+        tabla = tabla.select(['banco', 'fecha', COLUMNA_PERIODO, columna])
+        if bancos:
+            tabla = tabla.filter(pc.is_in(tabla['banco'], pa.array([str(b) for b in bancos])))
+
+        periodos = tabla[COLUMNA_PERIODO]
+        anterior = pa.table({
+            'banco': tabla['banco'],
+            COLUMNA_PERIODO: pc.cast(pc.add(periodos, MESES_ANO), periodos.type),
+            COLUMNA_ANTERIOR: tabla[columna],
+        })
+        tabla = tabla.join(anterior, keys=['banco', COLUMNA_PERIODO], join_type='left outer')
+        variacion = pc.multiply(pc.subtract(pc.divide(tabla[columna], tabla[COLUMNA_ANTERIOR]), 1), 100)
+        tabla = tabla.append_column(COLUMNA_VARIACION, variacion)
+        if desde is not None:
+            tabla = tabla.filter(pc.greater_equal(tabla[COLUMNA_PERIODO], como_periodo(desde)))
+        tabla = tabla.sort_by([('banco', 'ascending'), (COLUMNA_PERIODO, 'ascending')])
+        return tabla.to_pandas()
+
+
+# =============================================================================
+# MOTOR POLARS
+# =============================================================================
+
+# Periodo del mes del año anterior en la union de MotorPolars.variacion_anual()
+_CLAVE_ANTERIOR = '_periodo_anterior'
+
+
+def _limpieza_polars(dataset: str):
+    """_filtro_limpieza() como expresion de polars (None si no hace falta)."""
+    import polars as pl
+
+    if ruta_calidad(directorio_servido(), dataset).exists():
+        return None
+    nombre = pl.col(COLUMNA_NOMBRE[dataset])
+    filtro = (nombre.is_not_null() & (nombre.str.strip_chars() != '') &
+              pl.col('banco').is_not_null() & pl.col('fecha').is_not_null())
+    if dataset == 'balance':
+        valor = pl.col('valor')
+        filtro = filtro & valor.is_not_null() & ~valor.is_nan() & (valor != 0)
+    return filtro
+
+
+class MotorPolars:
+    """
+    Calculo en polars sobre pl.scan_parquet del dataset servido: el filtro
+    de codigo, meses y año de la particion y la proyeccion se empujan al
+    lector, y el calculo corre en un LazyFrame (multihilo).
+    """
+
+    def _escanear(self, dataset: str, codigo: Optional[str], columnas: Sequence[str],
+                  desde=None, hasta=None):
+        """LazyFrame con `columnas`, fecha y periodo, como MotorArrow._leer()."""
+        import polars as pl
+
+        ruta = ruta_dataset(directorio_servido(), dataset)
+        if not ruta.exists():
+            raise FileNotFoundError(f"No se encontro {ruta}")
+        filas = pl.scan_parquet(ruta, hive_partitioning=ruta.is_dir())
+        nombres = filas.collect_schema().names()
+        inicio = como_periodo(desde) if desde is not None else None
+        fin = como_periodo(hasta) if hasta is not None else None
+
+        # La particion por año descarta archivos completos
+        if COLUMNA_ANO in nombres:
+            if inicio is not None:
+                filas = filas.filter(pl.col(COLUMNA_ANO) >= int(ano_periodo(inicio)))
+            if fin is not None:
+                filas = filas.filter(pl.col(COLUMNA_ANO) <= int(ano_periodo(fin)))
+        if codigo is not None:
+            filas = filas.filter(pl.col('codigo') == str(codigo))
+
+        # Punto fijo a float64, como leer_tabla()
+        escalas = _escalas_version(huella_servida(), dataset)
+        filas = filas.with_columns([(pl.col(c).cast(pl.Float64) / escala).alias(c)
+                                    for c, escala in escalas.items() if c in nombres])
+        if COLUMNA_PERIODO not in nombres:
+            # Datos publicados antes de la clave de periodo
+            fecha = pl.col('fecha')
+            periodo = (fecha.dt.year() - ANO_BASE) * MESES_ANO + fecha.dt.month() - 1
+            filas = filas.with_columns(periodo.cast(pl.Int16).alias(COLUMNA_PERIODO))
+        limpieza = _limpieza_polars(dataset)
+        if limpieza is not None:
+            filas = filas.filter(limpieza)
+        if inicio is not None:
+            filas = filas.filter(pl.col(COLUMNA_PERIODO) >= inicio)
+        if fin is not None:
+            filas = filas.filter(pl.col(COLUMNA_PERIODO) <= fin)
+
+        seleccion = [pl.col(c) for c in columnas if c in nombres] + [pl.col('fecha'), pl.col(COLUMNA_PERIODO)]
+        filas = filas.select(seleccion)
+        if 'banco' in columnas:
+            # Texto plano aunque se haya escrito como categoria o particion
+            filas = filas.with_columns(pl.col('banco').cast(pl.String))
+        return filas
+
+    def fechas_disponibles(self, dataset: str) -> List[pd.Timestamp]:
+        import polars as pl
+
+        por_mes = (
+            self._escanear(dataset, None, [])
+            .group_by(COLUMNA_PERIODO)
+            .agg(pl.col('fecha').max())
+            .sort(COLUMNA_PERIODO)
+        )
+        return [pd.Timestamp(f) for f in por_mes.collect()['fecha'].to_list()]
+
+    def serie_sistema(self, dataset: str, codigo: str, columna: str, desde, hasta,
+                      escala: Optional[int]) -> pd.DataFrame:
+        import polars as pl
+
+        suma = pl.col(columna).sum()
+        if escala:
+            suma = (pl.col(columna) * escala).round().cast(pl.Int64).sum() / escala
+        consulta = (
+            self._escanear(dataset, codigo, [columna], desde, hasta)
+            .filter(pl.col(columna).is_not_null())
+            .group_by('fecha')
+            .agg(suma.alias(columna))
+            .sort('fecha')
+        )
+        return consulta.collect().to_pandas()
+
+    def ranking(self, dataset: str, codigo: str, fecha, columna: str) -> pd.DataFrame:
+        consulta = (
+            self._escanear(dataset, codigo, ['banco', columna], fecha, fecha)
+            .select(['banco', columna])
+            .sort([columna, 'banco'], descending=[True, False], nulls_last=True)
+        )
+        return consulta.collect().to_pandas()
+
+    def filas(self, dataset: str, codigo: str, columna: str, desde, hasta) -> pd.DataFrame:
+        consulta = (
+            self._escanear(dataset, codigo, ['banco', columna], desde, hasta)
+            .select(['banco', 'fecha', COLUMNA_PERIODO, columna])
+            .sort([COLUMNA_PERIODO, 'banco'])
+        )
+        return consulta.collect().to_pandas()
+
+    def variacion_anual(self, dataset: str, codigo: str, columna: str, desde, hasta,
+                        bancos: Optional[Sequence[str]]) -> pd.DataFrame:
+        import polars as pl
+
+        inicio = como_periodo(desde) - MESES_ANO if desde is not None else None
+        filas = self._escanear(dataset, codigo, ['banco', columna], inicio, hasta)
+        filas = filas.select(['banco', 'fecha', COLUMNA_PERIODO, columna])
+        if bancos:
+            filas = filas.filter(pl.col('banco').is_in([str(b) for b in bancos]))
+
+        # El mes del año anterior se busca con una clave aparte: si la clave de
+        # la union fuera 'periodo', polars empuja el filtro de `desde` tambien
+        # al lado derecho, que comparte el escaneo, y pierde el año anterior
+        anterior = filas.select([
+            pl.col('banco'),
+            pl.col(COLUMNA_PERIODO).alias(_CLAVE_ANTERIOR),
+            pl.col(columna).alias(COLUMNA_ANTERIOR),
+        ])
+        consulta = (
+            filas.with_columns((pl.col(COLUMNA_PERIODO) - MESES_ANO).cast(pl.Int16).alias(_CLAVE_ANTERIOR))
+            .join(anterior, on=['banco', _CLAVE_ANTERIOR], how='left')
+            .drop(_CLAVE_ANTERIOR)
+            .with_columns(((pl.col(columna) / pl.col(COLUMNA_ANTERIOR) - 1) * 100).alias(COLUMNA_VARIACION))
+        )
+        if desde is not None:
+            consulta = consulta.filter(pl.col(COLUMNA_PERIODO) >= como_periodo(desde))
+        return consulta.sort(['banco', COLUMNA_PERIODO]).collect().to_pandas()
+
+
+_INSTANCIAS = {
+    'pandas': MotorPandas(),
+    'arrow': MotorArrow(),
+    'polars': MotorPolars(),
+}
+
+
+def _motor(motor: Optional[str]):
+    return _INSTANCIAS[_resolver_motor(motor) if motor else motor_activo()]
+
+
+@functools.lru_cache(maxsize=32)
+def _escalas_version(huella: str, dataset: str) -> dict:
+    """Escalas de punto fijo del dataset servido (una lectura por version)."""
+    return escalas_dataset(directorio_servido(), dataset)
+
+
+def _banco_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """'banco' como texto: en datos escritos como categoria arrow ya lo devuelve asi."""
+    if isinstance(df['banco'].dtype, pd.CategoricalDtype):
+        return df.astype({'banco': str})
+    return df
+
+
+def _ordenar_ranking(df: pd.DataFrame, columna: str) -> pd.DataFrame:
+    """Mayor a menor, empates por banco y sin valor al final (igual en todos los motores)."""
+    df = df.sort_values(['banco'], kind='stable')
+    df = df.sort_values(columna, ascending=False, na_position='last', kind='stable')
+    return df.reset_index(drop=True)
+
+
+# =============================================================================
+# CONSULTAS
+# =============================================================================
+
+def fechas_disponibles(dataset: str, motor: str = None) -> List[pd.Timestamp]:
+    """Fechas con datos (una por mes), de la mas antigua a la mas reciente."""
+    return _motor(motor).fechas_disponibles(dataset)
+
+
+def serie_sistema(dataset: str, codigo: str, columna: str = 'valor', desde=None, hasta=None,
+                  motor: str = None) -> pd.DataFrame:
+    """
+    Total del sistema por mes: suma de `columna` entre bancos, solo meses
+    con algun valor. `desde`/`hasta` son fechas o periodos inclusive.
+
+    Si la columna se publico en punto fijo la suma es exacta (enteros
+    escalados, ver sumar_exacto) y no depende del orden de suma del motor.
+
+    Returns:
+        DataFrame con 'fecha' y `columna`, ordenado por fecha
+    """
+    escala = _escalas_version(huella_servida(), dataset).get(columna)
+    return _motor(motor).serie_sistema(dataset, codigo, columna, desde, hasta, escala)
+
+
+def ranking(dataset: str, codigo: str, fecha, columna: str = 'valor', motor: str = None) -> pd.DataFrame:
+    """
+    Bancos de un mes de mayor a menor `columna` (empates por banco; sin
+    valor al final).
+
+    Returns:
+        DataFrame con 'banco' y `columna`
+    """
+    return _motor(motor).ranking(dataset, codigo, fecha, columna)
+
+
+def heatmap(dataset: str, codigo: str, desde=None, hasta=None, columna: str = 'valor',
+            motor: str = None) -> pd.DataFrame:
+    """
+    Matriz banco x mes de `columna` (columnas 'YYYY-MM'); vacia si no hay
+    filas en el rango.
+    """
+    df = _motor(motor).filas(dataset, codigo, columna, desde, hasta)
+    if df.empty:
+        return pd.DataFrame()
+    df = df.assign(mes=df['fecha'].dt.strftime('%Y-%m'))
+    return df.pivot(index='banco', columns='mes', values=columna)
+
+
+def variacion_anual(dataset: str, codigo: str, columna: str = 'valor', desde=None, hasta=None,
+                    bancos: Optional[Sequence[str]] = None, motor: str = None) -> pd.DataFrame:
+    """
+    Variacion de cada banco y mes contra el mismo mes del año anterior
+    (periodo - 12). Si ese mes no tiene fila no hay valor anterior. El año
+    anterior a `desde` se lee aunque quede fuera del rango devuelto.
+
+    Returns:
+        DataFrame con 'banco', 'fecha', 'periodo', `columna`, 'anterior' y
+        'variacion_pct', ordenado por banco y periodo
+    """
+    return _motor(motor).variacion_anual(dataset, codigo, columna, desde, hasta, bancos)
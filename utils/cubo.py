@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Cubo denso banco x codigo x periodo.
+
+Balance, PYG y CAMEL son naturalmente un cubo: cada banco tiene un valor por
+codigo y mes. CuboDatos guarda cada columna de valor como un arreglo NumPy
+de forma (bancos, codigos, periodos) mas los mapas de indice, de modo que:
+
+- un valor puntual es cubo[i, j, k] (O(1), sin filtrar filas)
+- la serie de un banco y codigo es cubo[i, j, :]
+- todos los bancos en una fecha son cubo[:, j, k]
+- el total del sistema es una sola reduccion sobre el eje de bancos
+
+Se publica como un directorio cubo_<dataset>/ con un .npy por columna de
+valor e indices.json; al abrirlo los .npy se mapean en memoria (mmap) y solo
+se leen las paginas que se tocan. Las celdas sin dato son NaN; en balance los
+meses reportados sin valor para la cuenta son 0 (ver utils/cobertura.py).
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .cobertura import mascara_cobertura
+from .periodos import COLUMNA_PERIODO, agregar_periodo, eje_periodos, fecha_a_periodo
+
+PREFIJO_CUBO = 'cubo_'
+ARCHIVO_INDICES = 'indices.json'
+
+
+def nombre_cubo(dataset: str) -> str:
+    return f"{PREFIJO_CUBO}{dataset}"
+
+
+class CuboDatos:
+    """Cubo banco x codigo x periodo con acceso por nombre."""
+
+    def __init__(
+        self,
+        valores: Dict[str, np.ndarray],
+        bancos: Sequence[str],
+        codigos: Sequence[str],
+        fechas: Sequence,
+        periodo_inicio: int,
+    ):
+        self.valores = valores
+        self.columnas = list(valores)
+        self.bancos = [str(b) for b in bancos]
+        self.codigos = [str(c) for c in codigos]
+        self.fechas = pd.DatetimeIndex(pd.to_datetime(list(fechas)))
+        self.periodo_inicio = int(periodo_inicio)
+        self._indice_banco = {b: i for i, b in enumerate(self.bancos)}
+        self._indice_codigo = {c: j for j, c in enumerate(self.codigos)}
+
+    # -------------------------------------------------------------------------
+    # Construccion y persistencia
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def desde_dataframe(
+        cls,
+        df: pd.DataFrame,
+        columnas_valor: Sequence[str],
+        cobertura: Optional[pd.DataFrame] = None,
+    ) -> 'CuboDatos':
+        """
+        Arma el cubo desde un dataset largo.
+
+        Args:
+            df: Dataset largo (banco, fecha, codigo, valores)
+            columnas_valor: Columnas que se guardan (una matriz por columna)
+            cobertura: Meses reportados por banco: en esos meses las celdas
+                sin fila son 0 en lugar de NaN
+        """
+        df = agregar_periodo(df)
+        bancos = sorted(df['banco'].astype(str).unique())
+        codigos = sorted(df['codigo'].astype(str).unique())
+        inicio, fechas = eje_periodos(df)
+
+        i = pd.Index(bancos).get_indexer(df['banco'].astype(str))
+        j = pd.Index(codigos).get_indexer(df['codigo'].astype(str))
+        k = df[COLUMNA_PERIODO].to_numpy(dtype='int64') - inicio
+
+        base = np.full((len(bancos), len(codigos), len(fechas)), np.nan)
+        if cobertura is not None:
+            cubierto = mascara_cobertura(cobertura, bancos, inicio, len(fechas))
+            base[np.broadcast_to(cubierto[:, None, :], base.shape)] = 0.0
+
+        valores = {}
+        for columna in columnas_valor:
+            matriz = base.copy()
+            matriz[i, j, k] = df[columna].to_numpy(dtype='float64')
+            valores[columna] = matriz
+        return cls(valores, bancos, codigos, fechas, inicio)
+
+    @classmethod
+    def abrir(cls, directorio: Path, dataset: str, mmap: bool = True) -> 'CuboDatos':
+        """
+        Abre cubo_<dataset>/ de una version publicada.
+
+        Raises:
+            FileNotFoundError: si la version no incluye el cubo
+        """
+        carpeta = Path(directorio) / nombre_cubo(dataset)
+        if not (carpeta / ARCHIVO_INDICES).exists():
+            raise FileNotFoundError(f"No se encontro {carpeta}")
+
+        with open(carpeta / ARCHIVO_INDICES, 'r', encoding='utf-8') as f:
+            indices = json.load(f)
+        modo = 'r' if mmap else None
+        valores = {c: np.load(carpeta / f"{c}.npy", mmap_mode=modo) for c in indices['columnas']}
+        return cls(valores, indices['bancos'], indices['codigos'], indices['fechas'], indices['periodo_inicio'])
+
+    def guardar(self, directorio: Path, dataset: str) -> Path:
+        """Escribe cubo_<dataset>/ (un .npy por columna + indices.json)."""
+        carpeta = Path(directorio) / nombre_cubo(dataset)
+        if carpeta.exists():
+            shutil.rmtree(carpeta)
+        carpeta.mkdir(parents=True)
+        for columna, matriz in self.valores.items():
+            np.save(carpeta / f"{columna}.npy", np.ascontiguousarray(matriz))
+
+        indices = {
+            'columnas': self.columnas,
+            'bancos': self.bancos,
+            'codigos': self.codigos,
+            'periodo_inicio': self.periodo_inicio,
+            'fechas': [f.strftime('%Y-%m-%d') for f in self.fechas],
+        }
+        with open(carpeta / ARCHIVO_INDICES, 'w', encoding='utf-8') as f:
+            json.dump(indices, f, ensure_ascii=False)
+        return carpeta
+
+    # -------------------------------------------------------------------------
+    # Indices
+    # -------------------------------------------------------------------------
+
+    @property
+    def forma(self) -> tuple:
+        return (len(self.bancos), len(self.codigos), len(self.fechas))
+
+    def _columna(self, columna: Optional[str]) -> np.ndarray:
+        return self.valores[columna or self.columnas[0]]
+
+    def _periodo(self, fecha) -> Optional[int]:
+        k = fecha_a_periodo(fecha) - self.periodo_inicio
+        return k if 0 <= k < len(self.fechas) else None
+
+    # -------------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------------
+
+    def valor(self, banco: str, codigo: str, fecha, columna: Optional[str] = None) -> Optional[float]:
+        """Valor de un banco, codigo y mes (None si no hay dato)."""
+        i = self._indice_banco.get(str(banco))
+        j = self._indice_codigo.get(str(codigo))
+        k = self._periodo(fecha)
+        if i is None or j is None or k is None:
+            return None
+        valor = float(self._columna(columna)[i, j, k])
+        return None if np.isnan(valor) else valor
+
+    def serie(self, banco: str, codigo: str, columna: Optional[str] = None) -> pd.Series:
+        """Serie de un banco y codigo indexada por fecha (sin meses NaN)."""
+        i = self._indice_banco.get(str(banco))
+        j = self._indice_codigo.get(str(codigo))
+        if i is None or j is None:
+            return pd.Series(dtype='float64', index=pd.DatetimeIndex([], name='fecha'))
+        serie = pd.Series(np.asarray(self._columna(columna)[i, j, :]), index=self.fechas.rename('fecha'))
+        return serie.dropna()
+
+    def corte(self, codigo: str, fecha, columna: Optional[str] = None) -> pd.Series:
+        """Valor de todos los bancos para un codigo y mes, indexado por banco (sin NaN)."""
+        j = self._indice_codigo.get(str(codigo))
+        k = self._periodo(fecha)
+        if j is None or k is None:
+            return pd.Series(dtype='float64', index=pd.Index([], name='banco'))
+        corte = pd.Series(np.asarray(self._columna(columna)[:, j, k]), index=pd.Index(self.bancos, name='banco'))
+        return corte.dropna()
+
+    def total_sistema(self, codigo: str, fecha=None, columna: Optional[str] = None):
+        """
+        Suma sobre los bancos de un codigo: float para una fecha, o Serie por
+        fecha si fecha es None. Los meses sin ningun dato son NaN.
+        """
+        j = self._indice_codigo.get(str(codigo))
+        if fecha is not None:
+            k = self._periodo(fecha)
+            if j is None or k is None:
+                return np.nan
+            datos = np.asarray(self._columna(columna)[:, j, k])
+            return float(np.nansum(datos)) if not np.isnan(datos).all() else np.nan
+
+        if j is None:
+            return pd.Series(dtype='float64', index=pd.DatetimeIndex([], name='fecha'))
+        datos = np.asarray(self._columna(columna)[:, j, :])
+        totales = np.where(np.isnan(datos).all(axis=0), np.nan, np.nansum(datos, axis=0))
+        return pd.Series(totales, index=self.fechas.rename('fecha'))
+
+    def bancos_con_datos(self, fecha) -> List[str]:
+        """Bancos con al menos un valor en el mes."""
+        k = self._periodo(fecha)
+        if k is None:
+            return []
+        presentes = ~np.isnan(np.asarray(self._columna(None)[:, :, k])).all(axis=1)
+        return [b for b, p in zip(self.bancos, presentes) if p]
@@ -1,63 +1,117 @@
 # -*- coding: utf-8 -*-
 """
 Carga centralizada de datos con validacion y limpieza.
+
+Los datasets se cachean con st.cache_resource: cada proceso guarda una sola
+instancia por version publicada y todas las sesiones reciben ese mismo
+objeto, sin copiarlo ni deserializarlo. Son de solo lectura: las columnas
+convertidas desde arrow no admiten escritura y las metricas de calidad se
+devuelven como MappingProxyType. Quien necesite modificar un DataFrame debe
+trabajar sobre un filtro o una copia, nunca asignar columnas al original.
 """
 
+import contextvars
 import pandas as pd
-import streamlit as st
-from pathlib import Path
-from typing import Tuple, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Tuple, Dict, Any, Callable, Iterator, Mapping, Optional, Sequence
 import json
 
-# Ruta base de datos
-MASTER_DATA_DIR = Path(__file__).parent.parent / "master_data"
+import pyarrow.dataset as ds
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from .almacenamiento import leer_dataset, ruta_dataset
+from .cache import cache_por_huella
+from .cobertura import calcular_cobertura, completar_ausentes
+from .cubo import CuboDatos
+from .dimensional import DIMENSIONES, claves_filtro, normalizar, rehidratar
+from .indice import IndiceDatos
+from .limpieza import leer_calidad, limpiar_con_calidad
+from .periodos import como_periodo, fecha_a_periodo
+from .publicacion import directorio_servido
+from .series import COLUMNAS_SERIE, leer_series
+
+
+# Columnas que la limpieza necesita aunque no se pidan
+_COLUMNAS_CLAVE = ('banco', 'fecha')
 
 
-@st.cache_data(ttl=3600)
-def cargar_balance() -> Tuple[pd.DataFrame, Dict[str, Any]]:
+def _con_claves(columnas: Optional[Tuple[str, ...]]) -> Optional[list]:
+    """Proyeccion pedida mas las columnas clave (None = todas)."""
+    if columnas is None:
+        return None
+    return list(_COLUMNAS_CLAVE) + [c for c in columnas if c not in _COLUMNAS_CLAVE]
+
+
+@cache_por_huella(recurso=True)
+def cargar_balance(
+    anos: Optional[Tuple[int, ...]] = None,
+    bancos: Optional[Tuple[str, ...]] = None,
+    codigos: Optional[Tuple[str, ...]] = None,
+    desde=None,
+    hasta=None,
+    columnas: Optional[Tuple[str, ...]] = None,
+    niveles: Optional[Tuple[int, ...]] = None,
+) -> Tuple[pd.DataFrame, Mapping[str, Any]]:
     """
-    Carga balance.parquet con limpieza y metricas de calidad.
+    Carga balance con limpieza y metricas de calidad.
+
+    Args:
+        anos: Años a cargar (por defecto todos). Con el dataset particionado
+            solo se leen los archivos de esos años.
+        bancos: Bancos a cargar (por defecto todos)
+        codigos: Codigos de cuenta a cargar (por defecto todos)
+        desde, hasta: Rango de meses inclusive (fecha o periodo entero)
+        columnas: Columnas a leer (por defecto todas); banco y fecha se
+            agregan siempre
+        niveles: Niveles de cuenta a cargar (1 = 1 digito, 2 = 2 digitos...)
+
+    Todos los filtros se aplican en el lector parquet: solo se leen los
+    archivos, row groups y columnas necesarios. La limpieza se hace en el
+    ETL y las metricas se leen de calidad_balance.json (describen el dataset
+    publicado completo, no el subconjunto filtrado).
 
     Returns:
-        Tuple[DataFrame, Dict]: DataFrame limpio y metricas de calidad
-    """
-    filepath = MASTER_DATA_DIR / "balance.parquet"
+        Tuple[DataFrame, Mapping]: DataFrame limpio y metricas de calidad
 
-    if not filepath.exists():
-        raise FileNotFoundError(f"No se encontro {filepath}")
-
-    df_original = pd.read_parquet(filepath)
-    registros_originales = len(df_original)
-
-    # Limpieza
-    df = df_original.copy()
-
-    # 1. Filtrar cuentas vacias
-    mask_cuenta_valida = df['cuenta'].fillna('').str.strip() != ''
-    df = df[mask_cuenta_valida]
-
-    # 2. Filtrar valores nulos en columnas clave
-    df = df.dropna(subset=['banco', 'fecha'])
-
-    # 3. Convertir fecha a datetime si no lo es
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'])
-
-    # Metricas de calidad
-    calidad = {
-        'registros_originales': registros_originales,
-        'registros_limpios': len(df),
-        'registros_eliminados': registros_originales - len(df),
-        'pct_eliminados': round((registros_originales - len(df)) / registros_originales * 100, 2),
-        'bancos': df['banco'].nunique(),
-        'fechas': df['fecha'].nunique(),
-        'fecha_min': df['fecha'].min(),
-        'fecha_max': df['fecha'].max(),
-        'nulos_valor': df['valor'].isna().sum(),
-        'nulos_codigo': df['codigo'].isna().sum(),
-    }
+    Solo incluye valores distintos de cero: una cuenta ausente en un mes
+    cubierto vale 0 (ver cargar_cobertura y utils/cobertura.py).
+    """
+    directorio = directorio_servido()
+    filtro = ds.field('nivel').isin([int(n) for n in niveles]) if niveles is not None else None
+    df = leer_dataset(directorio, 'balance', anos=anos, bancos=bancos,
+                      filtro=filtro, columnas=_con_claves(columnas),
+                      codigos=codigos, desde=desde, hasta=hasta)
+
+    calidad = leer_calidad(directorio, 'balance')
+    if calidad is None:
+        # Version publicada antes de que el ETL limpiara los datos
+        df, calidad = limpiar_con_calidad(df, 'balance')
+        # ... y antes del formato disperso (trae todas las celdas)
+        if 'valor' in df.columns:
+            df = df[df['valor'].notna() & (df['valor'] != 0)]
+        calidad['registros_presentes'] = len(df)
+
+    return df, MappingProxyType(calidad)
+
+
+@cache_por_huella(recurso=True)
+def cargar_cobertura(
+    anos: Optional[Tuple[int, ...]] = None,
+    bancos: Optional[Tuple[str, ...]] = None,
+) -> pd.DataFrame:
+    """
+    Meses reportados por cada banco en balance: banco, fecha, periodo.
 
-    return df, calidad
+    Si la version publicada no incluye la tabla se calcula desde balance.
+    """
+    directorio = directorio_servido()
+    try:
+        return leer_dataset(directorio, 'cobertura_balance', anos=anos, bancos=bancos)
+    except FileNotFoundError:
+        return calcular_cobertura(leer_dataset(directorio, 'balance', anos=anos, bancos=bancos))
 
 
 # =============================================================================
@@ -67,66 +121,60 @@ def cargar_balance() -> Tuple[pd.DataFrame, Dict[str, Any]]:
 # - cargar_fuentes_usos() -> fuentes_usos.parquet (eliminado)
 #
 # Solo se mantienen las 3 funciones esenciales:
-# - cargar_balance() -> Hojas BAL (18 MB)
-# - cargar_pyg() -> Hoja PYG (9.5 MB)
+# - cargar_balance() -> Hojas BAL (18 MB, particionado por año)
+# - cargar_pyg() -> Hoja PYG (9.5 MB, particionado por año)
 # - cargar_camel() -> Hoja CAMEL (1.6 MB)
 # =============================================================================
 
 
-@st.cache_data(ttl=3600)
-def cargar_pyg() -> Tuple[pd.DataFrame, Dict[str, Any]]:
+@cache_por_huella(recurso=True)
+def cargar_pyg(
+    anos: Optional[Tuple[int, ...]] = None,
+    bancos: Optional[Tuple[str, ...]] = None,
+    codigos: Optional[Tuple[str, ...]] = None,
+    desde=None,
+    hasta=None,
+    columnas: Optional[Tuple[str, ...]] = None,
+) -> Tuple[pd.DataFrame, Mapping[str, Any]]:
     """
-    Carga pyg.parquet (Pérdidas y Ganancias) con metricas de calidad.
+    Carga PYG (Pérdidas y Ganancias) con metricas de calidad.
 
     Los datos de PYG tienen una estructura especial:
     - valor_acumulado: Valor acumulado en el año (como viene en el Excel)
     - valor_mes: Valor desacumulado del mes individual
     - valor_12m: Suma móvil de 12 meses (para comparabilidad)
 
+    Args:
+        anos: Años a cargar (por defecto todos)
+        bancos: Bancos a cargar (por defecto todos)
+        codigos: Codigos de cuenta a cargar (por defecto todos)
+        desde, hasta: Rango de meses inclusive (fecha o periodo entero)
+        columnas: Columnas a leer (por defecto todas)
+
     Returns:
-        Tuple[DataFrame, Dict]: DataFrame y metricas de calidad
+        Tuple[DataFrame, Mapping]: DataFrame y metricas de calidad
     """
-    filepath = MASTER_DATA_DIR / "pyg.parquet"
-
-    if not filepath.exists():
-        raise FileNotFoundError(f"No se encontro {filepath}")
-
-    df_original = pd.read_parquet(filepath)
-    registros_originales = len(df_original)
-
-    df = df_original.copy()
-
-    # Filtrar cuentas vacias
-    mask_cuenta_valida = df['cuenta'].fillna('').str.strip() != ''
-    df = df[mask_cuenta_valida]
-
-    # Filtrar valores nulos en columnas clave
-    df = df.dropna(subset=['banco', 'fecha'])
-
-    # Convertir fecha a datetime si no lo es
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'])
-
-    # Metricas de calidad
-    calidad = {
-        'registros_originales': registros_originales,
-        'registros_limpios': len(df),
-        'registros_eliminados': registros_originales - len(df),
-        'pct_eliminados': round((registros_originales - len(df)) / registros_originales * 100, 2),
-        'bancos': df['banco'].nunique(),
-        'fechas': df['fecha'].nunique(),
-        'fecha_min': df['fecha'].min(),
-        'fecha_max': df['fecha'].max(),
-        'cuentas_unicas': df['codigo'].nunique(),
-        'registros_con_12m': df['valor_12m'].notna().sum(),
-        'pct_con_12m': round(df['valor_12m'].notna().sum() / len(df) * 100, 1),
-    }
-
-    return df, calidad
-
-
-@st.cache_data(ttl=3600)
-def cargar_camel() -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    directorio = directorio_servido()
+    df = leer_dataset(directorio, 'pyg', anos=anos, bancos=bancos,
+                      columnas=_con_claves(columnas), codigos=codigos,
+                      desde=desde, hasta=hasta)
+
+    calidad = leer_calidad(directorio, 'pyg')
+    if calidad is None:
+        # Version publicada antes de que el ETL limpiara los datos
+        df, calidad = limpiar_con_calidad(df, 'pyg')
+
+    return df, MappingProxyType(calidad)
+
+
+@cache_por_huella(recurso=True)
+def cargar_camel(
+    bancos: Optional[Tuple[str, ...]] = None,
+    codigos: Optional[Tuple[str, ...]] = None,
+    desde=None,
+    hasta=None,
+    columnas: Optional[Tuple[str, ...]] = None,
+) -> Tuple[pd.DataFrame, Mapping[str, Any]]:
     """
     Carga camel.parquet (Indicadores CAMEL) con metricas de calidad.
 
@@ -138,53 +186,36 @@ def cargar_camel() -> Tuple[pd.DataFrame, Dict[str, Any]]:
     - L: Liquidity (liquidez)
     - Composicion Cartera (participacion por tipo de credito)
 
+    Args:
+        bancos: Bancos a cargar (por defecto todos)
+        codigos: Codigos de indicador a cargar (por defecto todos)
+        desde, hasta: Rango de meses inclusive (fecha o periodo entero)
+        columnas: Columnas a leer (por defecto todas)
+
     Returns:
-        Tuple[DataFrame, Dict]: DataFrame y metricas de calidad
+        Tuple[DataFrame, Mapping]: DataFrame y metricas de calidad
     """
-    filepath = MASTER_DATA_DIR / "camel.parquet"
+    directorio = directorio_servido()
+    df = leer_dataset(directorio, 'camel', bancos=bancos,
+                      columnas=_con_claves(columnas), codigos=codigos,
+                      desde=desde, hasta=hasta)
 
-    if not filepath.exists():
-        raise FileNotFoundError(f"No se encontro {filepath}")
-
-    df_original = pd.read_parquet(filepath)
-    registros_originales = len(df_original)
-
-    df = df_original.copy()
-
-    # Filtrar indicadores vacios
-    mask_indicador_valido = df['indicador'].fillna('').str.strip() != ''
-    df = df[mask_indicador_valido]
-
-    # Filtrar valores nulos en columnas clave
-    df = df.dropna(subset=['banco', 'fecha'])
-
-    # Convertir fecha a datetime si no lo es
-    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
-        df['fecha'] = pd.to_datetime(df['fecha'])
-
-    # Metricas de calidad
-    calidad = {
-        'registros_originales': registros_originales,
-        'registros_limpios': len(df),
-        'registros_eliminados': registros_originales - len(df),
-        'pct_eliminados': round((registros_originales - len(df)) / registros_originales * 100, 2),
-        'bancos': df['banco'].nunique(),
-        'fechas': df['fecha'].nunique(),
-        'fecha_min': df['fecha'].min(),
-        'fecha_max': df['fecha'].max(),
-        'indicadores_unicos': df['codigo'].nunique(),
-        'categorias': df['categoria'].unique().tolist(),
-    }
+    calidad = leer_calidad(directorio, 'camel')
+    if calidad is None:
+        # Version publicada antes de que el ETL limpiara los datos
+        df, calidad = limpiar_con_calidad(df, 'camel')
 
-    return df, calidad
+    return df, MappingProxyType(calidad)
 
 
-@st.cache_data(ttl=3600)
+@cache_por_huella()
 def cargar_metadata() -> Dict[str, Any]:
     """
     Carga metadata.json con informacion de la ultima actualizacion.
+
+    Con datos versionados incluye la clave 'version' (id de la publicacion).
     """
-    filepath = MASTER_DATA_DIR / "metadata.json"
+    filepath = directorio_servido() / "metadata.json"
 
     if not filepath.exists():
         return {'error': 'metadata.json no encontrado'}
@@ -193,61 +224,294 @@ def cargar_metadata() -> Dict[str, Any]:
         return json.load(f)
 
 
-@st.cache_data(ttl=3600)
-def cargar_todos_los_datos() -> Dict[str, Any]:
+# Datasets esenciales y su cargador
+DATASETS = ('balance', 'pyg', 'camel')
+
+
+def _cargador(dataset: str) -> Callable[..., Tuple[pd.DataFrame, Mapping[str, Any]]]:
+    return {'balance': cargar_balance, 'pyg': cargar_pyg, 'camel': cargar_camel}[dataset]
+
+
+@cache_por_huella(recurso=True)
+def cargar_calidad(dataset: str) -> Mapping[str, Any]:
     """
-    Carga todos los datasets de una vez con sus metricas de calidad.
+    Metricas de calidad de un dataset sin leer el dataset.
+
+    Lee calidad_<dataset>.json; las versiones publicadas sin ese archivo
+    cargan el dataset y calculan las metricas.
+    """
+    calidad = leer_calidad(directorio_servido(), dataset)
+    if calidad is None:
+        return _cargador(dataset)()[1]
+    return MappingProxyType(calidad)
+
+
+def precargar_datasets(
+    datasets: Sequence[str] = DATASETS,
+) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """
+    Lee varios datasets a la vez (un hilo por dataset) y deja cada uno en el
+    cache de su cargador.
+
+    pyarrow libera el GIL al leer y decodificar parquet, asi que en frio el
+    tiempo total queda acotado por el dataset mas grande y no por la suma.
+    Los datasets que ya estan en cache vuelven en microsegundos.
 
     Returns:
-        Dict con DataFrames y metricas consolidadas
+        (segundos por dataset, mas 'total'; error por dataset que fallo)
     """
-    resultado = {
-        'dataframes': {},
-        'calidad': {},
-        'metadata': None,
-        'errores': []
-    }
+    contexto = get_script_run_ctx()
+
+    def _medir(dataset: str) -> float:
+        # Los hilos del pool heredan la sesion para que st.cache_* no avise
+        add_script_run_ctx(threading.current_thread(), contexto)
+        inicio = time.perf_counter()
+        _cargador(dataset)()
+        return time.perf_counter() - inicio
+
+    tiempos, errores = {}, {}
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(datasets))) as pool:
+        # copy_context: los hilos leen la misma version que quien llama
+        # (ver preparando_version en utils/publicacion.py)
+        futuros = {d: pool.submit(contextvars.copy_context().run, _medir, d) for d in datasets}
+        for dataset, futuro in futuros.items():
+            try:
+                tiempos[dataset] = futuro.result()
+            except Exception as e:
+                errores[dataset] = str(e)
+    tiempos['total'] = time.perf_counter() - inicio
+    return tiempos, errores
+
+
+class DatosDiferidos(Mapping):
+    """
+    Mapping de solo lectura que carga cada clave recien al pedirla.
 
-    # Cargar solo los 3 datasets esenciales
-    try:
-        df_balance, cal_balance = cargar_balance()
-        resultado['dataframes']['balance'] = df_balance
-        resultado['calidad']['balance'] = cal_balance
-    except Exception as e:
-        resultado['errores'].append(f"balance: {str(e)}")
+    No guarda los valores: cada acceso llama a `cargar(clave)`, que se
+    espera cacheado (los cargadores de este modulo lo estan), de modo que
+    iterar las claves o preguntar `clave in datos` no lee nada.
+    """
 
-    try:
-        df_pyg, cal_pyg = cargar_pyg()
-        resultado['dataframes']['pyg'] = df_pyg
-        resultado['calidad']['pyg'] = cal_pyg
-    except Exception as e:
-        resultado['errores'].append(f"pyg: {str(e)}")
+    def __init__(self, claves: Sequence[str], cargar: Callable[[str], Any]):
+        self._claves = tuple(claves)
+        self._cargar = cargar
 
-    try:
-        df_camel, cal_camel = cargar_camel()
-        resultado['dataframes']['camel'] = df_camel
-        resultado['calidad']['camel'] = cal_camel
-    except Exception as e:
-        resultado['errores'].append(f"camel: {str(e)}")
+    def __getitem__(self, clave: str) -> Any:
+        if clave not in self._claves:
+            raise KeyError(clave)
+        return self._cargar(clave)
+
+    def __contains__(self, clave: object) -> bool:
+        return clave in self._claves
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._claves)
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+    def __repr__(self) -> str:
+        return f"DatosDiferidos({list(self._claves)})"
+
+
+@cache_por_huella(recurso=True)
+def cargar_todos_los_datos() -> Mapping[str, Any]:
+    """
+    Todos los datasets con sus metricas de calidad, cargados a demanda.
+
+    'dataframes' y 'calidad' son DatosDiferidos: un dataset se lee recien
+    cuando se pide `datos['dataframes'][nombre]`, y las metricas salen de
+    calidad_<dataset>.json sin leer el dataset. Abrir una pagina que usa
+    solo CAMEL no lee balance ni PYG.
+
+    Los datasets que no existen en la version publicada se omiten y se
+    informan en 'errores'; un error al leer un dataset que si existe se
+    propaga al pedirlo. Para leerlos todos de una vez (en paralelo, con
+    tiempos por dataset) ver precargar_datasets, que usa precalentar().
+
+    Returns:
+        Mapping de solo lectura con DataFrames, metricas consolidadas y
+        'errores' (tupla)
+    """
+    directorio = directorio_servido()
+    disponibles = [d for d in DATASETS if ruta_dataset(directorio, d).exists()]
+    errores = [f"{d}: no encontrado en {directorio}" for d in DATASETS if d not in disponibles]
+
+    resultado = {
+        'dataframes': DatosDiferidos(disponibles, lambda d: _cargador(d)()[0]),
+        'calidad': DatosDiferidos(disponibles, cargar_calidad),
+        'metadata': None,
+    }
 
     try:
         resultado['metadata'] = cargar_metadata()
     except Exception as e:
-        resultado['errores'].append(f"metadata: {str(e)}")
+        errores.append(f"metadata: {str(e)}")
+
+    # El resultado queda en cache y se comparte entre sesiones: nada mutable
+    resultado['errores'] = tuple(errores)
 
-    # Resumen consolidado
-    if resultado['dataframes']:
+    # Resumen consolidado (solo lee las metricas publicadas)
+    if disponibles:
         total_registros = sum(
             cal.get('registros_limpios', 0)
             for cal in resultado['calidad'].values()
         )
-        resultado['resumen'] = {
+        resultado['resumen'] = MappingProxyType({
             'total_registros': total_registros,
-            'datasets_cargados': len(resultado['dataframes']),
-            'errores_carga': len(resultado['errores']),
-        }
+            'datasets_cargados': len(disponibles),
+            'errores_carga': len(errores),
+        })
+
+    return MappingProxyType(resultado)
+
+
+@cache_por_huella()
+def obtener_orden_bancos_por_activos() -> list:
+    """
+    Bancos ordenados por activos totales (codigo '1') en la ultima fecha,
+    de mayor a menor.
+
+    Lee solo las filas de la cuenta '1' del balance (filtro en el lector
+    parquet), no el dataset completo.
+    """
+    df, _ = cargar_balance(codigos=('1',), columnas=('codigo', 'valor'))
+    if df.empty:
+        return []
+    df_activos = df[df['fecha'] == df['fecha'].max()]
+    return df_activos.sort_values('valor', ascending=False)['banco'].tolist()
+
+
+@cache_por_huella(recurso=True)
+def cargar_serie(
+    dataset: str,
+    codigo: str,
+    bancos: Optional[Tuple[str, ...]] = None,
+) -> pd.DataFrame:
+    """
+    Historia completa de un codigo para uno o varios bancos (formato largo).
+
+    Lee solo las filas (banco, codigo) pedidas de series_<dataset>; si la
+    version no las incluye filtra el dataset largo. En balance los meses
+    reportados sin valor para la cuenta vienen con 0.
+
+    Args:
+        dataset: 'balance', 'pyg' o 'camel'
+        codigo: Codigo de cuenta o indicador
+        bancos: Bancos a incluir (por defecto todos)
+    """
+    try:
+        return leer_series(directorio_servido(), dataset, codigos=[codigo], bancos=bancos)
+    except FileNotFoundError:
+        pass
+
+    df = _cargador(dataset)()[0]
+    df = df[df['codigo'] == codigo]
+    if bancos:
+        df = df[df['banco'].isin(bancos)]
+    if dataset == 'balance':
+        df = completar_ausentes(df, cargar_cobertura(bancos=bancos))
+    return df.sort_values(['banco', 'fecha'], ignore_index=True)
+
+
+@cache_por_huella(recurso=True)
+def cargar_cubo(dataset: str) -> CuboDatos:
+    """
+    Cubo banco x codigo x periodo de un dataset (ver utils/cubo.py).
+
+    Se comparte entre sesiones sin copiarse: los .npy publicados se mapean en
+    memoria. Si la version no incluye el cubo se arma desde el dataset largo.
+    """
+    try:
+        return CuboDatos.abrir(directorio_servido(), dataset)
+    except FileNotFoundError:
+        pass
 
-    return resultado
+    cobertura = cargar_cobertura() if dataset == 'balance' else None
+    return CuboDatos.desde_dataframe(_cargador(dataset)()[0], COLUMNAS_SERIE[dataset], cobertura)
+
+
+@cache_por_huella(recurso=True)
+def cargar_indice(dataset: str, **filtros) -> IndiceDatos:
+    """
+    Accesos indexados por codigo, mes y banco (ver utils/indice.py).
+
+    Se arma una vez por version publicada y por combinacion de filtros.
+
+    Args:
+        dataset: 'balance', 'pyg' o 'camel'
+        **filtros: Filtros del cargador del dataset (niveles, columnas...)
+    """
+    return IndiceDatos(_cargador(dataset)(**filtros)[0])
+
+
+# =============================================================================
+# MODELO DIMENSIONAL (dim_* + hechos_*)
+# =============================================================================
+
+@cache_por_huella(recurso=True)
+def _normalizar_planos() -> Mapping[str, pd.DataFrame]:
+    """Esquema estrella armado en memoria (versiones sin modelo dimensional)."""
+    return MappingProxyType(normalizar({'balance': cargar_balance()[0], 'pyg': cargar_pyg()[0]}))
+
+
+@cache_por_huella(recurso=True)
+def cargar_dimensiones() -> Mapping[str, pd.DataFrame]:
+    """
+    Carga dim_banco, dim_cuenta y dim_periodo.
+
+    Si la version publicada no incluye el modelo dimensional se arma a
+    partir de balance y pyg.
+    """
+    directorio = directorio_servido()
+    try:
+        return MappingProxyType({nombre: leer_dataset(directorio, nombre) for nombre in DIMENSIONES})
+    except FileNotFoundError:
+        planos = _normalizar_planos()
+        return MappingProxyType({nombre: planos[nombre] for nombre in DIMENSIONES})
+
+
+@cache_por_huella(recurso=True)
+def consultar_hechos(
+    dataset: str,
+    bancos: Optional[Tuple[str, ...]] = None,
+    codigos: Optional[Tuple[str, ...]] = None,
+    fechas: Optional[Tuple] = None,
+    rehidratado: bool = True,
+) -> pd.DataFrame:
+    """
+    Consulta la tabla de hechos de 'balance' o 'pyg' filtrando por claves.
+
+    Los filtros se traducen a claves enteras y se aplican al leer; los
+    nombres (banco, fecha, codigo, cuenta, nivel) se agregan solo a las filas
+    resultantes.
+
+    Args:
+        dataset: 'balance' o 'pyg'
+        bancos, codigos, fechas: Filtros opcionales
+        rehidratado: False para devolver solo claves y valores
+
+    Returns:
+        DataFrame con las columnas descriptivas y los valores del dataset
+    """
+    dimensiones = cargar_dimensiones()
+    claves = claves_filtro(dimensiones, bancos=bancos, codigos=codigos, fechas=fechas)
+
+    try:
+        filtro = None
+        for columna, ids in claves.items():
+            condicion = ds.field(columna).isin(ids)
+            filtro = condicion if filtro is None else filtro & condicion
+        hechos = leer_dataset(directorio_servido(), f"hechos_{dataset}", filtro=filtro)
+    except FileNotFoundError:
+        hechos = _normalizar_planos()[f"hechos_{dataset}"]
+        for columna, ids in claves.items():
+            hechos = hechos[hechos[columna].isin(ids)]
+
+    if not rehidratado:
+        return hechos.reset_index(drop=True)
+    return rehidratar(hechos.reset_index(drop=True), dimensiones)
 
 
 def obtener_fechas_disponibles(df: pd.DataFrame) -> list:
@@ -265,45 +529,81 @@ def obtener_bancos_disponibles(df: pd.DataFrame) -> list:
     return sorted(df['banco'].unique())
 
 
-def filtrar_por_fecha(df: pd.DataFrame, fecha) -> pd.DataFrame:
+def filtrar_por_fecha(df, fecha) -> pd.DataFrame:
     """
-    Filtra DataFrame por fecha especifica.
+    Filtra DataFrame por fecha especifica (por mes si hay columna periodo).
+
+    Con un IndiceDatos es un corte del indice por mes.
     """
+    if isinstance(df, IndiceDatos):
+        return df.fecha(fecha)
+    if 'periodo' in df.columns:
+        return df[df['periodo'] == fecha_a_periodo(fecha)].copy()
     return df[df['fecha'] == fecha].copy()
 
 
-def filtrar_por_banco(df: pd.DataFrame, banco: str) -> pd.DataFrame:
+def filtrar_por_periodos(df: pd.DataFrame, desde=None, hasta=None) -> pd.DataFrame:
+    """
+    Filtra DataFrame por rango de periodos (inclusive en ambos extremos).
+
+    desde/hasta aceptan un periodo entero o una fecha.
+    """
+    claves = df['periodo'] if 'periodo' in df.columns else fecha_a_periodo(df['fecha'])
+    mask = pd.Series(True, index=df.index)
+    if desde is not None:
+        mask &= claves >= como_periodo(desde)
+    if hasta is not None:
+        mask &= claves <= como_periodo(hasta)
+    return df[mask].copy()
+
+
+def filtrar_por_banco(df, banco: str) -> pd.DataFrame:
     """
-    Filtra DataFrame por banco especifico.
+    Filtra DataFrame (o IndiceDatos) por banco especifico.
     """
+    if isinstance(df, IndiceDatos):
+        return df.banco(banco)
     return df[df['banco'] == banco].copy()
 
 
-def filtrar_por_codigo(df: pd.DataFrame, codigo: str) -> pd.DataFrame:
+def filtrar_por_codigo(df, codigo: str) -> pd.DataFrame:
     """
-    Filtra DataFrame por codigo contable.
+    Filtra DataFrame (o IndiceDatos) por codigo contable.
     """
+    if isinstance(df, IndiceDatos):
+        return df.codigo(codigo)
     return df[df['codigo'] == codigo].copy()
 
 
 def obtener_valor_cuenta(
-    df: pd.DataFrame,
+    df,
     banco: str,
     fecha,
     codigo: str,
-    hoja: str = 'BAL'
+    hoja: str = 'BAL',
+    cobertura: Optional[pd.DataFrame] = None,
 ) -> float:
     """
     Obtiene el valor de una cuenta especifica para un banco y fecha.
-    """
-    mask = (
-        (df['banco'] == banco) &
-        (df['fecha'] == fecha) &
-        (df['codigo'] == codigo) &
-        (df['hoja'] == hoja)
-    )
-    resultado = df.loc[mask, 'valor']
 
-    if resultado.empty:
-        return None
-    return resultado.iloc[0]
+    Con `cobertura`, una cuenta ausente en un mes reportado por el banco
+    vale 0 en lugar de None. Con un IndiceDatos (sin columna hoja) la
+    busqueda es binaria en lugar de recorrer el DataFrame.
+    """
+    if isinstance(df, IndiceDatos):
+        valor = df.valor(banco, codigo, fecha)
+    else:
+        mask = (
+            (df['banco'] == banco) &
+            (df['fecha'] == fecha) &
+            (df['codigo'] == codigo) &
+            (df['hoja'] == hoja)
+        )
+        resultado = df.loc[mask, 'valor']
+        valor = None if resultado.empty else resultado.iloc[0]
+
+    if valor is None and cobertura is not None and (
+        (cobertura['banco'] == banco) & (cobertura['periodo'] == fecha_a_periodo(fecha))
+    ).any():
+        return 0.0
+    return valor
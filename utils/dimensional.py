@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo dimensional (esquema estrella) de balance y PYG.
+
+Los datasets planos repiten banco, codigo y nombre de cuenta en cada fila.
+Aqui se separan en:
+
+- dim_banco:   banco_id, banco
+- dim_cuenta:  cuenta_id, codigo, cuenta, nivel, padre
+- dim_periodo: periodo_id, fecha, ano, mes (periodo_id = columna 'periodo'
+               de los datasets planos, ver utils/periodos.py)
+- hechos_<dataset>: banco_id, cuenta_id, periodo_id + columnas de valor
+
+Las claves son enteros pequeños y las tablas de hechos no tienen texto. Los
+nombres se recuperan con rehidratar() solo sobre el resultado ya filtrado.
+
+dim_cuenta tiene una fila por combinacion (codigo, cuenta): si un codigo
+aparece con nombres distintos se conservan todos, de modo que la
+normalizacion no pierde informacion.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .extraccion import calcular_niveles
+from .periodos import COLUMNA_PERIODO, TIPO_PERIODO, fecha_a_periodo
+
+DIMENSIONES = ('dim_banco', 'dim_cuenta', 'dim_periodo')
+COLUMNAS_CLAVE = ('banco_id', 'cuenta_id', 'periodo_id')
+ORDEN_HECHOS = ('cuenta_id', 'periodo_id', 'banco_id')
+
+# Datasets planos que se normalizan y tablas que se publican a partir de ellos.
+# Las claves enteras se comparten entre todas las tablas: se reconstruyen juntas
+DATASETS_DIMENSIONALES = ('balance', 'pyg')
+TABLAS_MODELO = DIMENSIONES + tuple(f"hechos_{d}" for d in DATASETS_DIMENSIONALES)
+
+# Columnas descriptivas de los datasets planos (el resto son valores)
+_COLUMNAS_DESCRIPTIVAS = ('banco', 'fecha', COLUMNA_PERIODO, 'codigo', 'cuenta', 'nivel')
+
+# Longitudes de codigo de cada nivel de la jerarquia
+_LONGITUDES_NIVEL = (6, 4, 2, 1)
+
+
+def _periodos(df: pd.DataFrame) -> np.ndarray:
+    if COLUMNA_PERIODO in df.columns:
+        return df[COLUMNA_PERIODO].to_numpy(dtype=TIPO_PERIODO)
+    return fecha_a_periodo(df['fecha']).to_numpy()
+
+
+def calcular_padres(codigos: pd.Series) -> pd.Series:
+    """
+    Codigo padre de cada cuenta: el prefijo mas largo (6, 4, 2 o 1 digitos)
+    que existe entre `codigos`. None para cuentas raiz o no numericas.
+    """
+    codigos = codigos.astype(str)
+    existentes = set(codigos)
+    longitud = codigos.str.len()
+    numerico = codigos.str.isdigit()
+    padres = pd.Series(None, index=codigos.index, dtype=object)
+
+    for largo in _LONGITUDES_NIVEL:
+        prefijo = codigos.str[:largo]
+        candidato = numerico & (longitud > largo) & padres.isna() & prefijo.isin(existentes)
+        padres[candidato] = prefijo[candidato]
+
+    return padres
+
+
+def construir_dim_banco(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    bancos = sorted(set().union(*(set(df['banco'].astype(str).unique()) for df in frames)))
+    return pd.DataFrame({
+        'banco_id': np.arange(len(bancos), dtype='int16'),
+        'banco': bancos,
+    })
+
+
+def construir_dim_cuenta(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    pares = pd.concat(
+        [df[['codigo', 'cuenta']].astype(str).drop_duplicates() for df in frames],
+        ignore_index=True
+    ).drop_duplicates().sort_values(['codigo', 'cuenta'], ignore_index=True)
+
+    pares.insert(0, 'cuenta_id', np.arange(len(pares), dtype='int32'))
+    pares['nivel'] = calcular_niveles(pares['codigo'])
+    pares['padre'] = calcular_padres(pares['codigo'])
+    return pares
+
+
+def construir_dim_periodo(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    fechas = pd.Series(pd.concat([df['fecha'] for df in frames]).dropna().unique())
+    periodos = pd.DataFrame({'periodo_id': fecha_a_periodo(fechas), 'fecha': fechas})
+    # Una fila por mes aunque alguna hoja traiga otro dia del mes
+    periodos = (periodos.sort_values('fecha')
+                .drop_duplicates('periodo_id', keep='last')
+                .sort_values('periodo_id', ignore_index=True))
+    periodos['ano'] = periodos['fecha'].dt.year.astype('int16')
+    periodos['mes'] = periodos['fecha'].dt.month.astype('int8')
+    return periodos
+
+
+def normalizar(datasets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Convierte datasets planos (balance, pyg, ...) al esquema estrella.
+
+    Args:
+        datasets: nombre -> DataFrame con banco, fecha, codigo, cuenta y valores
+
+    Returns:
+        Dict con dim_banco, dim_cuenta, dim_periodo y hechos_<nombre>
+
+    Raises:
+        ValueError: si alguna fila no encuentra su clave
+    """
+    frames = list(datasets.values())
+    dim_banco = construir_dim_banco(frames)
+    dim_cuenta = construir_dim_cuenta(frames)
+    dim_periodo = construir_dim_periodo(frames)
+
+    indice_cuenta = pd.MultiIndex.from_frame(dim_cuenta[['codigo', 'cuenta']])
+    resultado = {'dim_banco': dim_banco, 'dim_cuenta': dim_cuenta, 'dim_periodo': dim_periodo}
+
+    for nombre, df in datasets.items():
+        banco_id = pd.Categorical(df['banco'].astype(str), categories=dim_banco['banco']).codes
+        cuenta_id = indice_cuenta.get_indexer(
+            pd.MultiIndex.from_arrays([df['codigo'].astype(str), df['cuenta'].astype(str)])
+        )
+        if (banco_id < 0).any() or (cuenta_id < 0).any():
+            raise ValueError(f"{nombre}: filas sin clave de banco o cuenta")
+
+        hechos = pd.DataFrame({
+            'banco_id': banco_id.astype('int16'),
+            'cuenta_id': cuenta_id.astype('int32'),
+            'periodo_id': _periodos(df),
+        })
+        for columna in df.columns:
+            if columna not in _COLUMNAS_DESCRIPTIVAS:
+                hechos[columna] = df[columna].to_numpy()
+
+        resultado[f"hechos_{nombre}"] = hechos
+
+    return resultado
+
+
+def ids_bancos(dim_banco: pd.DataFrame, bancos: Sequence[str]) -> list:
+    return dim_banco.loc[dim_banco['banco'].isin(bancos), 'banco_id'].tolist()
+
+
+def ids_cuentas(dim_cuenta: pd.DataFrame, codigos: Sequence[str]) -> list:
+    return dim_cuenta.loc[dim_cuenta['codigo'].isin([str(c) for c in codigos]), 'cuenta_id'].tolist()
+
+
+def ids_periodos(dim_periodo: pd.DataFrame, fechas: Sequence) -> list:
+    claves = fecha_a_periodo(pd.Series(pd.to_datetime(list(fechas))))
+    return dim_periodo.loc[dim_periodo['periodo_id'].isin(claves), 'periodo_id'].tolist()
+
+
+def claves_filtro(
+    dimensiones: Dict[str, pd.DataFrame],
+    bancos: Optional[Sequence[str]] = None,
+    codigos: Optional[Sequence[str]] = None,
+    fechas: Optional[Sequence] = None,
+) -> Dict[str, list]:
+    """Traduce filtros por nombre a listas de claves: columna_id -> ids."""
+    claves = {}
+    if bancos is not None:
+        claves['banco_id'] = ids_bancos(dimensiones['dim_banco'], bancos)
+    if codigos is not None:
+        claves['cuenta_id'] = ids_cuentas(dimensiones['dim_cuenta'], codigos)
+    if fechas is not None:
+        claves['periodo_id'] = ids_periodos(dimensiones['dim_periodo'], fechas)
+    return claves
+
+
+def rehidratar(
+    hechos: pd.DataFrame,
+    dimensiones: Dict[str, pd.DataFrame],
+    columnas: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Agrega banco, fecha, periodo, codigo, cuenta y nivel a un resultado de
+    hechos (periodo es directamente periodo_id).
+
+    Pensado para resultados pequeños (ya filtrados o agregados): solo se
+    buscan las claves presentes en `hechos`.
+
+    Args:
+        hechos: Filas con banco_id, cuenta_id y/o periodo_id
+        dimensiones: dim_banco, dim_cuenta, dim_periodo
+        columnas: Columnas descriptivas a agregar (por defecto todas)
+    """
+    columnas = columnas or _COLUMNAS_DESCRIPTIVAS
+    df = pd.DataFrame(index=hechos.index)
+
+    fuentes = {
+        'banco': ('banco_id', 'dim_banco'),
+        'fecha': ('periodo_id', 'dim_periodo'),
+        COLUMNA_PERIODO: ('periodo_id', 'dim_periodo'),
+        'codigo': ('cuenta_id', 'dim_cuenta'),
+        'cuenta': ('cuenta_id', 'dim_cuenta'),
+        'nivel': ('cuenta_id', 'dim_cuenta'),
+    }
+    for columna in columnas:
+        clave, dimension = fuentes[columna]
+        if clave not in hechos.columns:
+            continue
+        if columna == COLUMNA_PERIODO:
+            df[columna] = hechos[clave].to_numpy(dtype=TIPO_PERIODO)
+            continue
+        dim = dimensiones[dimension]
+        posiciones = pd.Index(dim[clave]).get_indexer(hechos[clave])
+        df[columna] = dim[columna].to_numpy()[posiciones]
+
+    valores = [c for c in hechos.columns if c not in COLUMNAS_CLAVE]
+    return pd.concat([df, hechos[valores]], axis=1)
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Extractor generico de hojas Excel a formato largo.
+
+Convierte cada hoja descrita por una EspecHoja (config/hojas_excel.py) en un
+DataFrame largo con operaciones vectorizadas: los valores se leen como un
+bloque filas x fechas y se aplanan con np.repeat/np.tile, sin recorrer celda
+por celda. Cada libro se abre una sola vez y de esa lectura salen todas las
+hojas pedidas.
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.hojas_excel import EspecHoja
+
+from .periodos import COLUMNA_PERIODO, fecha_a_periodo
+
+_PATRON_MES_ANO = re.compile(
+    r'\s+(ENERO|FEBRERO|MARZO|ABRIL|MAYO|JUNIO|JULIO|AGOSTO|SEPTIEMBRE|OCTUBRE|NOVIEMBRE|DICIEMBRE)\s+\d{4}$',
+    flags=re.IGNORECASE
+)
+
+
+def extraer_nombre_banco(carpeta: str) -> str:
+    """Extrae nombre del banco de la carpeta ("Banco MES AÑO" -> "Banco")."""
+    return _PATRON_MES_ANO.sub('', carpeta).strip()
+
+
+def indice_columna(letra: str) -> int:
+    """Letra de columna Excel a indice base 0 ('A' -> 0, 'AA' -> 26)."""
+    indice = 0
+    for c in letra.strip().upper():
+        indice = indice * 26 + (ord(c) - ord('A') + 1)
+    return indice - 1
+
+
+def calcular_niveles(codigos: pd.Series) -> np.ndarray:
+    """Nivel jerarquico segun cantidad de digitos (0 si el codigo no es numerico)."""
+    limpio = codigos.str.replace('.', '', regex=False).str.replace(' ', '', regex=False)
+    longitud = limpio.str.len().to_numpy()
+    niveles = np.select(
+        [longitud <= 1, longitud <= 2, longitud <= 4, longitud <= 6],
+        [1, 2, 3, 4],
+        default=5
+    )
+    return np.where(limpio.str.isdigit().to_numpy(dtype=bool), niveles, 0).astype('int8')
+
+
+def _a_fecha(valor) -> pd.Timestamp:
+    if isinstance(valor, datetime):
+        return pd.Timestamp(valor)
+    if isinstance(valor, str):
+        try:
+            return pd.Timestamp(valor)
+        except ValueError:
+            return pd.NaT
+    return pd.NaT
+
+
+def _normalizar_nombre(nombres: pd.Series) -> pd.Series:
+    """Mayusculas sin tildes, para buscar las claves de filas resumen."""
+    return (nombres.str.upper()
+            .str.replace('Á', 'A').str.replace('É', 'E').str.replace('Í', 'I')
+            .str.replace('Ó', 'O').str.replace('Ú', 'U').str.replace('Ñ', 'N'))
+
+
+def _a_numerico(bloque: pd.DataFrame, coma_decimal: bool) -> np.ndarray:
+    """Bloque de celdas a matriz float64 (NaN donde no hay un numero)."""
+    columnas = []
+    for _, columna in bloque.items():
+        if coma_decimal and columna.dtype == object:
+            columna = columna.where(~columna.map(lambda v: isinstance(v, str)),
+                                    columna.astype(str).str.replace(',', '.', regex=False))
+        columnas.append(pd.to_numeric(columna, errors='coerce').to_numpy(dtype='float64'))
+    if not columnas:
+        return np.empty((len(bloque), 0))
+    return np.column_stack(columnas)
+
+
+def _etiquetas_por_codigo(bloque: pd.DataFrame, espec: EspecHoja) -> Tuple[pd.Series, pd.Series, dict]:
+    """Codigo y nombre de cada fila leidos de las columnas de la hoja."""
+    codigos_raw = bloque.iloc[:, indice_columna(espec.col_codigo)]
+    nombres_raw = bloque.iloc[:, indice_columna(espec.col_nombre)]
+
+    codigos = codigos_raw.astype(str).str.strip().where(codigos_raw.notna(), '')
+    nombres = nombres_raw.astype(str).str.strip().where(nombres_raw.notna(), '')
+
+    conservar = (codigos != '') | (nombres != '')
+    if espec.requiere_codigo:
+        conservar &= codigos_raw.notna()
+    if espec.requiere_nombre:
+        conservar &= nombres_raw.notna()
+    if espec.codigos_descartar:
+        conservar &= ~codigos.isin(espec.codigos_descartar)
+
+    if espec.codigos_resumen:
+        es_resumen = codigos == espec.marcador_resumen
+        resumen = pd.Series(None, index=codigos.index, dtype=object)
+        nombre_limpio = _normalizar_nombre(nombres[es_resumen])
+        for clave, codigo in espec.codigos_resumen.items():
+            coincide = nombre_limpio.str.contains(clave, regex=False) & resumen[es_resumen].isna()
+            resumen[coincide[coincide].index] = codigo
+        codigos = codigos.where(~es_resumen, resumen)
+        conservar &= ~(es_resumen & resumen.isna())
+
+    return codigos[conservar], nombres[conservar], {}
+
+
+def _etiquetas_por_fila(df_raw: pd.DataFrame, espec: EspecHoja) -> Tuple[pd.DataFrame, pd.Series, pd.Series, dict]:
+    """Codigo y nombre fijos por fila (hojas sin columna de codigo, como CAMEL)."""
+    filas = {f: v for f, v in espec.filas.items() if f - 1 < len(df_raw)}
+    bloque = df_raw.iloc[[f - 1 for f in filas]]
+    codigos = pd.Series([v[0] for v in filas.values()], index=bloque.index)
+    nombres = pd.Series([v[1] for v in filas.values()], index=bloque.index)
+    extras = {'categoria': np.array([v[3] for v in filas.values()], dtype=object)}
+    return bloque, codigos, nombres, extras
+
+
+def extraer_hoja(df_raw: pd.DataFrame, espec: EspecHoja, banco: str) -> pd.DataFrame:
+    """
+    Convierte una hoja leida sin encabezado a formato largo.
+
+    Args:
+        df_raw: Hoja completa (pd.read_excel(..., header=None))
+        espec: Estructura de la hoja
+        banco: Nombre del banco
+
+    Returns:
+        DataFrame con columnas: banco, fecha, periodo, codigo, <columna_nombre>,
+        <columna_valor> [, nivel] [, categoria] [, hoja]
+    """
+    col_valores = indice_columna(espec.col_valores)
+
+    # Fechas de la cabecera
+    fechas = df_raw.iloc[espec.fila_fechas - 1, col_valores:].map(_a_fecha)
+    validas = fechas.notna().to_numpy()
+    if espec.fechas_contiguas:
+        validas = np.logical_and.accumulate(validas)
+    if not validas.any():
+        return pd.DataFrame()
+
+    posiciones = col_valores + np.flatnonzero(validas)
+    fechas = pd.DatetimeIndex(fechas[validas].to_numpy())
+
+    # Etiquetas de cada fila
+    if espec.filas:
+        bloque, codigos, nombres, extras = _etiquetas_por_fila(df_raw, espec)
+    else:
+        bloque = df_raw.iloc[espec.fila_inicio - 1:espec.fila_fin]
+        codigos, nombres, extras = _etiquetas_por_codigo(bloque, espec)
+        bloque = bloque.loc[codigos.index]
+
+    if bloque.empty:
+        return pd.DataFrame()
+
+    valores = _a_numerico(bloque.iloc[:, posiciones], espec.coma_decimal)
+    n_filas, n_fechas = valores.shape
+
+    df = pd.DataFrame({
+        'banco': banco,
+        'fecha': np.tile(fechas.to_numpy(), n_filas),
+        COLUMNA_PERIODO: np.tile(fecha_a_periodo(fechas).to_numpy(), n_filas),
+        'codigo': np.repeat(codigos.to_numpy(dtype=object), n_fechas),
+        espec.columna_nombre: np.repeat(nombres.to_numpy(dtype=object), n_fechas),
+        espec.columna_valor: valores.ravel(),
+    })
+
+    if espec.calcular_nivel:
+        df['nivel'] = np.repeat(calcular_niveles(codigos), n_fechas)
+    for columna, datos in extras.items():
+        df[columna] = np.repeat(datos, n_fechas)
+    if espec.incluir_hoja:
+        df['hoja'] = espec.hoja
+
+    if not espec.conservar_nulos:
+        df = df[df[espec.columna_valor].notna()]
+
+    return df.reset_index(drop=True)
+
+
+def extraer_libro(ruta_excel: Path, especs: Sequence[EspecHoja], banco: str = None) -> Dict[str, pd.DataFrame]:
+    """
+    Extrae todas las hojas de `especs` de un libro, leyendolo una sola vez.
+
+    Returns:
+        Dict dataset -> DataFrame largo (solo datasets con registros)
+    """
+    ruta_excel = Path(ruta_excel)
+    banco = banco or extraer_nombre_banco(ruta_excel.parent.name)
+
+    with pd.ExcelFile(ruta_excel) as libro:
+        disponibles = set(libro.sheet_names)
+        hojas = list(dict.fromkeys(e.hoja for e in especs if e.hoja in disponibles))
+        crudas = libro.parse(sheet_name=hojas, header=None) if hojas else {}
+
+    partes: Dict[str, List[pd.DataFrame]] = {}
+    for espec in especs:
+        if espec.hoja not in crudas:
+            print(f"  [AVISO] {banco}: no existe la hoja {espec.hoja}")
+            continue
+        try:
+            df = extraer_hoja(crudas[espec.hoja], espec, banco)
+        except Exception as e:
+            print(f"  [ERROR] {banco} - {espec.hoja}: {e}")
+            continue
+        if df.empty:
+            print(f"  [AVISO] {banco}: sin datos en {espec.hoja}")
+            continue
+        partes.setdefault(espec.dataset, []).append(df)
+
+    return {dataset: pd.concat(dfs, ignore_index=True) for dataset, dfs in partes.items()}
+
+
+def consolidar(partes: Iterable[pd.DataFrame], espec: EspecHoja) -> pd.DataFrame:
+    """Une los DataFrames de un dataset y aplica la consolidacion de su espec."""
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame()
+
+    df = pd.concat(partes, ignore_index=True)
+    if espec.deduplicar:
+        df = df.drop_duplicates(subset=['banco', 'fecha', 'codigo'], keep='first')
+    if espec.orden:
+        df = df.sort_values(list(espec.orden))
+    for columna, tipo in espec.tipos:
+        df[columna] = df[columna].astype(tipo)
+    return df
+
+
+def buscar_libros(excel_dir: Path) -> List[Tuple[str, Path]]:
+    """(banco, archivo) por cada carpeta de banco con un Excel."""
+    libros = []
+    for carpeta in sorted(d for d in Path(excel_dir).iterdir() if d.is_dir()):
+        excels = sorted(carpeta.glob("*.xlsx")) + sorted(carpeta.glob("*.xls"))
+        libros.append((extraer_nombre_banco(carpeta.name), excels[0] if excels else None))
+    return libros
+
+
+def _extraer_libro_seguro(banco: str, ruta: Optional[Path], especs: Sequence[EspecHoja]):
+    if ruta is None:
+        return {}, "No se encontro archivo Excel"
+    try:
+        return extraer_libro(ruta, especs, banco), None
+    except Exception as e:
+        return {}, str(e)
+
+
+def extraer_directorio(
+    excel_dir: Path,
+    especs: Sequence[EspecHoja],
+    workers: int = 1,
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, List[str]]]]:
+    """
+    Extrae las hojas de `especs` de todos los bancos de excel_dir.
+
+    Cada libro se lee una sola vez; con workers > 1 los libros se procesan
+    en paralelo en procesos separados.
+
+    Returns:
+        Tuple[dict, dict]: dataset -> DataFrame consolidado, y
+        dataset -> {'bancos_procesados': [...], 'bancos_error': [...]}
+    """
+    libros = buscar_libros(excel_dir)
+    datasets = list(dict.fromkeys(e.dataset for e in especs))
+    partes: Dict[str, List[pd.DataFrame]] = {d: [] for d in datasets}
+    reporte = {d: {'bancos_procesados': [], 'bancos_error': []} for d in datasets}
+
+    if not libros:
+        print(f"[ERROR] No se encontraron carpetas en {excel_dir}")
+        return {}, reporte
+
+    print(f"\n[INFO] Encontrados {len(libros)} bancos\n")
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [pool.submit(_extraer_libro_seguro, banco, ruta, especs) for banco, ruta in libros]
+            resultados = [f.result() for f in futuros]
+    else:
+        resultados = (_extraer_libro_seguro(banco, ruta, especs) for banco, ruta in libros)
+
+    for i, ((banco, _), (por_dataset, error)) in enumerate(zip(libros, resultados), 1):
+        if error:
+            print(f"[{i:2}/{len(libros)}] {banco}... [ERROR] {error}")
+        else:
+            total = sum(len(df) for df in por_dataset.values())
+            print(f"[{i:2}/{len(libros)}] {banco}... [OK] {total:,} registros")
+        for dataset in datasets:
+            if dataset in por_dataset:
+                partes[dataset].append(por_dataset[dataset])
+                reporte[dataset]['bancos_procesados'].append(banco)
+            else:
+                reporte[dataset]['bancos_error'].append(banco)
+
+    primera_espec = {}
+    for espec in especs:
+        primera_espec.setdefault(espec.dataset, espec)
+
+    resultado = {}
+    for dataset in datasets:
+        df = consolidar(partes[dataset], primera_espec[dataset])
+        if not df.empty:
+            resultado[dataset] = df
+    return resultado, reporte
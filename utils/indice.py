@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Accesos indexados a un dataset largo (balance, pyg o camel).
+
+Filtrar con mascaras (df[(df['codigo'] == c) & (df['fecha'] == f)]) recorre
+el dataset completo en cada consulta. IndiceDatos ordena el dataset una sola
+vez por (codigo, periodo, banco), el mismo orden en que se publica, y guarda
+donde empieza y termina cada codigo. Las consultas pasan a ser cortes:
+
+- un codigo es un rango contiguo de filas (df.iloc[a:b], sin copiar)
+- un codigo en un mes es una busqueda binaria dentro de ese rango
+- un banco o un mes usan indices secundarios armados al crear el objeto
+
+Se arma una vez por version publicada (ver cargar_indice en data_loader) y
+se comparte entre sesiones: los DataFrames devueltos son cortes de solo
+lectura del dataset compartido.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .periodos import COLUMNA_PERIODO, agregar_periodo, como_periodo
+
+_COLUMNAS_NOMBRE = ('cuenta', 'indicador')
+
+
+def _grupos(claves: np.ndarray) -> Tuple[np.ndarray, Dict]:
+    """Orden estable por clave y rango [inicio, fin) de cada clave en ese orden."""
+    orden = np.argsort(claves, kind='stable')
+    ordenadas = claves[orden]
+    valores, inicios = np.unique(ordenadas, return_index=True)
+    fines = np.append(inicios[1:], len(ordenadas))
+    return orden, {v: (int(a), int(b)) for v, a, b in zip(valores.tolist(), inicios, fines)}
+
+
+class IndiceDatos:
+    """Dataset largo ordenado por (codigo, periodo, banco) con cortes por clave."""
+
+    def __init__(self, df: pd.DataFrame):
+        df = agregar_periodo(df)
+        codigos = df['codigo'].astype(str).to_numpy(dtype=object)
+        periodos = df[COLUMNA_PERIODO].to_numpy(dtype='int64')
+        bancos = df['banco'].astype(str).to_numpy(dtype=object)
+
+        orden = np.lexsort((pd.factorize(bancos, sort=True)[0], periodos,
+                            pd.factorize(codigos, sort=True)[0]))
+        if not (orden == np.arange(len(orden))).all():
+            # Datos publicados antes de ORDEN_ESCRITURA: se ordenan una vez
+            df = df.take(orden).reset_index(drop=True)
+            codigos, periodos, bancos = codigos[orden], periodos[orden], bancos[orden]
+        else:
+            df = df.reset_index(drop=True)
+
+        self.df = df
+        self._periodos = periodos
+        self._bancos = bancos
+
+        valores, inicios = np.unique(codigos, return_index=True)
+        fines = np.append(inicios[1:], len(codigos))
+        self._codigos = {c: (int(a), int(b)) for c, a, b in zip(valores.tolist(), inicios, fines)}
+
+        self._orden_periodo, self._rango_periodo = _grupos(periodos)
+        self._orden_banco, self._rango_banco = _grupos(bancos)
+
+    # -------------------------------------------------------------------------
+    # Propiedades
+    # -------------------------------------------------------------------------
+
+    @property
+    def codigos(self) -> List[str]:
+        return list(self._codigos)
+
+    @property
+    def bancos(self) -> List[str]:
+        return list(self._rango_banco)
+
+    @property
+    def fechas(self) -> List[pd.Timestamp]:
+        """Fechas disponibles (una por mes), de la mas antigua a la mas reciente."""
+        fechas = self.df['fecha'].to_numpy()
+        return [pd.Timestamp(fechas[self._orden_periodo[a:b]].max())
+                for a, b in self._rango_periodo.values()]
+
+    # -------------------------------------------------------------------------
+    # Cortes
+    # -------------------------------------------------------------------------
+
+    def _limites(self, codigo: str, desde=None, hasta=None) -> Tuple[int, int]:
+        a, b = self._codigos.get(str(codigo), (0, 0))
+        periodos = self._periodos[a:b]
+        inicio = a + int(np.searchsorted(periodos, como_periodo(desde), 'left')) if desde is not None else a
+        fin = a + int(np.searchsorted(periodos, como_periodo(hasta), 'right')) if hasta is not None else b
+        return inicio, max(inicio, fin)
+
+    def codigo(self, codigo: str) -> pd.DataFrame:
+        """Todas las filas de un codigo."""
+        a, b = self._limites(codigo)
+        return self.df.iloc[a:b]
+
+    def rango(self, codigo: str, desde=None, hasta=None) -> pd.DataFrame:
+        """Filas de un codigo entre dos meses inclusive (fechas o periodos)."""
+        a, b = self._limites(codigo, desde, hasta)
+        return self.df.iloc[a:b]
+
+    def corte(self, codigo: str, fecha) -> pd.DataFrame:
+        """Filas de un codigo en un mes (una por banco)."""
+        a, b = self._limites(codigo, fecha, fecha)
+        return self.df.iloc[a:b]
+
+    def fecha(self, fecha) -> pd.DataFrame:
+        """Todas las filas de un mes."""
+        a, b = self._rango_periodo.get(como_periodo(fecha), (0, 0))
+        return self.df.take(self._orden_periodo[a:b])
+
+    def banco(self, banco: str) -> pd.DataFrame:
+        """Todas las filas de un banco."""
+        a, b = self._rango_banco.get(str(banco), (0, 0))
+        return self.df.take(self._orden_banco[a:b])
+
+    def valor(self, banco: str, codigo: str, fecha, columna: str = 'valor') -> Optional[float]:
+        """Valor de un banco, codigo y mes (None si no hay fila)."""
+        a, b = self._limites(codigo, fecha, fecha)
+        i = a + int(np.searchsorted(self._bancos[a:b], str(banco)))
+        if i >= b or self._bancos[i] != str(banco):
+            return None
+        return self.df[columna].iat[i]
+
+    def nombre(self, codigo: str) -> str:
+        """Nombre de la cuenta o indicador (el codigo si no existe)."""
+        a, b = self._limites(codigo)
+        columna = next((c for c in _COLUMNAS_NOMBRE if c in self.df.columns), None)
+        if a == b or columna is None:
+            return codigo
+        return self.df[columna].iat[b - 1]
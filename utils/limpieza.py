@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Limpieza de datasets y metricas de calidad publicadas.
+
+La limpieza (cuentas/indicadores vacios, banco o fecha nulos) se hace una
+sola vez en el ETL. Las metricas de calidad se calculan en ese momento y se
+publican junto al dataset como calidad_<dataset>.json, de modo que los
+cargadores del dashboard leen el parquet tal cual: sin copiar el DataFrame,
+sin recorrer columnas de texto y sin calcular nunique/min/max en cada carga.
+
+Versiones publicadas antes de este cambio no traen el archivo; para ellas
+los cargadores aplican limpiar_dataset() y calcular_calidad() al leer.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from .periodos import agregar_periodo
+
+PREFIJO_CALIDAD = 'calidad_'
+
+# Columna de nombre que no puede venir vacia, por dataset
+COLUMNA_NOMBRE = {
+    'balance': 'cuenta',
+    'pyg': 'cuenta',
+    'camel': 'indicador',
+}
+
+# Metricas de fecha: se guardan como texto ISO y se devuelven como Timestamp
+_METRICAS_FECHA = ('fecha_min', 'fecha_max')
+
+
+def nombre_calidad(dataset: str) -> str:
+    return f"{PREFIJO_CALIDAD}{dataset}"
+
+
+def ruta_calidad(directorio: Path, dataset: str) -> Path:
+    return Path(directorio) / f"{nombre_calidad(dataset)}.json"
+
+
+def limpiar_dataset(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """
+    Quita filas sin nombre de cuenta/indicador o sin banco/fecha, convierte
+    la fecha a datetime y agrega la clave de periodo si falta.
+
+    Las columnas que no esten en `df` (lecturas proyectadas) se omiten.
+    """
+    columna = COLUMNA_NOMBRE[dataset]
+    if columna in df.columns:
+        df = df[df[columna].fillna('').str.strip() != '']
+
+    df = df.dropna(subset=[c for c in ('banco', 'fecha') if c in df.columns])
+
+    if 'fecha' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['fecha']):
+        df = df.assign(fecha=pd.to_datetime(df['fecha']))
+
+    return agregar_periodo(df)
+
+
+def calcular_calidad(df: pd.DataFrame, dataset: str, registros_originales: int) -> Dict[str, Any]:
+    """
+    Metricas de calidad de un dataset limpio.
+
+    Args:
+        df: Dataset despues de limpiar_dataset()
+        dataset: 'balance', 'pyg' o 'camel'
+        registros_originales: Registros antes de limpiar
+    """
+    registros = len(df)
+    calidad = {
+        'registros_originales': int(registros_originales),
+        'registros_limpios': registros,
+        'registros_eliminados': int(registros_originales - registros),
+        'pct_eliminados': round((registros_originales - registros) / registros_originales * 100, 2) if registros_originales else 0.0,
+        'bancos': int(df['banco'].nunique()),
+        'fechas': int(df['fecha'].nunique()),
+        'fecha_min': df['fecha'].min(),
+        'fecha_max': df['fecha'].max(),
+    }
+
+    if dataset == 'balance':
+        calidad['nulos_valor'] = int(df['valor'].isna().sum()) if 'valor' in df.columns else 0
+        calidad['nulos_codigo'] = int(df['codigo'].isna().sum()) if 'codigo' in df.columns else 0
+    elif dataset == 'pyg':
+        calidad['cuentas_unicas'] = int(df['codigo'].nunique()) if 'codigo' in df.columns else 0
+        if 'valor_12m' in df.columns:
+            con_12m = int(df['valor_12m'].notna().sum())
+            calidad['registros_con_12m'] = con_12m
+            calidad['pct_con_12m'] = round(con_12m / registros * 100, 1) if registros else 0.0
+    elif dataset == 'camel':
+        calidad['indicadores_unicos'] = int(df['codigo'].nunique()) if 'codigo' in df.columns else 0
+        calidad['categorias'] = df['categoria'].unique().tolist() if 'categoria' in df.columns else []
+
+    return calidad
+
+
+def limpiar_con_calidad(df: pd.DataFrame, dataset: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """limpiar_dataset() + calcular_calidad() sobre el resultado."""
+    registros_originales = len(df)
+    df = limpiar_dataset(df, dataset)
+    return df, calcular_calidad(df, dataset, registros_originales)
+
+
+def escribir_calidad(calidad: Dict[str, Any], directorio: Path, dataset: str) -> Path:
+    """Escribe calidad_<dataset>.json."""
+    ruta = ruta_calidad(directorio, dataset)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    datos = dict(calidad)
+    for clave in _METRICAS_FECHA:
+        if pd.notna(datos.get(clave)):
+            datos[clave] = pd.Timestamp(datos[clave]).isoformat()
+        else:
+            datos[clave] = None
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    return ruta
+
+
+def leer_calidad(directorio: Path, dataset: str) -> Optional[Dict[str, Any]]:
+    """Metricas publicadas de un dataset, o None si la version no las incluye."""
+    ruta = ruta_calidad(directorio, dataset)
+    if not ruta.exists():
+        return None
+    with open(ruta, 'r', encoding='utf-8') as f:
+        calidad = json.load(f)
+    for clave in _METRICAS_FECHA:
+        calidad[clave] = pd.Timestamp(calidad[clave]) if calidad.get(clave) else pd.NaT
+    return calidad
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Memoria que ocupan los datasets cargados.
+
+reporte_memoria() devuelve, por dataset, filas y bytes por columna
+(memory_usage(deep=True): incluye el contenido de las columnas de texto),
+mas el RSS del proceso, lo que ocupa la cache de resultados (en memoria y
+en disco) y los contadores de cada funcion cacheada (estadisticas_cache:
+llamadas, aciertos, fallos, lecturas de disco, desalojos). Lo usan la
+seccion de memoria de Inicio.py y scripts/memoria.py (tabla o JSON), para
+dimensionar contenedores, comprobar que los cambios de almacenamiento bajan
+la memoria de verdad y ver si el presupuesto de la cache alcanza.
+
+Los datasets se miden tal como los entregan los cargadores: si no estaban
+en cache, medirlos los carga. Los cubos no se cuentan (son arreglos
+mapeados desde disco; el sistema solo trae a memoria las paginas que se
+leen, y eso si aparece en el RSS).
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .cache import POLITICA, cache_por_huella, estadisticas_cache, uso_cache_disco
+from .data_loader import DATASETS, cargar_todos_los_datos
+from .publicacion import huella_servida
+
+_ESTADO_PROCESO = Path('/proc/self/status')
+
+
+def memoria_proceso() -> Dict[str, Optional[int]]:
+    """
+    RSS actual y maximo del proceso en bytes (None si el sistema no lo
+    informa: el actual sale de /proc, solo Linux).
+    """
+    rss = None
+    try:
+        for linea in _ESTADO_PROCESO.read_text().splitlines():
+            if linea.startswith('VmRSS:'):
+                rss = int(linea.split()[1]) * 1024
+                break
+    except OSError:
+        pass
+
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB; macOS, bytes
+        pico = pico if sys.platform == 'darwin' else pico * 1024
+    except ImportError:
+        pico = None
+
+    return {'rss_bytes': rss, 'rss_pico_bytes': pico}
+
+
+def memoria_columnas(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Bytes (deep) y dtype por columna, de la que mas ocupa a la que menos."""
+    bytes_columna = df.memory_usage(deep=True, index=False)
+    total = int(bytes_columna.sum()) or 1
+    columnas = [
+        {
+            'columna': columna,
+            'dtype': str(df[columna].dtype),
+            'bytes': int(bytes_columna[columna]),
+            'pct': round(bytes_columna[columna] / total * 100, 1),
+        }
+        for columna in df.columns
+    ]
+    return sorted(columnas, key=lambda c: c['bytes'], reverse=True)
+
+
+def memoria_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """Filas, bytes totales (deep, con el indice) y detalle por columna."""
+    total = int(df.memory_usage(deep=True, index=True).sum())
+    return {
+        'filas': len(df),
+        'bytes': total,
+        'bytes_por_fila': round(total / len(df), 1) if len(df) else 0.0,
+        'columnas': memoria_columnas(df),
+    }
+
+
+@cache_por_huella()
+def memoria_dataset(dataset: str) -> Dict[str, Any]:
+    """memoria_dataframe() del dataset compartido (una vez por version)."""
+    return memoria_dataframe(cargar_todos_los_datos()['dataframes'][dataset])
+
+
+def reporte_memoria(datasets: Sequence[str] = DATASETS) -> Dict[str, Any]:
+    """
+    Memoria de los datasets, del proceso y de la cache de resultados, con
+    los contadores de cada funcion cacheada en este proceso.
+
+    Un dataset que no se puede cargar aparece en 'errores' y no detiene el
+    reporte.
+    """
+    medidos, errores = {}, {}
+    for dataset in datasets:
+        try:
+            medidos[dataset] = memoria_dataset(dataset)
+        except Exception as e:
+            errores[dataset] = str(e)
+
+    return {
+        'huella': huella_servida(),
+        'proceso': memoria_proceso(),
+        'datasets': medidos,
+        'total_datasets_bytes': sum(m['bytes'] for m in medidos.values()),
+        'cache': {
+            'bytes': POLITICA.bytes_usados,
+            'presupuesto_bytes': POLITICA.presupuesto_bytes,
+            'disco': uso_cache_disco(),
+            'funciones': estadisticas_cache(),
+        },
+        'errores': errores,
+    }
+
+
+def tabla_memoria(reporte: Dict[str, Any]) -> pd.DataFrame:
+    """Una fila por (dataset, columna) en MB, para mostrar en pantalla."""
+    filas = [
+        {
+            'dataset': dataset,
+            'filas': medida['filas'],
+            'columna': columna['columna'],
+            'dtype': columna['dtype'],
+            'MB': round(columna['bytes'] / 1024 ** 2, 2),
+            '% del dataset': columna['pct'],
+        }
+        for dataset, medida in reporte['datasets'].items()
+        for columna in medida['columnas']
+    ]
+    return pd.DataFrame(filas, columns=['dataset', 'filas', 'columna', 'dtype', 'MB', '% del dataset'])
+
+
+def tabla_cache(reporte: Dict[str, Any]) -> pd.DataFrame:
+    """Una fila por funcion cacheada con sus contadores, de la mas llamada a la menos."""
+    filas = [
+        {
+            'funcion': funcion,
+            'llamadas': valores['llamadas'],
+            'aciertos': valores['aciertos'],
+            'fallos': valores['fallos'],
+            '% aciertos': round(valores['aciertos'] / valores['llamadas'] * 100, 1) if valores['llamadas'] else None,
+            'disco': valores['disco'],
+            'desalojos': valores['desalojos'],
+            'entradas': valores['entradas'],
+            'MB': round(valores['bytes'] / 1024 ** 2, 2),
+        }
+        for funcion, valores in reporte['cache']['funciones'].items()
+    ]
+    columnas = ['funcion', 'llamadas', 'aciertos', 'fallos', '% aciertos', 'disco', 'desalojos', 'entradas', 'MB']
+    return pd.DataFrame(filas, columns=columnas).sort_values('llamadas', ascending=False, ignore_index=True)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Clave entera de periodo (mes) compartida por todos los datasets.
+
+    periodo = (año - ANO_BASE) * 12 + (mes - 1)
+
+Enero de 2003 es el periodo 0. Como solo depende del año y el mes, dos
+fechas del mismo mes con distinto dia (fin de mes en BAL, primer dia en
+otra hoja) tienen el mismo periodo. Filtros de rango, desplazamientos
+interanuales (periodo - 12) y busquedas "al cierre de" pasan a ser
+aritmetica de enteros.
+
+El ETL agrega la columna 'periodo' (int16) a cada dataset; agregar_periodo()
+la calcula para datos publicados antes de que existiera.
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Primer año de la serie: periodo = meses desde enero de ANO_BASE
+ANO_BASE = 2003
+
+COLUMNA_PERIODO = 'periodo'
+TIPO_PERIODO = 'int16'
+
+MESES_ANO = 12
+
+
+def periodo(ano: int, mes: int) -> int:
+    """Periodo de un año y mes."""
+    return (int(ano) - ANO_BASE) * MESES_ANO + int(mes) - 1
+
+
+def fecha_a_periodo(fecha) -> Union[int, pd.Series]:
+    """
+    Periodo de una fecha (escalar) o de una Serie de fechas.
+
+    Las Series devuelven int16 con el mismo indice; no admiten nulos.
+    """
+    if isinstance(fecha, (pd.Series, pd.Index)):
+        fechas = pd.Series(pd.to_datetime(fecha), index=getattr(fecha, 'index', None))
+        claves = (fechas.dt.year - ANO_BASE) * MESES_ANO + fechas.dt.month - 1
+        return claves.astype(TIPO_PERIODO)
+    fecha = pd.Timestamp(fecha)
+    return periodo(fecha.year, fecha.month)
+
+
+def como_periodo(valor) -> int:
+    """Periodo de un entero (se devuelve tal cual) o de una fecha."""
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    return fecha_a_periodo(valor)
+
+
+def ano_periodo(p):
+    """Año de un periodo (escalar o Serie)."""
+    return p // MESES_ANO + ANO_BASE
+
+
+def mes_periodo(p):
+    """Mes (1-12) de un periodo (escalar o Serie)."""
+    return p % MESES_ANO + 1
+
+
+def periodo_a_fecha(p) -> Union[pd.Timestamp, pd.Series]:
+    """Ultimo dia del mes de un periodo (escalar o Serie)."""
+    if isinstance(p, (pd.Series, pd.Index)):
+        claves = pd.Series(np.asarray(p, dtype='int64'), index=getattr(p, 'index', None))
+        inicio = pd.to_datetime({'year': ano_periodo(claves), 'month': mes_periodo(claves), 'day': 1})
+        return inicio + pd.offsets.MonthEnd(0)
+    return pd.Timestamp(int(ano_periodo(p)), int(mes_periodo(p)), 1) + pd.offsets.MonthEnd(0)
+
+
+def agregar_periodo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega la columna 'periodo' (despues de 'fecha') si falta.
+
+    Devuelve el mismo DataFrame si ya la tiene o no hay columna 'fecha'.
+    """
+    if COLUMNA_PERIODO in df.columns or 'fecha' not in df.columns:
+        return df
+    df = df.copy()
+    df.insert(df.columns.get_loc('fecha') + 1, COLUMNA_PERIODO, fecha_a_periodo(df['fecha']))
+    return df
+
+
+def eje_periodos(df: pd.DataFrame) -> Tuple[int, pd.Series]:
+    """
+    Eje continuo de periodos de un dataset.
+
+    Returns:
+        (primer periodo, fecha de cada periodo desde el primero hasta el
+        ultimo): la fecha tal como viene en los datos, o fin de mes para
+        los meses sin datos
+    """
+    claves = df[COLUMNA_PERIODO] if COLUMNA_PERIODO in df.columns else fecha_a_periodo(df['fecha'])
+    inicio = int(claves.min())
+    fechas = periodo_a_fecha(pd.Series(np.arange(inicio, int(claves.max()) + 1)))
+    reales = df['fecha'].groupby(claves.to_numpy()).max()
+    fechas.loc[reales.index.to_numpy() - inicio] = reales.to_numpy()
+    return inicio, fechas
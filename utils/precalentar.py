@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Precalentamiento del cache al iniciar la app.
+
+Despues de un deploy o un reinicio, el primer visitante pagaba la lectura de
+los parquet y la construccion de indices, cubos, series y de cada vista.
+iniciar_precalentamiento() (via iniciar_tareas_de_fondo, que llaman Inicio.py
+y todas las paginas) hace ese trabajo en un hilo de fondo, una vez por proceso
+y version publicada, para que la primera consulta cueste lo mismo que las
+siguientes.
+
+Primero se calienta la capa de datos compartida (st.cache_resource):
+datasets, metricas, indices, cubos, orden por activos y las series por
+defecto de cada pagina (bancos de BANCOS_DEFAULT). Despues, las vistas que
+cada pagina muestra al abrirse (utils/vistas.py), con los mismos argumentos
+que usa la pagina: metricas, treemaps y rankings del ultimo mes en
+Panorama; jerarquia, evolucion, heatmap, ranking y serie del sistema de la
+primera cuenta en Balance; fechas con 12 meses en P&G; ranking, evolucion y
+heatmap de Solvencia en CAMEL.
+
+Se desactiva con la variable de entorno PRECALENTAR_CACHE=0.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config.indicator_mapping import BANCOS_DEFAULT, CODIGOS_BALANCE, COLUMNAS_PANORAMA, NIVELES_PANORAMA
+
+from .cache import cache_por_huella
+from .data_loader import (
+    DATASETS,
+    cargar_calidad,
+    cargar_cubo,
+    cargar_indice,
+    cargar_serie,
+    obtener_orden_bancos_por_activos,
+    precargar_datasets,
+)
+from .publicacion import huella_servida
+from . import vistas
+
+VARIABLE_ENTORNO = 'PRECALENTAR_CACHE'
+
+# Resultado del ultimo precalentamiento de cada version (ver ultimo_precalentamiento)
+_RESULTADOS: Dict[str, Dict[str, Any]] = {}
+_VERSIONES_RECORDADAS = 4
+
+# Serie que muestra cada pagina al abrirse: (dataset, codigo)
+SERIES_POR_DEFECTO = (
+    ('balance', CODIGOS_BALANCE['activo_total']),   # Balance General
+    ('pyg', 'GDE'),                                  # P&G: Ganancia del Ejercicio
+    ('camel', 'SOL'),                                # CAMEL: Solvencia
+)
+
+# Primer indicador de la pagina CAMEL
+CODIGO_CAMEL_POR_DEFECTO = 'SOL'
+
+
+def precalentamiento_activo() -> bool:
+    """False si PRECALENTAR_CACHE vale 0, no o false."""
+    return os.environ.get(VARIABLE_ENTORNO, '1').strip().lower() not in ('0', 'no', 'false')
+
+
+def _tocar_cubos() -> None:
+    """Abre los cubos y lee el ultimo mes (las paginas arrancan en la fecha mas reciente)."""
+    for dataset in DATASETS:
+        cubo = cargar_cubo(dataset)
+        cubo.bancos_con_datos(cubo.fechas[-1])
+
+
+def _vistas_panorama() -> None:
+    indice = vistas.indice_panorama()
+    fecha = indice.fechas[-1]
+    fecha_anterior = vistas.fecha_ano_anterior(indice.fechas, fecha)
+    vistas.calcular_metricas_sistema(fecha)
+    if fecha_anterior is not None:
+        vistas.calcular_metricas_sistema(fecha_anterior)
+    for tipo, clave in (('activos', 'activo_total'), ('pasivos', 'pasivo_total')):
+        vistas.obtener_datos_treemap_jerarquico(fecha, tipo=tipo)
+        vistas.obtener_ranking_bancos(fecha, CODIGOS_BALANCE[clave], 50)
+
+
+def _vistas_balance(bancos: Sequence[str]) -> None:
+    indice = cargar_indice('balance')
+    codigo = next(iter(vistas.obtener_jerarquia_cuentas()))
+    fecha_inicio, fecha_fin = vistas.rango_por_defecto(indice.fechas[0], indice.fechas[-1])
+    for banco in [b for b in bancos if b in indice.bancos]:
+        vistas.obtener_serie_banco(banco, codigo, fecha_inicio, fecha_fin)
+    vistas.obtener_serie_sistema(codigo, fecha_inicio, fecha_fin)
+    vistas.obtener_datos_heatmap_mensual(codigo, None, fecha_inicio, fecha_fin)
+    ultima = indice.fechas[-1]
+    vistas.obtener_valores_bancos_mes(codigo, pd.Timestamp(year=ultima.year, month=ultima.month, day=1))
+
+
+def _vistas_camel() -> None:
+    indice = cargar_indice('camel')
+    codigo = CODIGO_CAMEL_POR_DEFECTO
+    vistas.obtener_ranking_indicador(codigo, indice.fechas[-1], None)
+    vistas.obtener_evolucion_indicador(codigo, vistas.bancos_evolucion_camel(indice.bancos))
+    vistas.obtener_heatmap_indicador(codigo, *vistas.rango_heatmap_camel(indice.fechas))
+
+
+def _pasos(bancos: Sequence[str]) -> List[Tuple[str, Callable[[], object]]]:
+    pasos = [
+        ('calidad', lambda: [cargar_calidad(d) for d in DATASETS]),
+        ('indices', lambda: [cargar_indice(d) for d in DATASETS]),
+        ('indice_panorama', lambda: cargar_indice('balance', niveles=NIVELES_PANORAMA,
+                                                  columnas=COLUMNAS_PANORAMA)),
+        ('cubos', _tocar_cubos),
+        ('orden_bancos', obtener_orden_bancos_por_activos),
+    ]
+    for dataset, codigo in SERIES_POR_DEFECTO:
+        pasos.append((f"series_{dataset}",
+                      lambda d=dataset, c=codigo: [cargar_serie(d, c, (b,)) for b in bancos]))
+    pasos += [
+        ('vistas_panorama', _vistas_panorama),
+        ('vistas_balance', lambda: _vistas_balance(bancos)),
+        ('vistas_pyg', vistas.obtener_fechas_con_12m),
+        ('vistas_camel', _vistas_camel),
+    ]
+    return pasos
+
+
+def precalentar(bancos: Sequence[str] = tuple(BANCOS_DEFAULT)) -> Dict[str, Any]:
+    """
+    Carga los datasets en paralelo y ejecuta los demas pasos en orden.
+
+    Un dataset o un paso que falla se informa y no detiene a los demas. El
+    resultado queda disponible para la version en ultimo_precalentamiento().
+
+    Returns:
+        Dict con 'datasets' (segundos de carga de cada dataset), 'pasos'
+        (segundos por paso completado, 'datasets' es la carga paralela
+        completa), 'errores' (mensaje por dataset o paso) y 'total'
+    """
+    inicio_total = time.perf_counter()
+    tiempos, fallidos = precargar_datasets()
+    resultado = {
+        'datasets': {d: s for d, s in tiempos.items() if d != 'total'},
+        'pasos': {'datasets': tiempos['total']},
+        'errores': {f"datasets/{d}": e for d, e in fallidos.items()},
+    }
+    for dataset, error in fallidos.items():
+        print(f"[AVISO] Precalentamiento: no se pudo cargar {dataset}: {error}")
+
+    for nombre, paso in _pasos(bancos):
+        inicio = time.perf_counter()
+        try:
+            paso()
+        except Exception as e:
+            resultado['errores'][nombre] = str(e)
+            print(f"[AVISO] Precalentamiento {nombre}: {e}")
+            continue
+        resultado['pasos'][nombre] = time.perf_counter() - inicio
+    resultado['total'] = time.perf_counter() - inicio_total
+
+    _RESULTADOS[huella_servida()] = resultado
+    while len(_RESULTADOS) > _VERSIONES_RECORDADAS:
+        _RESULTADOS.pop(next(iter(_RESULTADOS)))
+    return resultado
+
+
+def ultimo_precalentamiento() -> Optional[Dict[str, Any]]:
+    """Resultado de precalentar() para la version servida (None si no corrio aun)."""
+    return _RESULTADOS.get(huella_servida())
+
+
+def resumen_precalentamiento(resultado: Dict[str, Any]) -> str:
+    """Una linea con el tiempo total, el de cada dataset y el de cada paso."""
+    datasets = ', '.join(f"{d} {s:.2f}s" for d, s in resultado['datasets'].items())
+    pasos = ', '.join(f"{p} {s:.2f}s" for p, s in resultado['pasos'].items())
+    return f"{resultado['total']:.2f}s (datasets: {datasets}; pasos: {pasos})"
+
+
+def _precalentar_en_fondo() -> None:
+    resultado = precalentar()
+    estado = '[OK]' if not resultado['errores'] else '[AVISO]'
+    print(f"{estado} Cache precalentado en {resumen_precalentamiento(resultado)}")
+
+
+@cache_por_huella(recurso=True, show_spinner=False)
+def iniciar_precalentamiento() -> Optional[threading.Thread]:
+    """
+    Lanza precalentar() en un hilo de fondo, una vez por proceso y version
+    publicada (st.cache_resource). Devuelve el hilo, o None si esta
+    desactivado.
+
+    Si una sesion pide un dataset mientras el hilo lo esta cargando, espera
+    esa misma carga en lugar de repetirla (st.cache_resource bloquea por
+    clave).
+    """
+    if not precalentamiento_activo():
+        return None
+    hilo = threading.Thread(target=_precalentar_en_fondo, name='precalentar-cache', daemon=True)
+    hilo.start()
+    return hilo
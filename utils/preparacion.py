@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Lo que se publica de cada dataset.
+
+preparar_dataset() limpia un dataset y escribe en una carpeta el dataset en
+su formato final junto con los artefactos que se derivan de el;
+preparar_modelo_dimensional() escribe dim_* y hechos_* a partir de balance y
+pyg. Las usan las etapas preparar_<dataset> y modelo_dimensional de
+scripts/actualizar.py y los scripts procesar_*.py: una version publicada por
+un script individual trae los mismos artefactos que una del ETL completo, y
+publicar_version no hereda de la version anterior los derivados de un
+dataset que se reemplaza.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from .almacenamiento import columnas_particion, escribir_dataset, leer_dataset
+from .cobertura import dispersar
+from .cubo import CuboDatos, nombre_cubo
+from .dimensional import DATASETS_DIMENSIONALES, ORDEN_HECHOS, normalizar
+from .limpieza import escribir_calidad, leer_calidad, limpiar_con_calidad, nombre_calidad
+from .series import COLUMNAS_SERIE, escribir_series, nombre_series
+
+
+def preparar_dataset(
+    df: pd.DataFrame,
+    dataset: str,
+    destino: Path,
+    por_banco: bool = False,
+    punto_fijo: bool = True,
+) -> Tuple[pd.DataFrame, Dict[str, Path]]:
+    """
+    Limpia `df` y escribe en `destino` todo lo que se publica de el.
+
+    - el dataset en su formato final (orden, zstd, row groups, punto fijo,
+      particionado por año); en balance solo los valores distintos de cero
+    - calidad_<dataset>.json y, en balance, cobertura_balance
+    - series_<dataset> y cubo_<dataset>/
+
+    Args:
+        df: Dataset como sale de la extraccion ('pyg' ya derivado)
+        dataset: 'balance', 'pyg' o 'camel'
+        destino: Carpeta de staging
+        por_banco: Particionar tambien por banco
+        punto_fijo: Guardar los valores monetarios como int64 escalado
+
+    Returns:
+        Tuple[DataFrame, dict]: dataset como se publica y nombre -> ruta
+        escrita (lo que recibe publicar_version)
+    """
+    destino = Path(destino)
+    archivos = {}
+    df, calidad = limpiar_con_calidad(df, dataset)
+
+    cobertura = None
+    if dataset == 'balance':
+        df, cobertura = dispersar(df)
+        calidad['registros_presentes'] = len(df)
+        archivos['cobertura_balance'] = escribir_dataset(cobertura, destino, 'cobertura_balance')
+
+    archivos[nombre_calidad(dataset)] = escribir_calidad(calidad, destino, dataset)
+    archivos[dataset] = escribir_dataset(df, destino, dataset, columnas_particion(dataset, por_banco=por_banco),
+                                         punto_fijo=punto_fijo)
+
+    archivos[nombre_series(dataset)] = escribir_series(df, destino, dataset, cobertura)
+    cubo = CuboDatos.desde_dataframe(df, COLUMNAS_SERIE[dataset], cobertura)
+    archivos[nombre_cubo(dataset)] = cubo.guardar(destino, dataset)
+
+    return df, archivos
+
+
+def preparar_modelo_dimensional(
+    planos: Dict[str, pd.DataFrame],
+    destino: Path,
+    punto_fijo: bool = True,
+) -> Dict[str, Path]:
+    """
+    Escribe en `destino` dim_banco, dim_cuenta, dim_periodo y hechos_<dataset>.
+
+    Args:
+        planos: balance y pyg como se publican (salida de preparar_dataset)
+        destino: Carpeta de staging
+        punto_fijo: Guardar los valores monetarios como int64 escalado
+
+    Returns:
+        Dict: nombre -> ruta escrita
+    """
+    return {
+        nombre: escribir_dataset(tabla, Path(destino), nombre, orden=ORDEN_HECHOS, punto_fijo=punto_fijo)
+        for nombre, tabla in normalizar(planos).items()
+    }
+
+
+def completar_planos(planos: Dict[str, pd.DataFrame], directorio: Path) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    `planos` mas los datasets del modelo dimensional que no trae, leidos de
+    `directorio` (la version vigente).
+
+    Devuelve None si alguno no esta publicado o se publico sin limpiar
+    (versiones sin calidad_<dataset>.json): el modelo no se puede armar y
+    publicar_version tampoco hereda el anterior.
+    """
+    completos = dict(planos)
+    for nombre in DATASETS_DIMENSIONALES:
+        if nombre in completos:
+            continue
+        if leer_calidad(directorio, nombre) is None:
+            return None
+        try:
+            completos[nombre] = leer_dataset(directorio, nombre)
+        except FileNotFoundError:
+            return None
+    return completos
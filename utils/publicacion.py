@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+"""
+Publicacion versionada de master_data.
+
+Cada actualizacion se escribe en un directorio nuevo e inmutable:
+
+    master_data/
+    ├── CURRENT                      # id de la version vigente
+    └── versiones/
+        ├── 20260201T101500482913-3fa2c1/
+        │   ├── balance/                 # particionado por año (ano=2003/...)
+        │   ├── pyg/
+        │   ├── camel.parquet
+        │   ├── manifest.json        # manifiesto combinado de todos los datasets
+        │   └── metadata.json        # compatibilidad con el formato anterior
+        └── ...
+
+La version se arma en un directorio temporal, se renombra a su nombre final
+y recien entonces se reemplaza CURRENT (os.replace es atomico), de modo que
+el dashboard nunca ve archivos a medio escribir. Los datasets que no se
+actualizan se enlazan (hard link) desde la version anterior, salvo los
+derivados de un dataset que se reemplaza (ver bases_derivado).
+
+Si no existe CURRENT se usa la estructura plana anterior (master_data/*.parquet).
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pyarrow.dataset as ds
+
+from .almacenamiento import ruta_dataset, tamano_dataset
+from .cubo import PREFIJO_CUBO
+from .dimensional import DATASETS_DIMENSIONALES, TABLAS_MODELO
+from .series import PREFIJO_SERIES
+
+# Ruta base de datos
+MASTER_DATA_DIR = Path(__file__).parent.parent / "master_data"
+
+VERSIONES_DIR = "versiones"
+PUNTERO_VERSION = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.json"
+
+# Datasets reconocidos en la estructura plana anterior
+DATASETS = ('balance', 'pyg', 'camel')
+
+# Versiones anteriores que se conservan (ademas de la vigente)
+VERSIONES_A_CONSERVAR = 3
+
+# Cada cuanto se vuelve a recorrer la estructura plana en huella_vigente()
+INTERVALO_HUELLA_PLANA = 5.0
+
+# Artefactos <prefijo><dataset> que se construyen a partir de <dataset>
+PREFIJOS_DERIVADOS = (PREFIJO_CUBO, PREFIJO_SERIES)
+
+
+def obtener_version_actual(master_dir: Path = MASTER_DATA_DIR) -> Optional[str]:
+    """
+    Devuelve el id de la version publicada vigente, o None si master_dir
+    todavia usa la estructura plana.
+    """
+    puntero = Path(master_dir) / PUNTERO_VERSION
+    try:
+        version = puntero.read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def obtener_directorio_datos(master_dir: Path = MASTER_DATA_DIR, version: str = None) -> Path:
+    """
+    Directorio desde el que deben leerse los datasets.
+
+    Args:
+        master_dir: Carpeta master_data
+        version: Version especifica (por defecto la vigente)
+
+    Returns:
+        Path a la version publicada, o master_dir si no hay versiones
+    """
+    master_dir = Path(master_dir)
+    version = version or obtener_version_actual(master_dir)
+    if version is None:
+        return master_dir
+    return master_dir / VERSIONES_DIR / version
+
+
+def huella_datos(master_dir: Path = MASTER_DATA_DIR) -> str:
+    """
+    Identificador de los datos vigentes: cambia si y solo si cambian.
+
+    Con versiones es el id de la version (los directorios publicados son
+    inmutables). En la estructura plana se arma con nombre, tamaño y fecha
+    de modificacion de los archivos de master_data.
+    """
+    version = obtener_version_actual(master_dir)
+    if version is not None:
+        return version
+
+    h = hashlib.sha256()
+    master_dir = Path(master_dir)
+    if master_dir.exists():
+        for archivo in sorted(p for p in master_dir.rglob('*') if p.is_file()):
+            estado = archivo.stat()
+            h.update(f"{archivo.relative_to(master_dir)}:{estado.st_size}:{estado.st_mtime_ns}".encode())
+    return f"plano-{h.hexdigest()[:12]}"
+
+
+# master_dir -> (firma de CURRENT, huella, momento en que se calculo)
+_huellas: Dict[Path, Tuple[Optional[tuple], str, float]] = {}
+_lock_huellas = threading.Lock()
+
+
+def _firma_puntero(master_dir: Path) -> Optional[tuple]:
+    """Inodo, tamaño y fecha de CURRENT (None si no existe): cambia al publicar."""
+    try:
+        estado = (Path(master_dir) / PUNTERO_VERSION).stat()
+    except FileNotFoundError:
+        return None
+    return (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+
+
+def huella_vigente(master_dir: Path = None) -> str:
+    """
+    huella_datos() sin releer los datos en cada llamada.
+
+    Con versiones solo hace stat de CURRENT: publicar lo reemplaza con
+    os.replace (inodo nuevo), y recien ahi se vuelve a leer el id. En la
+    estructura plana, recorrer master_data cuesta un stat por archivo, asi
+    que se repite como mucho cada INTERVALO_HUELLA_PLANA segundos.
+
+    Las claves de cache (utils/cache.py) usan huella_servida(), que parte
+    de esta y se calcula en cada llamada a una funcion cacheada.
+    """
+    master_dir = Path(master_dir or MASTER_DATA_DIR)
+    firma = _firma_puntero(master_dir)
+    anterior = _huellas.get(master_dir)
+    if anterior is not None and anterior[0] == firma:
+        if firma is not None or time.monotonic() - anterior[2] < INTERVALO_HUELLA_PLANA:
+            return anterior[1]
+
+    huella = huella_datos(master_dir)
+    with _lock_huellas:
+        _huellas[master_dir] = (firma, huella, time.monotonic())
+    return huella
+
+
+# Version que atienden las sesiones mientras se prepara la siguiente (ver
+# utils/recarga.py). Vacio: se atiende siempre la vigente.
+_servidas: Dict[Path, str] = {}
+_version_preparando: contextvars.ContextVar = contextvars.ContextVar('version_preparando', default=None)
+
+
+def _version_servida(master_dir: Path) -> Optional[str]:
+    return _version_preparando.get() or _servidas.get(master_dir)
+
+
+def huella_servida(master_dir: Path = None) -> str:
+    """
+    Huella de los datos que ve este hilo: la que usan las claves de cache.
+
+    Es huella_vigente() salvo que utils/recarga.py haya fijado una version
+    (las sesiones siguen en la anterior mientras se carga la nueva) o que el
+    hilo este preparando una version con preparando_version().
+    """
+    master_dir = Path(master_dir or MASTER_DATA_DIR)
+    return _version_servida(master_dir) or huella_vigente(master_dir)
+
+
+def directorio_servido(master_dir: Path = None) -> Path:
+    """Directorio de datos de huella_servida(): de ahi leen los cargadores."""
+    master_dir = Path(master_dir or MASTER_DATA_DIR)
+    version = _version_servida(master_dir)
+    if version is None:
+        return obtener_directorio_datos(master_dir)
+    return master_dir / VERSIONES_DIR / version
+
+
+def fijar_version_servida(version: Optional[str], master_dir: Path = None) -> None:
+    """
+    Fija la version que atienden las sesiones (None vuelve a seguir CURRENT).
+
+    Es una sola asignacion: cada llamada posterior a huella_servida() ve la
+    version nueva completa o la anterior completa, nunca una mezcla.
+    """
+    master_dir = Path(master_dir or MASTER_DATA_DIR)
+    with _lock_huellas:
+        if version is None:
+            _servidas.pop(master_dir, None)
+        else:
+            _servidas[master_dir] = version
+
+
+@contextlib.contextmanager
+def preparando_version(version: str) -> Iterator[None]:
+    """
+    Dentro del bloque, este hilo (y los que lance copiando su contexto) lee
+    y cachea `version` aunque las sesiones sigan en otra.
+    """
+    token = _version_preparando.set(version)
+    try:
+        yield
+    finally:
+        _version_preparando.reset(token)
+
+
+def cargar_manifest(master_dir: Path = MASTER_DATA_DIR, version: str = None) -> Optional[Dict[str, Any]]:
+    """Carga el manifiesto de una version (None en la estructura plana)."""
+    ruta = obtener_directorio_datos(master_dir, version) / MANIFEST_FILE
+    if not ruta.exists():
+        return None
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _huella_ruta(ruta: Path) -> str:
+    """sha256 de un archivo, o de todos los archivos de un directorio."""
+    h = hashlib.sha256()
+    archivos = [ruta] if ruta.is_file() else sorted(p for p in ruta.rglob('*') if p.is_file())
+    for archivo in archivos:
+        if ruta.is_dir():
+            h.update(archivo.relative_to(ruta).as_posix().encode())
+        with open(archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloque)
+    return h.hexdigest()
+
+
+def _describir_dataset(ruta: Path) -> Dict[str, Any]:
+    """Entrada del manifiesto para un archivo o directorio publicado."""
+    entrada = {
+        'ruta': ruta.name,
+        'bytes': tamano_dataset(ruta),
+        'sha256': _huella_ruta(ruta),
+    }
+    if ruta.suffix == '.parquet' or ruta.is_dir():
+        try:
+            dataset = ds.dataset(ruta, format='parquet', partitioning='hive')
+            entrada['registros'] = dataset.count_rows()
+            entrada['columnas'] = dataset.schema.names
+        except Exception:
+            pass
+    return entrada
+
+
+def bases_derivado(nombre: str) -> Tuple[str, ...]:
+    """Datasets a partir de los que se construye `nombre` (vacio si no es derivado)."""
+    for prefijo in PREFIJOS_DERIVADOS:
+        if nombre.startswith(prefijo):
+            return (nombre[len(prefijo):],)
+    if nombre in TABLAS_MODELO:
+        return DATASETS_DIMENSIONALES
+    return ()
+
+
+def _enlazar_o_copiar(origen: Path, destino: Path) -> None:
+    """Hard link (los archivos publicados son inmutables) o copia si no se puede."""
+    if origen.is_dir():
+        shutil.copytree(origen, destino, copy_function=_enlazar_archivo)
+    else:
+        _enlazar_archivo(origen, destino)
+
+
+def _enlazar_archivo(origen, destino) -> None:
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copy2(origen, destino)
+
+
+def _datasets_previos(master_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Datasets de la version vigente (o de la estructura plana)."""
+    manifest = cargar_manifest(master_dir)
+    if manifest is not None:
+        return manifest['datasets']
+
+    previos = {}
+    for nombre in DATASETS:
+        ruta = ruta_dataset(master_dir, nombre)
+        if ruta.exists():
+            previos[nombre] = {'ruta': ruta.name}
+    return previos
+
+
+def _generar_metadata(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """metadata.json con el formato que esperaban los lectores anteriores."""
+    info_balance = manifest['info'].get('balance', {})
+    bancos = info_balance.get('bancos_procesados', [])
+    return {
+        'version': manifest['version'],
+        'ultima_actualizacion': manifest['creado'],
+        'bancos_procesados': bancos,
+        'bancos_error': info_balance.get('bancos_error', []),
+        'total_bancos': len(bancos),
+        'total_registros': sum(d.get('registros', 0) for d in manifest['datasets'].values()),
+        'fecha_min': info_balance.get('fecha_min'),
+        'fecha_max': info_balance.get('fecha_max'),
+        'hojas_procesadas': info_balance.get('hojas_procesadas', []),
+        'datasets': sorted(manifest['datasets']),
+    }
+
+
+def _escribir_puntero(master_dir: Path, version: str) -> None:
+    """Reemplaza CURRENT de forma atomica."""
+    temporal = master_dir / f".{PUNTERO_VERSION}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, master_dir / PUNTERO_VERSION)
+
+
+def _podar_versiones(master_dir: Path, vigente: str, conservar: int) -> None:
+    versiones_dir = master_dir / VERSIONES_DIR
+    anteriores = sorted(
+        d for d in versiones_dir.iterdir()
+        if d.is_dir() and not d.name.startswith('.') and d.name != vigente
+    )
+    for directorio in anteriores[:max(0, len(anteriores) - conservar)]:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def publicar_version(
+    archivos: Dict[str, Path],
+    info: Dict[str, Dict[str, Any]] = None,
+    master_dir: Path = MASTER_DATA_DIR,
+    conservar: int = VERSIONES_A_CONSERVAR,
+) -> str:
+    """
+    Publica una nueva version de master_data.
+
+    Los datasets de `archivos` reemplazan a los de la version vigente; el
+    resto se hereda de ella, salvo los derivados (bases_derivado) de un
+    dataset que se reemplaza y que `archivos` no trae: no coincidirian con
+    la base nueva, y sin ellos los cargadores los arman desde la base. El
+    manifiesto resultante describe todos los datasets de la version.
+
+    Args:
+        archivos: nombre de dataset -> archivo o directorio recien generado
+        info: informacion adicional por dataset (bancos procesados, rango de fechas...)
+        master_dir: Carpeta master_data
+        conservar: Versiones anteriores a conservar
+
+    Returns:
+        Id de la version publicada
+    """
+    master_dir = Path(master_dir)
+    versiones_dir = master_dir / VERSIONES_DIR
+    versiones_dir.mkdir(parents=True, exist_ok=True)
+
+    origen_previo = obtener_directorio_datos(master_dir)
+    version_previa = obtener_version_actual(master_dir)
+    manifest_previo = cargar_manifest(master_dir) or {}
+    previos = _datasets_previos(master_dir)
+
+    creado = datetime.now()
+    h = hashlib.sha256()
+    for nombre in sorted(archivos):
+        h.update(nombre.encode())
+        h.update(_huella_ruta(Path(archivos[nombre])).encode())
+    # Con microsegundos: dos publicaciones seguidas (un reintento, dos
+    # scripts uno tras otro) no comparten id aunque caigan en el mismo segundo
+    version = f"{creado:%Y%m%dT%H%M%S%f}-{h.hexdigest()[:6]}"
+    if (versiones_dir / version).is_dir():
+        # Mismo instante y mismo contenido: ya esta publicada
+        _escribir_puntero(master_dir, version)
+        return version
+
+    temporal = versiones_dir / f".tmp-{version}"
+    if temporal.exists():
+        shutil.rmtree(temporal)
+    temporal.mkdir()
+
+    try:
+        datasets = {}
+
+        # Datasets heredados de la version vigente
+        for nombre, entrada in previos.items():
+            if nombre in archivos or any(base in archivos for base in bases_derivado(nombre)):
+                continue
+            origen = origen_previo / entrada['ruta']
+            if not origen.exists():
+                continue
+            _enlazar_o_copiar(origen, temporal / origen.name)
+            datasets[nombre] = dict(entrada) if 'sha256' in entrada else _describir_dataset(temporal / origen.name)
+            datasets[nombre].setdefault('version_origen', version_previa)
+
+        # Datasets nuevos
+        for nombre, ruta in archivos.items():
+            ruta = Path(ruta)
+            destino = temporal / ruta.name
+            if ruta.is_dir():
+                shutil.copytree(ruta, destino)
+            else:
+                shutil.copy2(ruta, destino)
+            datasets[nombre] = _describir_dataset(destino)
+            datasets[nombre]['version_origen'] = version
+
+        info_combinada = dict(manifest_previo.get('info', {}))
+        info_combinada.update(info or {})
+
+        manifest = {
+            'version': version,
+            'version_anterior': version_previa,
+            'creado': creado.isoformat(),
+            'datasets': datasets,
+            'info': {k: v for k, v in info_combinada.items() if k in datasets},
+        }
+
+        with open(temporal / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+        with open(temporal / METADATA_FILE, 'w', encoding='utf-8') as f:
+            json.dump(_generar_metadata(manifest), f, indent=2, ensure_ascii=False, default=str)
+
+        os.rename(temporal, versiones_dir / version)
+    except Exception:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    _escribir_puntero(master_dir, version)
+    _podar_versiones(master_dir, version, conservar)
+
+    return version
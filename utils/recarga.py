@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Recarga en caliente de los datos publicados.
+
+Sin esto, una version nueva entraba en la primera consulta que veia el
+CURRENT nuevo: esa sesion (y las que llegaban detras) esperaban la lectura
+de los parquet y la construccion de indices y cubos.
+
+iniciar_vigilancia() lanza un hilo por proceso que revisa master_data/CURRENT
+cada INTERVALO_VIGILANCIA segundos (un stat, ver huella_vigente). Cuando
+aparece una version nueva:
+
+1. Las sesiones quedan fijadas en la version anterior (fijar_version_servida)
+2. El hilo carga la nueva con precalentar() dentro de preparando_version()
+3. Se cambia la version servida de una sola vez: la consulta siguiente ya
+   encuentra datasets, indices y cubos en memoria
+4. Se descarta de memoria lo cacheado con la version anterior
+
+La version anterior sigue en disco mientras se prepara la nueva
+(publicar_version conserva VERSIONES_A_CONSERVAR). En la estructura plana
+los archivos se reemplazan en el lugar y no hay version anterior que
+atender: ahi solo se precalienta apenas cambian y se descarta lo viejo.
+
+Se desactiva con la variable de entorno RECARGA_EN_CALIENTE=0.
+
+Inicio.py y cada pagina llaman a iniciar_tareas_de_fondo(), que poda la
+cache en disco y arranca el precalentamiento y la vigilancia: quien entra
+directo a una pagina (un link o una recarga del navegador) no depende de
+haber pasado por Inicio.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+from .cache import descartar_huella, podar_cache_disco_al_iniciar
+from .precalentar import iniciar_precalentamiento, precalentar, resumen_precalentamiento
+from .publicacion import (
+    MASTER_DATA_DIR,
+    fijar_version_servida,
+    huella_vigente,
+    obtener_version_actual,
+    preparando_version,
+)
+
+VARIABLE_ENTORNO = 'RECARGA_EN_CALIENTE'
+
+# Segundos entre revisiones de CURRENT
+INTERVALO_VIGILANCIA = 15.0
+
+
+def recarga_activa() -> bool:
+    """False si RECARGA_EN_CALIENTE vale 0, no o false."""
+    return os.environ.get(VARIABLE_ENTORNO, '1').strip().lower() not in ('0', 'no', 'false')
+
+
+def activar_version(nueva: str, anterior: str, master_dir: Path = None) -> Dict[str, Any]:
+    """
+    Carga `nueva` en segundo plano, la pasa a ser la version servida y
+    descarta de memoria lo cacheado con `anterior`.
+
+    Args:
+        nueva: Huella de la version publicada (huella_vigente())
+        anterior: Huella que se venia atendiendo
+        master_dir: Carpeta master_data
+
+    Returns:
+        Resultado de precalentar() (tiempos por dataset y paso, errores)
+    """
+    master_dir = Path(master_dir or MASTER_DATA_DIR)
+    if obtener_version_actual(master_dir) is None:
+        # Estructura plana: las sesiones ya ven los archivos nuevos
+        resultado = precalentar()
+    else:
+        # Con versiones la huella es el id de la version
+        with preparando_version(nueva):
+            resultado = precalentar()
+        fijar_version_servida(nueva, master_dir)
+    descartadas = descartar_huella(anterior)
+    estado = '[OK]' if not resultado['errores'] else '[AVISO]'
+    print(f"{estado} Datos {nueva} activos, cargados en {resumen_precalentamiento(resultado)}; "
+          f"{descartadas} entradas de {anterior} descartadas")
+    return resultado
+
+
+def _vigilar(master_dir: Path, intervalo: float) -> None:
+    actual = huella_vigente(master_dir)
+    if obtener_version_actual(master_dir) is not None:
+        fijar_version_servida(actual, master_dir)
+    while True:
+        time.sleep(intervalo)
+        try:
+            nueva = huella_vigente(master_dir)
+            if nueva != actual:
+                activar_version(nueva, actual, master_dir)
+                actual = nueva
+        except Exception as e:
+            print(f"[AVISO] Recarga de datos: {e}")
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_vigilancia(intervalo: float = INTERVALO_VIGILANCIA) -> Optional[threading.Thread]:
+    """
+    Lanza el hilo que vigila CURRENT, una vez por proceso (st.cache_resource
+    sin huella: sobrevive a las versiones que activa). Devuelve el hilo, o
+    None si esta desactivado.
+    """
+    if not recarga_activa():
+        return None
+    hilo = threading.Thread(target=_vigilar, args=(Path(MASTER_DATA_DIR), intervalo),
+                            name='recarga-datos', daemon=True)
+    hilo.start()
+    return hilo
+
+
+def iniciar_tareas_de_fondo() -> None:
+    """
+    Poda la cache en disco, arranca el precalentamiento de la version
+    servida y la vigilancia de CURRENT. Se llama al inicio de Inicio.py y de
+    cada pagina; despues de la primera vez cuesta tres aciertos de
+    st.cache_resource.
+    """
+    podar_cache_disco_al_iniciar()
+    iniciar_precalentamiento()
+    iniciar_vigilancia()
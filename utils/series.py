@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Series por banco y codigo (formato ancho).
+
+Casi todas las consultas de las paginas piden la serie completa de un banco
+para un codigo. En formato largo eso filtra el dataset entero; aqui cada
+(banco, codigo) es una sola fila con un vector de valores alineado al eje de
+periodos del dataset:
+
+    banco     | codigo | cuenta  | periodo_inicio | valor
+    Pichincha | 14     | CARTERA | 0              | [v0, v1, ..., vN-1]
+
+La posicion i del vector corresponde a periodo_inicio + i. Los meses sin dato
+son NaN; en balance los meses reportados sin valor son 0 (ver
+utils/cobertura.py). Las fechas del eje se guardan en los metadatos del
+esquema para devolver las mismas fechas que el dataset largo.
+
+Se publican como series_<dataset> (ordenadas por codigo, de modo que leer un
+codigo solo abre los row groups que lo contienen).
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from .almacenamiento import escribir_dataset, leer_dataset, leer_metadata
+from .cobertura import mascara_cobertura
+from .periodos import COLUMNA_PERIODO, agregar_periodo, eje_periodos
+
+PREFIJO_SERIES = 'series_'
+METADATA_EJE = b'eje_fechas'
+
+# Columnas de valor que se guardan como vector, por dataset
+COLUMNAS_SERIE = {
+    'balance': ('valor',),
+    'pyg': ('valor_acumulado', 'valor_mes', 'valor_12m'),
+    'camel': ('valor',),
+}
+
+_COLUMNAS_NOMBRE = ('cuenta', 'indicador')
+
+# Cada fila trae la historia completa: row groups chicos para que leer una
+# serie no descomprima miles de vectores
+FILAS_POR_ROW_GROUP_SERIES = 256
+
+
+def nombre_series(dataset: str) -> str:
+    return f"{PREFIJO_SERIES}{dataset}"
+
+
+def _columna_nombre(columnas: Sequence[str]) -> str:
+    return next(c for c in _COLUMNAS_NOMBRE if c in columnas)
+
+
+def construir_series(
+    df: pd.DataFrame,
+    columnas_valor: Sequence[str],
+    cobertura: Optional[pd.DataFrame] = None,
+) -> Tuple[pd.DataFrame, List[pd.Timestamp]]:
+    """
+    Convierte un dataset largo a una fila por (banco, codigo).
+
+    Args:
+        df: Dataset largo (banco, fecha, codigo, cuenta|indicador, valores)
+        columnas_valor: Columnas que se guardan como vector
+        cobertura: Meses reportados por banco (balance disperso): en esos
+            meses los valores ausentes son 0 en lugar de NaN
+
+    Returns:
+        (series, fechas del eje de periodos)
+    """
+    df = agregar_periodo(df)
+    nombre = _columna_nombre(df.columns)
+    claves = df[['banco', 'codigo']].astype(str)
+
+    pares = claves.drop_duplicates().sort_values(['banco', 'codigo'], ignore_index=True)
+    fila = pd.MultiIndex.from_frame(pares).get_indexer(pd.MultiIndex.from_frame(claves))
+
+    inicio, fechas = eje_periodos(df)
+    n_periodos = len(fechas)
+    columna = df[COLUMNA_PERIODO].to_numpy(dtype='int64') - inicio
+
+    base = np.full((len(pares), n_periodos), np.nan)
+    if cobertura is not None:
+        bancos = pd.Index(pares['banco'].unique())
+        cubierto = mascara_cobertura(cobertura, bancos, inicio, n_periodos)
+        base[cubierto[bancos.get_indexer(pares['banco'])]] = 0.0
+
+    series = pares.copy()
+    series[nombre] = df[nombre].astype(str).groupby(fila).last().to_numpy()
+    series['periodo_inicio'] = np.int16(inicio)
+    for col in columnas_valor:
+        matriz = base.copy()
+        matriz[fila, columna] = df[col].to_numpy(dtype='float64')
+        series[col] = list(matriz)
+
+    return series, list(fechas)
+
+
+def escribir_series(
+    df: pd.DataFrame,
+    directorio: Path,
+    dataset: str,
+    cobertura: Optional[pd.DataFrame] = None,
+) -> Path:
+    """Construye y escribe series_<dataset> con el eje de fechas en los metadatos."""
+    series, fechas = construir_series(df, COLUMNAS_SERIE[dataset], cobertura)
+    eje = json.dumps([f.strftime('%Y-%m-%d') for f in fechas]).encode()
+    return escribir_dataset(series, directorio, nombre_series(dataset), orden=('codigo', 'banco'),
+                            metadata={METADATA_EJE: eje}, filas_por_row_group=FILAS_POR_ROW_GROUP_SERIES)
+
+
+def expandir_series(series: pd.DataFrame, fechas: Sequence) -> pd.DataFrame:
+    """
+    Filas de series -> formato largo (banco, fecha, periodo, codigo, nombre,
+    valores), sin los meses en que todos los valores son NaN.
+    """
+    nombre = _columna_nombre(series.columns)
+    columnas_valor = [c for c in series.columns
+                      if c not in ('banco', 'codigo', nombre, 'periodo_inicio')]
+    if series.empty:
+        return pd.DataFrame(columns=['banco', 'fecha', COLUMNA_PERIODO, 'codigo', nombre] + columnas_valor)
+
+    fechas = pd.DatetimeIndex(pd.to_datetime(list(fechas)))
+    n_periodos = len(fechas)
+    n_series = len(series)
+
+    df = pd.DataFrame({
+        'banco': np.repeat(series['banco'].to_numpy(dtype=object), n_periodos),
+        'fecha': np.tile(fechas.to_numpy(), n_series),
+        COLUMNA_PERIODO: (series['periodo_inicio'].to_numpy(dtype='int64')[:, None]
+                          + np.arange(n_periodos)).ravel().astype('int16'),
+        'codigo': np.repeat(series['codigo'].to_numpy(dtype=object), n_periodos),
+        nombre: np.repeat(series[nombre].to_numpy(dtype=object), n_periodos),
+    })
+    for col in columnas_valor:
+        df[col] = np.concatenate([np.asarray(v, dtype='float64') for v in series[col]])
+
+    return df[df[columnas_valor].notna().any(axis=1)].reset_index(drop=True)
+
+
+def leer_series(
+    directorio: Path,
+    dataset: str,
+    codigos: Optional[Sequence[str]] = None,
+    bancos: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Lee las series pedidas y las devuelve en formato largo.
+
+    Raises:
+        FileNotFoundError: si la version no incluye series_<dataset>
+    """
+    nombre = nombre_series(dataset)
+    metadata = leer_metadata(directorio, nombre)
+    fechas = json.loads(metadata[METADATA_EJE])
+
+    filtro = ds.field('codigo').isin([str(c) for c in codigos]) if codigos is not None else None
+    series = leer_dataset(directorio, nombre, bancos=bancos, filtro=filtro)
+    return expandir_series(series, fechas)
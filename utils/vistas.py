@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+"""
+Calculos cacheados de las paginas.
+
+Cada pagina dibuja lo que devuelven estas funciones. Viven aqui, y no en el
+script de la pagina, para que precalentar() pueda calcular las vistas por
+defecto de cada pagina (ultimo mes, primera cuenta, bancos de
+BANCOS_DEFAULT) antes de que llegue el primer visitante, con los mismos
+argumentos que usa la pagina al abrirse (ver los valores por defecto abajo).
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.indicator_mapping import CODIGOS_BALANCE, COLUMNAS_PANORAMA, NIVELES_PANORAMA
+
+from .cache import cache_por_huella
+from .consultas import fechas_disponibles, heatmap, ranking, serie_sistema, variacion_anual
+from .data_loader import (
+    cargar_cubo,
+    cargar_indice,
+    cargar_pyg,
+    cargar_serie,
+    filtrar_por_periodos,
+    obtener_fechas_disponibles,
+    obtener_orden_bancos_por_activos,
+)
+from .periodos import fecha_a_periodo
+
+# Las series y heatmaps de Balance y P&G arrancan en Enero de este año
+ANO_INICIO_POR_DEFECTO = 2015
+
+# Bancos de la evolucion de indicadores CAMEL
+BANCOS_EVOLUCION_CAMEL = ['Pichincha', 'Guayaquil', 'Pacifico']
+
+
+# =============================================================================
+# VALORES POR DEFECTO
+# =============================================================================
+
+def rango_por_defecto(fecha_min: pd.Timestamp, fecha_max: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Rango de la evolucion y el heatmap de Balance al abrir la pagina: Enero
+    de ANO_INICIO_POR_DEFECTO (o del primer año con datos) a Diciembre del
+    ultimo año.
+    """
+    ano_inicio = max(ANO_INICIO_POR_DEFECTO, fecha_min.year)
+    return pd.Timestamp(f"{ano_inicio}-01-01"), pd.Timestamp(f"{fecha_max.year}-12-31")
+
+
+def fecha_ano_anterior(fechas: Sequence[pd.Timestamp], fecha: pd.Timestamp):
+    """Fecha del mismo mes del año anterior (periodo - 12), o None si no hay datos."""
+    fecha_por_periodo = dict(zip(fecha_a_periodo(pd.Series(fechas)).tolist(), fechas))
+    return fecha_por_periodo.get(fecha_a_periodo(fecha) - 12)
+
+
+def rango_heatmap_camel(fechas: Sequence[pd.Timestamp]) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Rango del heatmap CAMEL al abrir la pagina: los ultimos 5 años."""
+    anos = sorted({f.year for f in fechas})
+    return (pd.Timestamp(year=anos[max(0, len(anos) - 5)], month=1, day=1),
+            pd.Timestamp(year=anos[-1], month=12, day=1))
+
+
+def bancos_evolucion_camel(bancos: Sequence[str]) -> List[str]:
+    """BANCOS_EVOLUCION_CAMEL si estan todos en los datos, si no los 3 primeros."""
+    if all(b in bancos for b in BANCOS_EVOLUCION_CAMEL):
+        return list(BANCOS_EVOLUCION_CAMEL)
+    return list(bancos[:3])
+
+
+# =============================================================================
+# PANORAMA
+# =============================================================================
+
+def indice_panorama():
+    """Indice de balance (cuentas de 1 y 2 digitos) compartido por la pagina."""
+    return cargar_indice('balance', niveles=NIVELES_PANORAMA, columnas=COLUMNAS_PANORAMA)
+
+
+@cache_por_huella()
+def calcular_metricas_sistema(fecha) -> dict:
+    """Calcula metricas agregadas del sistema para una fecha (reducciones sobre el cubo)."""
+    cubo = cargar_cubo('balance')
+
+    def total(clave: str) -> float:
+        valor = cubo.total_sistema(CODIGOS_BALANCE[clave], fecha)
+        return valor / 1000 if not pd.isna(valor) else 0
+
+    metricas = {
+        'total_activos': total('activo_total'),              # Codigo 1
+        'total_cartera': total('cartera_creditos'),          # Codigo 14
+        'total_depositos': total('obligaciones_publico'),    # Codigo 21
+        'total_patrimonio': total('patrimonio'),             # Codigo 3
+        'fondos_disponibles': total('fondos_disponibles'),   # Codigo 11
+    }
+
+    # Numero de bancos
+    metricas['num_bancos'] = len(cubo.bancos_con_datos(fecha))
+
+    return metricas
+
+
+@cache_por_huella(disco=True)
+def obtener_ranking_bancos(fecha, codigo: str, top_n: int = 10) -> pd.DataFrame:
+    """Obtiene ranking de bancos por cuenta especifica (un corte del cubo)."""
+    corte = cargar_cubo('balance').corte(codigo, fecha)
+    corte = corte[corte != 0]
+
+    if corte.empty:
+        return pd.DataFrame()
+
+    ranking = corte.rename('valor').reset_index()
+    ranking['valor_millones'] = ranking['valor'] / 1000
+    ranking = ranking.sort_values('valor', ascending=False).head(top_n)
+
+    return ranking
+
+
+@cache_por_huella()
+def calcular_concentracion_hhi(fecha) -> tuple:
+    """Calcula indice de concentracion HHI."""
+    ranking = obtener_ranking_bancos(fecha, CODIGOS_BALANCE['activo_total'], top_n=50)
+
+    if ranking.empty:
+        return 0, pd.DataFrame()
+
+    total = ranking['valor'].sum()
+    ranking['participacion'] = (ranking['valor'] / total) * 100
+    ranking['participacion_sq'] = ranking['participacion'] ** 2
+
+    hhi = ranking['participacion_sq'].sum()
+
+    return hhi, ranking
+
+
+@cache_por_huella()
+def obtener_serie_temporal(codigo: str) -> pd.DataFrame:
+    """Obtiene serie temporal agregada del sistema para una cuenta."""
+    df_cuenta = indice_panorama().codigo(codigo)
+
+    serie = df_cuenta.groupby('fecha')['valor'].sum().reset_index()
+    serie['valor_millones'] = serie['valor'] / 1000
+    serie = serie.sort_values('fecha')
+
+    return serie
+
+
+@cache_por_huella(disco=True)
+def obtener_datos_treemap_jerarquico(fecha, tipo='activos') -> pd.DataFrame:
+    """Prepara datos jerarquicos para treemap con drill-down de 2 niveles.
+
+    Args:
+        fecha: Fecha para filtrar
+        tipo: 'activos' o 'pasivos' para determinar las cuentas a incluir
+    """
+    indice = indice_panorama()
+
+    registros = []
+
+    if tipo == 'activos':
+        # Jerarquia de Activos:
+        # Nivel 1: Bancos (codigo = '1')
+        # Nivel 2: Cuentas de 2 digitos (11, 13, 14, etc.)
+
+        # Mapeo de nombres para cuentas de activos
+        cuentas_nivel2 = {
+            '11': 'Fondos Disponibles',
+            '13': 'Inversiones',
+            '14': 'Cartera de Creditos',
+            '16': 'Cuentas por Cobrar',
+            '17': 'Bienes Realizables',
+            '18': 'Propiedades y Equipo',
+            '19': 'Otros Activos'
+        }
+
+        # NIVEL 1: Totales por banco (activos totales, codigo '1')
+        activos_totales = indice.corte('1', fecha)
+        for _, row in activos_totales.iterrows():
+            if pd.notna(row['valor']) and row['valor'] > 0:
+                registros.append({
+                    'labels': row['banco'],
+                    'parents': '',
+                    'values': row['valor'] / 1000,
+                    'tipo': 'banco',
+                    'id': row['banco']
+                })
+
+        # NIVEL 2: Cuentas de 2 digitos por banco
+        for codigo, nombre in cuentas_nivel2.items():
+            df_cuenta = indice.corte(codigo, fecha)
+            for _, row in df_cuenta.iterrows():
+                if pd.notna(row['valor']) and row['valor'] > 0:
+                    id_unico = f"{row['banco']}_{nombre}"
+                    registros.append({
+                        'labels': nombre,
+                        'parents': row['banco'],
+                        'values': row['valor'] / 1000,
+                        'tipo': 'cuenta_nivel2',
+                        'id': id_unico
+                    })
+
+    elif tipo == 'pasivos':
+        # Jerarquia de Pasivos + Patrimonio:
+        # Nivel 1: Bancos (codigo = '2' + '3')
+        # Nivel 2: Cuentas de 2 digitos (21, 25, 26, etc.)
+
+        # Mapeo de nombres para cuentas de pasivos
+        cuentas_nivel2 = {
+            '21': 'Obligaciones con el Publico',
+            '25': 'Cuentas por Pagar',
+            '26': 'Obligaciones Financieras',
+            '27': 'Valores en Circulacion',
+            '29': 'Otros Pasivos',
+            '3': 'Patrimonio'
+        }
+
+        # NIVEL 1: Totales por banco (pasivo total + patrimonio)
+        # Obtener codigo '2' (pasivo total) y '3' (patrimonio)
+        pasivos = indice.corte('2', fecha).groupby('banco')['valor'].sum()
+        patrimonios = indice.corte('3', fecha).groupby('banco')['valor'].sum()
+        for banco in indice.corte('1', fecha)['banco']:
+            # Sumar pasivo total (codigo '2') + patrimonio (codigo '3')
+            valor_pasivo = pasivos.get(banco, 0.0)
+            valor_patrimonio = patrimonios.get(banco, 0.0)
+            valor_total = valor_pasivo + valor_patrimonio
+
+            if valor_total > 0:
+                registros.append({
+                    'labels': banco,
+                    'parents': '',
+                    'values': valor_total / 1000,
+                    'tipo': 'banco',
+                    'id': banco
+                })
+
+        # NIVEL 2: Cuentas de 2 digitos por banco
+        for codigo, nombre in cuentas_nivel2.items():
+            df_cuenta = indice.corte(codigo, fecha)
+            for _, row in df_cuenta.iterrows():
+                if pd.notna(row['valor']) and row['valor'] > 0:
+                    id_unico = f"{row['banco']}_{nombre}"
+                    registros.append({
+                        'labels': nombre,
+                        'parents': row['banco'],
+                        'values': row['valor'] / 1000,
+                        'tipo': 'cuenta_nivel2',
+                        'id': id_unico
+                    })
+
+    df_tree = pd.DataFrame(registros)
+
+    # Calcular participaciones solo para el nivel raiz
+    if not df_tree.empty:
+        total_sistema = df_tree[df_tree['parents'] == '']['values'].sum()
+        if total_sistema > 0:
+            df_tree['participacion'] = (df_tree['values'] / total_sistema) * 100
+        else:
+            df_tree['participacion'] = 0
+
+    return df_tree
+
+
+# =============================================================================
+# BALANCE GENERAL
+# =============================================================================
+
+@cache_por_huella(disco=True)
+def obtener_jerarquia_cuentas() -> dict:
+    """
+    Construye un diccionario jerárquico de cuentas.
+    Retorna: {codigo_1d: {nombre, subcuentas: {codigo_2d: {nombre, subcuentas: {codigo_4d: {nombre, subcuentas: {codigo_6d: nombre}}}}}}}
+    """
+    indice = cargar_indice('balance')
+    cuentas = pd.DataFrame({'codigo': indice.codigos, 'cuenta': [indice.nombre(c) for c in indice.codigos]})
+    cuentas = cuentas[cuentas['codigo'].str.match(r'^[0-9]+$', na=False)]
+
+    jerarquia = {}
+
+    # Nivel 1: 1 dígito (activos, pasivos, patrimonio, contingentes, orden)
+    for _, row in cuentas[cuentas['codigo'].str.len() == 1].iterrows():
+        if row['codigo'] in ['1', '2', '3', '6', '7']:  # Incluir cuentas de orden
+            jerarquia[row['codigo']] = {
+                'nombre': row['cuenta'],
+                'subcuentas': {}
+            }
+
+    # Nivel 2: 2 dígitos
+    for _, row in cuentas[cuentas['codigo'].str.len() == 2].iterrows():
+        parent = row['codigo'][0]
+        if parent in jerarquia:
+            jerarquia[parent]['subcuentas'][row['codigo']] = {
+                'nombre': row['cuenta'],
+                'subcuentas': {}
+            }
+
+    # Nivel 3: 4 dígitos
+    for _, row in cuentas[cuentas['codigo'].str.len() == 4].iterrows():
+        parent_1d = row['codigo'][0]
+        parent_2d = row['codigo'][:2]
+        if parent_1d in jerarquia and parent_2d in jerarquia[parent_1d]['subcuentas']:
+            jerarquia[parent_1d]['subcuentas'][parent_2d]['subcuentas'][row['codigo']] = {
+                'nombre': row['cuenta'],
+                'subcuentas': {}
+            }
+
+    # Nivel 4: 6 dígitos
+    for _, row in cuentas[cuentas['codigo'].str.len() == 6].iterrows():
+        parent_1d = row['codigo'][0]
+        parent_2d = row['codigo'][:2]
+        parent_4d = row['codigo'][:4]
+        if (parent_1d in jerarquia and
+            parent_2d in jerarquia[parent_1d]['subcuentas'] and
+            parent_4d in jerarquia[parent_1d]['subcuentas'][parent_2d]['subcuentas']):
+            jerarquia[parent_1d]['subcuentas'][parent_2d]['subcuentas'][parent_4d]['subcuentas'][row['codigo']] = row['cuenta']
+
+    return jerarquia
+
+
+@cache_por_huella()
+def obtener_serie_banco(banco: str, codigo: str, fecha_inicio=None, fecha_fin=None) -> pd.DataFrame:
+    """
+    Obtiene serie temporal de un banco para una cuenta especifica.
+
+    Lee una sola fila de series_balance (los meses reportados sin valor
+    para la cuenta vienen con 0).
+    """
+    df_filtrado = filtrar_por_periodos(cargar_serie('balance', codigo, (banco,)), fecha_inicio, fecha_fin)
+    df_filtrado = df_filtrado.sort_values('fecha')
+    df_filtrado['valor_millones'] = df_filtrado['valor'] / 1000
+    return df_filtrado[['fecha', 'valor', 'valor_millones']]
+
+
+@cache_por_huella()
+def obtener_serie_sistema(codigo: str, fecha_inicio=None, fecha_fin=None) -> pd.DataFrame:
+    """Obtiene serie temporal agregada del sistema (meses con datos en el rango)."""
+    # Meses en que ningun banco tiene valor para la cuenta suman 0
+    desde = fecha_a_periodo(fecha_inicio) if fecha_inicio is not None else None
+    hasta = fecha_a_periodo(fecha_fin) if fecha_fin is not None else None
+    meses = pd.Series([f for f in fechas_disponibles('balance')
+                       if (desde is None or fecha_a_periodo(f) >= desde) and
+                       (hasta is None or fecha_a_periodo(f) <= hasta)], name='fecha')
+    serie = serie_sistema('balance', codigo, 'valor', desde, hasta)
+    serie = serie.set_index('fecha')['valor'].reindex(meses, fill_value=0).reset_index()
+    serie['valor_millones'] = serie['valor'] / 1000
+    serie = serie.sort_values('fecha')
+    return serie
+
+
+@cache_por_huella(disco=True)
+def obtener_datos_heatmap_mensual(codigo: str, bancos: list = None,
+                                   fecha_inicio: pd.Timestamp = None, fecha_fin: pd.Timestamp = None) -> pd.DataFrame:
+    """Prepara datos para heatmap de crecimiento YoY mensual por banco.
+
+    Calcula el crecimiento de cada mes vs el mismo mes del año anterior.
+    Retorna matriz: filas = bancos, columnas = fechas (YYYY-MM)
+
+    NOTA: Usa la serie completa de la cuenta (sin filtrar) para calcular
+    YoY correctamente, luego filtra el resultado por fecha_inicio/fecha_fin.
+    """
+    # Crecimiento YoY: cada mes vs mismo mes año anterior (periodo - 12).
+    # Si falta un año en la serie no hay valor anterior, en vez de comparar
+    # contra el año disponible previo.
+    df_filtrado = variacion_anual('balance', codigo, 'valor', fecha_inicio, fecha_fin, bancos)
+
+    if df_filtrado.empty:
+        return pd.DataFrame()
+
+    df_filtrado['valor_millones'] = df_filtrado['valor'] / 1000
+    df_filtrado['crecimiento_yoy'] = df_filtrado['variacion_pct']
+
+    # Crear columna fecha_str para el pivote
+    df_filtrado['fecha_str'] = df_filtrado['fecha'].dt.strftime('%Y-%m')
+
+    # Pivotar: filas = bancos, columnas = fecha_str
+    heatmap_data = df_filtrado.pivot_table(
+        index='banco',
+        columns='fecha_str',
+        values='crecimiento_yoy',
+        aggfunc='first'
+    )
+
+    # Ordenar bancos por valor del último período disponible (más grande arriba)
+    ultima_fecha = df_filtrado['fecha'].max()
+    valores_ultima_fecha = df_filtrado[df_filtrado['fecha'] == ultima_fecha].set_index('banco')['valor_millones']
+    orden_bancos = valores_ultima_fecha.sort_values(ascending=True).index
+    heatmap_data = heatmap_data.reindex(orden_bancos)
+
+    return heatmap_data
+
+
+@cache_por_huella(disco=True)
+def obtener_valores_bancos_mes(codigo: str, fecha: pd.Timestamp) -> pd.DataFrame:
+    """Obtiene valores de todos los bancos para una cuenta y mes especificos.
+
+    Args:
+        codigo: Codigo de cuenta contable
+        fecha: Fecha especifica (se usara año y mes)
+
+    Returns:
+        DataFrame con columnas: banco, valor_millones (ordenado descendente)
+    """
+    # Bancos del mes de mayor a menor valor (una fila por banco)
+    df_filtrado = ranking('balance', codigo, fecha)
+
+    # Filtrar solo valores positivos (los NaN no pasan la comparacion)
+    df_filtrado = df_filtrado[df_filtrado['valor'] > 0].copy()
+
+    if df_filtrado.empty:
+        return pd.DataFrame()
+
+    df_filtrado['valor_millones'] = df_filtrado['valor'] / 1000
+    return df_filtrado[['banco', 'valor_millones']]
+
+
+# =============================================================================
+# PERDIDAS Y GANANCIAS
+# =============================================================================
+
+@cache_por_huella()
+def obtener_fechas_con_12m() -> list:
+    """Fechas con al menos un valor_12m valido (mas reciente primero)."""
+    df_pyg, _ = cargar_pyg(columnas=['fecha', 'valor_12m'])
+    return obtener_fechas_disponibles(df_pyg[df_pyg['valor_12m'].notna()])
+
+
+def obtener_sistema_12m(codigo: str, periodo_inicio: int, periodo_fin: int) -> pd.DataFrame:
+    """Total del sistema (valor_12m) por fecha para un codigo."""
+    return serie_sistema('pyg', codigo, 'valor_12m', periodo_inicio, periodo_fin)
+
+
+# =============================================================================
+# CAMEL
+# =============================================================================
+
+@cache_por_huella()
+def obtener_fecha_disponible(codigo: str, fecha_objetivo) -> pd.Timestamp:
+    """
+    Obtiene la fecha mas reciente disponible para un indicador.
+    Si no existe dato para la fecha objetivo, busca el mes anterior.
+
+    Esto maneja el caso del indice de solvencia que tiene rezago de 1 mes.
+    """
+    df_codigo = cargar_indice('camel').codigo(codigo)
+    if df_codigo.empty:
+        return fecha_objetivo
+
+    # Las filas del codigo vienen ordenadas por periodo: ultimo periodo con
+    # datos hasta el objetivo (el propio objetivo si existe)
+    periodos = df_codigo['periodo'].to_numpy()
+    fin = int(np.searchsorted(periodos, fecha_a_periodo(fecha_objetivo), 'right'))
+
+    # Si no hay ninguna fecha anterior, retornar la mas reciente
+    ultimo = periodos[fin - 1] if fin else periodos[-1]
+    return df_codigo['fecha'].iat[int(np.searchsorted(periodos, ultimo, 'left'))]
+
+
+@cache_por_huella(disco=True)
+def obtener_ranking_indicador(codigo: str, fecha, excluir_bancos: list = None) -> Tuple[pd.DataFrame, pd.Timestamp]:
+    """
+    Obtiene ranking de bancos para un indicador en una fecha.
+
+    Returns:
+        Tuple[DataFrame, Timestamp]: banco, valor y valor_pct de mayor a
+        menor, y la fecha con datos usada (puede ser anterior a `fecha`)
+    """
+    # Obtener fecha disponible (maneja rezago)
+    fecha_real = obtener_fecha_disponible(codigo, fecha)
+
+    # Bancos de mayor a menor valor
+    df_filtrado = ranking('camel', codigo, fecha_real)
+
+    # Excluir bancos si se especifica
+    if excluir_bancos:
+        df_filtrado = df_filtrado[~df_filtrado['banco'].isin(excluir_bancos)].copy()
+
+    df_filtrado['valor_pct'] = df_filtrado['valor'] * 100
+    return df_filtrado[['banco', 'valor', 'valor_pct']], fecha_real
+
+
+@cache_por_huella()
+def obtener_evolucion_indicador(codigo: str, bancos: list) -> pd.DataFrame:
+    """Obtiene evolucion temporal de un indicador para varios bancos (series_camel)."""
+    df_filtrado = cargar_serie('camel', codigo, tuple(bancos)).copy()
+    df_filtrado = df_filtrado.sort_values(['banco', 'fecha'])
+    df_filtrado['valor_pct'] = df_filtrado['valor'] * 100
+    return df_filtrado
+
+
+@cache_por_huella(disco=True)
+def obtener_heatmap_indicador(codigo: str, fecha_inicio=None, fecha_fin=None) -> pd.DataFrame:
+    """Obtiene datos para heatmap de un indicador (bancos x meses)."""
+    # Pivot: bancos x meses (Año-Mes) dentro del rango
+    heatmap_data = heatmap('camel', codigo, fecha_inicio, fecha_fin)
+
+    if heatmap_data.empty:
+        return pd.DataFrame()
+
+    # Ordenar por tamaño de banco (activos)
+    try:
+        # Ordenar bancos del heatmap por activos (de menor a mayor, para que mayor quede arriba)
+        bancos_ordenados = obtener_orden_bancos_por_activos()[::-1]
+        bancos_en_heatmap = [b for b in bancos_ordenados if b in heatmap_data.index]
+
+        # Reordenar heatmap
+        if bancos_en_heatmap:
+            heatmap_data = heatmap_data.reindex(bancos_en_heatmap)
+    except Exception:
+        # Si falla la carga de balance, ordenar por ultimo periodo
+        if len(heatmap_data.columns) > 0:
+            ultima_col = heatmap_data.columns[-1]
+            heatmap_data = heatmap_data.sort_values(ultima_col, ascending=False, na_position='last')
+
+    return heatmap_data * 100  # Convertir a porcentaje